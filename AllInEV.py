@@ -0,0 +1,192 @@
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from BatchEvaluator import evaluate_batch
+from HandHistory import ACTION, ACTIONS, BOARD, CHIP_UNITS, HEADER, SEAT, HandHistoryReader
+from PotLedger import PotLedger
+
+STAGE_BOARD = (0, 3, 4, 5)  # アクションのストリートごとに見えているボードの枚数
+FOLD = ACTIONS.index('fold')
+CHUNK_SIZE = 20000
+_PERMUTATIONS = list(itertools.permutations(range(4)))
+_INDEXES = {}
+
+
+def _runout_indexes(deck_size, need):
+    """残りのデッキの何枚目を配るかの全組み合わせ (R, need)。デッキの枚数ごとに一度だけ作る"""
+    key = (deck_size, need)
+    if key not in _INDEXES:
+        count = math.comb(deck_size, need)
+        flat = itertools.chain.from_iterable(itertools.combinations(range(deck_size), need))
+        _INDEXES[key] = np.fromiter(flat, dtype=np.uint8, count=count * need).reshape(count, need)
+    return _INDEXES[key]
+
+
+def canonical(holes, board):
+    """スートの入れ替えと席の並べ替えで同じになるオールインを1つの形にそろえる
+
+    (ボード, 並べ替えたホールカード, 並び) を返す。並び order[i] は、そろえた形の i 番目が
+    元の holes の何番目かを表す。
+    """
+    best = None
+    for perm in _PERMUTATIONS:
+        mapped = [tuple(sorted(((a & ~3) | perm[a & 3], (b & ~3) | perm[b & 3]), reverse=True))
+                  for a, b in holes]
+        order = tuple(sorted(range(len(holes)), key=mapped.__getitem__))
+        key = (tuple(sorted((c & ~3) | perm[c & 3] for c in board)), tuple(mapped[i] for i in order))
+        if best is None or key < best[:2]:
+            best = key + (order,)
+    return best
+
+
+@lru_cache(maxsize=1 << 16)
+def layer_equity(holes, board, layers):
+    """ボードの残りを配り切ったときの、ポットの層ごとの各プレイヤーの取り分の期待値
+
+    holes は [(a, b), ...]、layers は層ごとの獲得できるプレイヤー番号 (holes の添字) のタプル。
+    プリフロップも含めて残りのボードをすべて列挙するので近似は入らない (ヘッズアップの
+    プリフロップで約170万通り)。ランアウトごとの役は全員分を一度だけ求め、すべての層で使い回す。
+    """
+    dead = set(board)
+    for a, b in holes:
+        dead.update((a, b))
+    deck = np.array([c for c in range(52) if c not in dead], dtype=np.uint8)
+    need = 5 - len(board)
+    cards = np.empty((1, 7), dtype=np.uint8)
+    if need:
+        runouts = deck[_runout_indexes(len(deck), need)]
+        cards = np.empty((len(runouts), 7), dtype=np.uint8)
+        cards[:, 2 + len(board):] = runouts
+    cards[:, 2:2 + len(board)] = board
+    ranks = np.empty((len(holes), len(cards)), dtype=np.uint32)
+    for i, hole in enumerate(holes):
+        cards[:, :2] = hole
+        ranks[i] = evaluate_batch(cards)
+
+    result = []
+    for eligible in layers:
+        sub = ranks[list(eligible)]
+        winners = sub == sub.max(axis=0)
+        shares = (winners / winners.sum(axis=0)).mean(axis=1)
+        result.append(tuple(float(s) for s in shares))
+    return tuple(result)
+
+
+def analyze_hand(buffer, offset):
+    """1ハンドを読み直して、席ごとの実際の収支・オールイン補正後の収支・オールインに参加したかを返す
+
+    最後のアクションの後にボードが配られていれば、そのアクションの時点をオールインとみなす
+    (skip_to_showdown で残りのカードをめくった場合)。そこで残っていたプレイヤーのエクイティで
+    サイドポットの層ごとに取り分を配った額を補正後の収支にする。エクイティはプリフロップも
+    含めて残りのボードの全列挙で求める (近似はない)。金額は履歴の単位 (整数)。
+    """
+    _, _, num_seats, _, board_count, action_count = HEADER.unpack_from(buffer, offset)
+    start = offset + HEADER.size
+    seats = [SEAT.unpack_from(buffer, start + i * SEAT.size) for i in range(num_seats)]
+    start += num_seats * SEAT.size
+    board = tuple(buffer[start:start + board_count])
+    start += BOARD.size
+
+    ledger = PotLedger(num_seats)
+    stage = 0
+    for seat, code, stage, amount in ACTION.iter_unpack(buffer[start:start + action_count * ACTION.size]):
+        if code == FOLD:
+            ledger.fold(seat)
+        elif amount:
+            ledger.bet(seat, amount)
+    actual = [payout - spent for (_, _, _, payout), spent in zip(seats, ledger.contributed)]
+
+    live = [s for s in range(num_seats) if ledger.live[s]]
+    known = STAGE_BOARD[stage]
+    if len(live) < 2 or known >= board_count:
+        return actual, actual, [False] * num_seats
+
+    holes = [(seats[s][0], seats[s][1]) for s in live]
+    board_key, holes_key, order = canonical(holes, board[:known])
+    seats_in_order = [live[i] for i in order]
+    position = {seat: i for i, seat in enumerate(seats_in_order)}
+    pots = ledger.side_pots()
+    layers = tuple(tuple(sorted(position[s] for s in eligible)) for _, eligible in pots)
+    shares = layer_equity(holes_key, board_key, layers)
+    expected = [-spent for spent in ledger.contributed]
+    for (amount, _), eligible, layer in zip(pots, layers, shares):
+        for i, share in zip(eligible, layer):
+            expected[seats_in_order[i]] += share * amount
+    return actual, expected, ledger.live
+
+
+def _analyze_chunk(path, start, stop):
+    """[start, stop) 番目のハンドを集計する (プロセスプールのワーカーで動く)"""
+    totals = {}
+    with HandHistoryReader(path) as reader:
+        buffer = reader.data
+        offsets = reader.offsets
+        for i in range(start, stop):
+            actual, expected, all_ins = analyze_hand(buffer, offsets[i])
+            for seat, (real, ev, all_in) in enumerate(zip(actual, expected, all_ins)):
+                row = totals.setdefault(seat, [0, 0, 0, 0.0])
+                row[0] += 1
+                row[1] += all_in
+                row[2] += real
+                row[3] += ev
+    return totals
+
+
+def analyze(path, workers=1, chunk_size=None):
+    """ハンド履歴ファイル全体を chunk_size ハンドずつに分け、workers プロセスで集計する
+
+    chunk_size を省略すると、小さなファイルでも全プロセスに仕事が行きわたるように
+    1プロセスあたり4チャンク程度 (最大 CHUNK_SIZE ハンド) に分ける。
+    席ごとに {'hands', 'all_ins', 'actual', 'ev'} (収支はチップ) と全体の処理時間を返す。
+    """
+    start_time = time.perf_counter()
+    with HandHistoryReader(path) as reader:
+        count = len(reader)
+    if chunk_size is None:
+        chunk_size = max(1, min(CHUNK_SIZE, math.ceil(count / (workers * 4))))
+    chunks = [(path, i, min(count, i + chunk_size)) for i in range(0, count, chunk_size)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_analyze_chunk, *zip(*chunks)))
+    else:
+        results = [_analyze_chunk(*chunk) for chunk in chunks]
+
+    totals = {}
+    for result in results:
+        for seat, row in result.items():
+            total = totals.setdefault(seat, [0, 0, 0, 0.0])
+            for i, value in enumerate(row):
+                total[i] += value
+    elapsed = time.perf_counter() - start_time
+    return {
+        'hands': count,
+        'elapsed': elapsed,
+        'hands_per_sec': count / elapsed if elapsed > 0 else float('inf'),
+        'seats': {
+            seat: {
+                'hands': hands,
+                'all_ins': all_ins,
+                'actual': actual / CHIP_UNITS,
+                'ev': ev / CHIP_UNITS,
+            }
+            for seat, (hands, all_ins, actual, ev) in sorted(totals.items())
+        },
+    }
+
+
+if __name__ == "__main__":
+    # 例: python AllInEV.py hands.hh 8  (履歴ファイル, プロセス数)
+    path = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    result = analyze(path, workers)
+    for seat, s in result['seats'].items():
+        print(f"seat {seat + 1}: {s['hands']} hands, {s['all_ins']} all-ins, "
+              f"actual {s['actual']:+.1f}, all-in EV {s['ev']:+.1f}, luck {s['actual'] - s['ev']:+.1f}")
+    print(f"{result['hands']} hands in {result['elapsed']:.1f}s: {result['hands_per_sec']:.0f} hands/sec")
@@ -0,0 +1,93 @@
+import sys
+import time
+
+import numpy as np
+
+from HandEvaluator import (
+    CARD_BIT, CARD_KEY, COUNT_BITS, FLUSH_CHECK, FLUSH_TABLE, SUIT_BITS, UNSUITED_TABLE,
+    evaluate,
+)
+
+CHUNK = 1 << 16  # キャッシュに収まる程度の行数ずつ処理する
+
+_CARD_KEY = np.array(CARD_KEY, dtype=np.uint64)
+_CARD_BIT = np.array(CARD_BIT, dtype=np.uint16)
+_FLUSH_TABLE = np.array(FLUSH_TABLE, dtype=np.uint32)
+_DENSE_TABLES = {}
+
+
+def _dense_table(n):
+    """n枚用のランク多重集合テーブルを、ランクキーの和で直接引ける配列にする"""
+    table = _DENSE_TABLES.get(n)
+    if table is None:
+        entries = [
+            (key >> COUNT_BITS, rank) for key, rank in UNSUITED_TABLE.items()
+            if key & ((1 << COUNT_BITS) - 1) == n
+        ]
+        keys, values = np.array(entries, dtype=np.int64).T
+        table = np.zeros(keys.max() + 1, dtype=np.uint32)
+        table[keys] = values
+        _DENSE_TABLES[n] = table
+    return table
+
+
+def evaluate_batch(cards):
+    """(N, 5〜7) のカードID配列から役の整数の配列 (N,) を返す
+
+    1行ずつの Python ループは使わない。ランクの枚数分布はランクキーの和 (完全ハッシュ)、
+    スートの枚数は4ビットずつのカウンタとして、列ごとのテーブル参照と足し算でまとめて求める。
+    結果は HandEvaluator.evaluate と同じ値になる。
+    """
+    cards = np.asarray(cards, dtype=np.uint8)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError("cards は (N, 5〜7) の配列にしてください")
+    n = cards.shape[1]
+    table = _dense_table(n)
+    ranks = np.empty(len(cards), dtype=np.uint32)
+
+    for start in range(0, len(cards), CHUNK):
+        columns = np.ascontiguousarray(cards[start:start + CHUNK].T)
+        key = _CARD_KEY[columns[0]]
+        for column in columns[1:]:
+            key += _CARD_KEY[column]
+
+        flush = ((key & np.uint64(0xFFFF)) + np.uint64(FLUSH_CHECK)) & np.uint64(0x8888)
+        out = table[(key >> np.uint64(SUIT_BITS + COUNT_BITS)).astype(np.intp)]
+
+        rows = flush.nonzero()[0]
+        if len(rows):
+            # 5枚以上あるスート (7枚以内なら1つだけ) のランクビットを集める
+            flush_bits = flush[rows]
+            suit = ((flush_bits > 0x8).astype(np.uint8) + (flush_bits > 0x80) + (flush_bits > 0x800))
+            sub = columns[:, rows]
+            mask = np.zeros(len(rows), dtype=np.uint16)
+            for column in sub:
+                mask |= np.where((column & 3) == suit, _CARD_BIT[column], 0).astype(np.uint16)
+            out[rows] = _FLUSH_TABLE[mask]
+        ranks[start:start + CHUNK] = out
+    return ranks
+
+
+def random_hands(count, size=7, seed=None):
+    """重複のないランダムなカードID配列 (count, size) を作る"""
+    rng = np.random.default_rng(seed)
+    return rng.random((count, 52)).argpartition(size, axis=1)[:, :size].astype(np.uint8)
+
+
+if __name__ == "__main__":
+    # スカラー版との一致確認とスループット計測: python BatchEvaluator.py [手数]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    for size in (5, 6, 7):
+        hands = random_hands(20000, size, seed=size)
+        batch = evaluate_batch(hands)
+        scalar = [evaluate(row) for row in hands.tolist()]
+        if batch.tolist() != scalar:
+            raise SystemExit(f"{size}枚でスカラー版と結果が一致しません")
+    print("batch and scalar evaluators agree on 5/6/7-card hands")
+
+    hands = random_hands(count, 7, seed=0)
+    evaluate_batch(hands[:CHUNK])  # テーブル作成を計測から除く
+    start = time.perf_counter()
+    evaluate_batch(hands)
+    elapsed = time.perf_counter() - start
+    print(f"{count} hands in {elapsed:.3f}s: {count / elapsed / 1e6:.1f}M hands/sec")
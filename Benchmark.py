@@ -0,0 +1,204 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from Deck import CARDS
+from HandEvaluator import best_hand, hand_strength
+from Main import TexasHoldem
+from PotLedger import to_units
+from Simulation import CallPolicy, RandomPolicy, TightPolicy, play_hands
+
+SEED = 20240601
+
+
+def _best_time(func, repeat):
+    """func を repeat 回実行して一番速かった時間を返す"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _throughput(func, count, repeat, unit):
+    return {'value': count / _best_time(func, repeat), 'unit': unit, 'higher_is_better': True}
+
+
+def _latency(samples, name):
+    samples = sorted(samples)
+    results = {}
+    for pct in (50, 95, 99):
+        value = samples[min(len(samples) - 1, int(len(samples) * pct / 100))] * 1000
+        results[f"{name}_p{pct}"] = {'value': value, 'unit': 'ms', 'higher_is_better': False}
+    return results
+
+
+def _random_hands(rng, count, size):
+    return [rng.sample(CARDS, size) for _ in range(count)]
+
+
+def bench_evaluator(repeat):
+    rng = random.Random(SEED)
+    fives = _random_hands(rng, 20000, 5)
+    sevens = _random_hands(rng, 20000, 7)
+    return {
+        'hand_strength': _throughput(lambda: [hand_strength(h) for h in fives], len(fives), repeat, 'hands/s'),
+        'best_hand': _throughput(lambda: [best_hand(h) for h in sevens], len(sevens), repeat, 'hands/s'),
+    }
+
+
+def _showdown_table(players, seed):
+    """players 人がリバーまで残った状態のテーブルを作る"""
+    game = TexasHoldem(verbose=False, seed=seed)
+    game.start_hand()
+    for i, player in enumerate(game.players):
+        player.in_hand = i < players
+        player.current_bet = 0
+    for stage in ('flop', 'turn', 'river'):
+        game.deal_board(stage)
+    return game
+
+
+def bench_determine_winner(repeat, count=2000):
+    results = {}
+    for players in range(2, 7):
+        game = _showdown_table(players, SEED + players)
+
+        def run():
+            for _ in range(count):
+                game.ledger.reset()
+                for i, player in enumerate(game.players):
+                    player.stack = 100
+                    game.ledger.bet(i, to_units(10 if i < players else 2))
+                    if i >= players:
+                        game.ledger.fold(i)
+                game.determine_winner()
+
+        results[f"determine_winner_{players}p"] = _throughput(run, count, repeat, 'calls/s')
+    return results
+
+
+def bench_side_pots(repeat, count=20000):
+    """複数人のオールインで額の違うサイドポットができる状態"""
+    game = _showdown_table(6, SEED)
+    game.ledger.reset()
+    contributions = [3, 10, 25, 25, 60, 100]
+    for seat, amount in enumerate(contributions):
+        game.ledger.bet(seat, to_units(amount))
+    game.ledger.fold(2)
+
+    def run():
+        for _ in range(count):
+            game.update_side_pots()
+
+    return {'update_side_pots': _throughput(run, count, repeat, 'calls/s')}
+
+
+def bench_hands(repeat, count=2000):
+    policies = [TightPolicy(), RandomPolicy(), CallPolicy(), TightPolicy(), RandomPolicy(), CallPolicy()]
+    return {'process_action_hands': _throughput(lambda: play_hands(policies, count, SEED), count, repeat, 'hands/s')}
+
+
+def bench_web(requests=500):
+    import app as web
+
+    client = web.app.test_client()
+    game = web.registry.get_or_create(web.DEFAULT_TABLE).game
+    game.reseed(SEED)
+    game.start_hand()
+    rng = random.Random(SEED)
+    index_times = []
+    action_times = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get('/')
+        index_times.append(time.perf_counter() - start)
+
+        if game.stage == 'showdown':
+            client.post('/new')
+        action = rng.choice(['call', 'call', 'call', 'raise', 'fold'])
+        start = time.perf_counter()
+        client.post('/action', data={'action': action, 'amount': game.current_bet + 2})
+        action_times.append(time.perf_counter() - start)
+    results = _latency(index_times, 'get_index')
+    results.update(_latency(action_times, 'post_action'))
+    return results
+
+
+def run_all(repeat=3, web=True):
+    results = {}
+    results.update(bench_evaluator(repeat))
+    results.update(bench_determine_winner(repeat))
+    results.update(bench_side_pots(repeat))
+    results.update(bench_hands(repeat))
+    if web:
+        results.update(bench_web())
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """baseline より threshold (割合) 以上悪くなった項目を返す"""
+    regressions = []
+    for name, current in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or base['value'] == 0:
+            continue
+        if current['higher_is_better']:
+            change = (base['value'] - current['value']) / base['value']
+        else:
+            change = (current['value'] - base['value']) / base['value']
+        if change > threshold:
+            regressions.append((name, base['value'], current['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="評価器・エンジン・Web のベンチマーク")
+    parser.add_argument('--output', default='bench_results.json', help="結果を書き出すファイル")
+    parser.add_argument('--baseline', default='bench_baseline.json', help="比較するベースライン")
+    parser.add_argument('--save-baseline', action='store_true', help="結果をベースラインとして保存する")
+    parser.add_argument('--threshold', type=float, default=0.10, help="悪化とみなす割合 (0.10 = 10%%)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-web', action='store_true', help="Flask のリクエスト計測を省く")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.repeat, web=not args.no_web)
+    for name, r in results['results'].items():
+        print(f"{name:28} {r['value']:14.2f} {r['unit']}")
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline} (create one with --save-baseline)")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, change in regressions:
+        print(f"REGRESSION {name}: {base:.2f} -> {current:.2f} ({change:+.0%})")
+    if not regressions:
+        print(f"no regressions above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,49 @@
 class Card:
+    """52枚それぞれ1つだけのオブジェクトを使い回す (Card('A', 's') は毎回同じオブジェクトを返す)
+
+    属性は作ったあとに変更できない。
+    """
+
+    __slots__ = ('rank', 'suit', 'id', 'rank_index', 'suit_index')
+
     SUITS = ['c', 'd', 'h', 's']
     RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+    _RANK_INDEX = {r: i for i, r in enumerate(RANKS)}
+    _SUIT_INDEX = {s: i for i, s in enumerate(SUITS)}
+    _INTERNED = [None] * 52
+
+    def __new__(cls, rank, suit):
+        # 役判定用の整数表現 (上位ビットがランク、下位2ビットがスート: 0〜51)
+        card_id = cls._RANK_INDEX[rank] << 2 | cls._SUIT_INDEX[suit]
+        card = cls._INTERNED[card_id]
+        if card is None:
+            card = object.__new__(cls)
+            for name, value in (('rank', rank), ('suit', suit), ('id', card_id),
+                                ('rank_index', card_id >> 2), ('suit_index', card_id & 3)):
+                object.__setattr__(card, name, value)
+            cls._INTERNED[card_id] = card
+        return card
 
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    @classmethod
+    def from_id(cls, card_id):
+        """整数表現 (rank << 2 | suit) からカードを返す"""
+        card = cls._INTERNED[card_id]
+        if card is None:
+            card = cls(cls.RANKS[card_id >> 2], cls.SUITS[card_id & 3])
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("カードは変更できません")
+
+    def __reduce__(self):
+        # pickle や copy でも同じオブジェクトに戻す
+        return (Card.from_id, (self.id,))
 
     def __str__(self):
         return f"{self.rank}{self.suit}"  # カードのランクとスートを文字列として返す
 
+    def __repr__(self):
+        return f"Card('{self.rank}', '{self.suit}')"
+
     def rank_value(self):
-        return Card.RANKS.index(self.rank)
+        return self.rank_index
@@ -0,0 +1,46 @@
+import random
+
+from Card import Card
+
+# 52枚のカードはあらかじめ作っておき、全ハンドで同じオブジェクトを使う
+CARDS = tuple(Card.from_id(i) for i in range(52))
+CARD_IDS = tuple(range(52))
+
+
+class Deck:
+    """カードIDの配列を使い回すデッキ
+
+    シャッフルは配るときに1枚ずつ行う (部分的な Fisher–Yates)。
+    6人のハンドでは最大17枚しか使わないので、52枚すべてを並べ替える必要はない。
+    同じシードで shuffle すれば同じ順番でカードが出てくる。
+    """
+
+    def __init__(self, seed=None):
+        self.ids = list(CARD_IDS)
+        self.remaining = 52
+        self.rng = random.Random(seed)
+
+    def shuffle(self, seed=None):
+        """デッキを52枚に戻す。seed を指定するとその乱数列で配る"""
+        self.ids[:] = CARD_IDS
+        self.remaining = 52
+        if seed is not None:
+            self.rng.seed(seed)
+
+    def pop(self):
+        """残りのカードからランダムに1枚引く"""
+        n = self.remaining
+        if n == 0:
+            raise IndexError("デッキにカードが残っていません")
+        ids = self.ids
+        j = int(self.rng.random() * n)
+        ids[j], ids[n - 1] = ids[n - 1], ids[j]
+        self.remaining = n - 1
+        return CARDS[ids[n - 1]]
+
+    def remaining_ids(self):
+        """まだ配っていないカードID (順番に意味はない)"""
+        return self.ids[:self.remaining]
+
+    def __len__(self):
+        return self.remaining
@@ -0,0 +1,255 @@
+import random
+import sys
+import time
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from Card import Card
+from HandEvaluator import CARD_KEY, evaluate_key
+
+
+def parse_cards(text):
+    """'AsKd' や 'As Kd' のような文字列を Card のリストにする"""
+    text = text.replace(" ", "").replace(",", "")
+    return [Card(text[i].upper(), text[i + 1].lower()) for i in range(0, len(text), 2)]
+
+
+def live_deck(hands, board):
+    """まだ見えていないカードIDの一覧を返す"""
+    dead = {card.id for hand in hands for card in hand} | {card.id for card in board}
+    if len(dead) != sum(len(hand) for hand in hands) + len(board):
+        raise ValueError("同じカードが複数回指定されています")
+    return [i for i in range(52) if i not in dead]
+
+
+def _winners(players, key, cards):
+    """ボードのキーの和 key とカード cards から勝者の席番号の一覧を返す"""
+    best = -1
+    winners = []
+    for seat, (hole_key, hole) in enumerate(players):
+        rank = evaluate_key(key + hole_key, hole + cards)
+        if rank > best:
+            best = rank
+            winners = [seat]
+        elif rank == best:
+            winners.append(seat)
+    return winners
+
+
+def _tally(winners, wins, ties, shares, squares):
+    if len(winners) == 1:
+        seat = winners[0]
+        wins[seat] += 1
+        shares[seat] += 1.0
+        squares[seat] += 1.0
+    else:
+        share = 1.0 / len(winners)
+        for seat in winners:
+            ties[seat] += 1
+            shares[seat] += share
+            squares[seat] += share * share
+
+
+def _run_batch(hole_ids, board_ids, deck, trials, seed):
+    """ランダムにボードを配って勝ち・引き分け・エクイティの合計を数える"""
+    rng = random.Random(seed)
+    sample = rng.sample
+    need = 5 - len(board_ids)
+    board_key = sum(CARD_KEY[i] for i in board_ids)
+    players = [(CARD_KEY[a] + CARD_KEY[b], [a, b]) for a, b in hole_ids]
+    n = len(players)
+    wins = [0] * n
+    ties = [0] * n
+    shares = [0.0] * n
+    squares = [0.0] * n
+
+    for _ in range(trials):
+        runout = sample(deck, need)
+        key = board_key
+        for i in runout:
+            key += CARD_KEY[i]
+        _tally(_winners(players, key, board_ids + runout), wins, ties, shares, squares)
+    return wins, ties, shares, squares
+
+
+def monte_carlo_equity(hands, board=(), trials=100000, workers=1, seed=None,
+                       confidence=0.95, margin=None, batch_size=5000, executor=None):
+    """モンテカルロ法で各プレイヤーの勝率・引き分け率・エクイティを求める
+
+    hands は Player.hand と同じ Card 2枚のリストを並べたもの。
+    margin を指定すると、信頼区間の半幅が全員 margin 以下になった時点で打ち切る。
+    workers が2以上 (または executor を渡した場合) はバッチをプロセスに分けて実行する。
+    バッチごとに seed から独立した乱数列を作るので、同じ引数なら結果も同じになる。
+    """
+    hands = [list(hand) for hand in hands]
+    board = list(board)
+    if len(hands) < 2:
+        raise ValueError("エクイティの計算には2人以上が必要です")
+    if len(board) > 5:
+        raise ValueError("ボードは5枚までです")
+    deck = live_deck(hands, board)
+    hole_ids = [tuple(card.id for card in hand) for hand in hands]
+    board_ids = [card.id for card in board]
+    if seed is None:
+        seed = random.getrandbits(64)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    n = len(hands)
+    wins = [0] * n
+    ties = [0] * n
+    shares = [0.0] * n
+    squares = [0.0] * n
+    done = 0
+    batch = 0
+    error = 1.0
+    start = time.perf_counter()
+
+    own_executor = None
+    if executor is None and workers > 1:
+        executor = own_executor = ProcessPoolExecutor(max_workers=workers)
+    per_round = workers if executor is not None else 1
+    try:
+        while done < trials:
+            sizes = []
+            for _ in range(per_round):
+                size = min(batch_size, trials - done - sum(sizes))
+                if size <= 0:
+                    break
+                sizes.append(size)
+            seeds = [f"{seed}-{batch + i}" for i in range(len(sizes))]
+            batch += len(sizes)
+            if executor is not None:
+                futures = [
+                    executor.submit(_run_batch, hole_ids, board_ids, deck, size, s)
+                    for size, s in zip(sizes, seeds)
+                ]
+                results = [f.result() for f in futures]
+            else:
+                results = [_run_batch(hole_ids, board_ids, deck, sizes[0], seeds[0])]
+
+            for result in results:
+                for seat in range(n):
+                    wins[seat] += result[0][seat]
+                    ties[seat] += result[1][seat]
+                    shares[seat] += result[2][seat]
+                    squares[seat] += result[3][seat]
+            done += sum(sizes)
+
+            error = 0.0
+            for seat in range(n):
+                mean = shares[seat] / done
+                variance = max(squares[seat] / done - mean * mean, 0.0)
+                error = max(error, z * (variance / done) ** 0.5)
+            if margin is not None and error <= margin:
+                break
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'players': [
+            {
+                'win': wins[seat] / done,
+                'tie': ties[seat] / done,
+                'equity': shares[seat] / done,
+            }
+            for seat in range(n)
+        ],
+        'trials': done,
+        'margin': error,
+        'elapsed': elapsed,
+        'trials_per_sec': done / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def exact_equity(hands, board):
+    """フロップ以降の残りのランアウトをすべて列挙してエクイティとアウツを求める
+
+    ランアウトごとにボードのキーを一度だけ計算し、全プレイヤーで使い回す。
+    アウツは次の1枚のうち、現在勝っていないプレイヤーを勝ち (引き分けを含む) にするカード。
+    """
+    hands = [list(hand) for hand in hands]
+    board = list(board)
+    if len(hands) < 2:
+        raise ValueError("エクイティの計算には2人以上が必要です")
+    if not 3 <= len(board) <= 5:
+        raise ValueError("全列挙はフロップ以降 (ボード3〜5枚) で使います")
+    start = time.perf_counter()
+    deck = live_deck(hands, board)
+    board_ids = [card.id for card in board]
+    board_key = sum(CARD_KEY[i] for i in board_ids)
+    players = [
+        (CARD_KEY[a.id] + CARD_KEY[b.id], [a.id, b.id]) for a, b in hands
+    ]
+
+    n = len(hands)
+    wins = [0] * n
+    ties = [0] * n
+    shares = [0.0] * n
+    squares = [0.0] * n
+    runouts = 0
+    for runout in combinations(deck, 5 - len(board)):
+        key = board_key
+        for i in runout:
+            key += CARD_KEY[i]
+        _tally(_winners(players, key, board_ids + list(runout)), wins, ties, shares, squares)
+        runouts += 1
+
+    outs = [[] for _ in range(n)]
+    if len(board) < 5:
+        leaders = _winners(players, board_key, board_ids)
+        for i in deck:
+            for seat in _winners(players, board_key + CARD_KEY[i], board_ids + [i]):
+                if seat not in leaders:
+                    outs[seat].append(Card.from_id(i))
+
+    return {
+        'players': [
+            {
+                'win': wins[seat] / runouts,
+                'tie': ties[seat] / runouts,
+                'equity': shares[seat] / runouts,
+                'outs': outs[seat],
+            }
+            for seat in range(n)
+        ],
+        'runouts': runouts,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def player_equity(players, board, **kwargs):
+    """ハンドに残っているプレイヤーのエクイティを名前ごとに返す
+
+    フロップ以降は全列挙、プリフロップはモンテカルロ法 (kwargs はそちらに渡す)
+    """
+    in_hand = [p for p in players if p.in_hand and p.hand]
+    if len(board) >= 3:
+        result = exact_equity([p.hand for p in in_hand], board)
+    else:
+        result = monte_carlo_equity([p.hand for p in in_hand], board, **kwargs)
+    return {p.name: stats for p, stats in zip(in_hand, result['players'])}
+
+
+if __name__ == "__main__":
+    # 例: python Equity.py AsKs QhQd --board 2c7d9h
+    args = sys.argv[1:]
+    board = []
+    if "--board" in args:
+        i = args.index("--board")
+        board = parse_cards(args[i + 1])
+        args = args[:i] + args[i + 2:]
+    hands = [parse_cards(a) for a in args]
+    if len(board) >= 3:
+        result = exact_equity(hands, board)
+        for text, stats in zip(args, result['players']):
+            outs = " ".join(map(str, stats['outs']))
+            print(f"{text}: equity {stats['equity']:.4f} (win {stats['win']:.4f}, tie {stats['tie']:.4f}) outs: {outs}")
+        print(f"{result['runouts']} runouts in {result['elapsed'] * 1000:.1f} ms")
+    else:
+        result = monte_carlo_equity(hands, board, trials=200000, workers=4, margin=0.002)
+        for text, stats in zip(args, result['players']):
+            print(f"{text}: equity {stats['equity']:.4f} (win {stats['win']:.4f}, tie {stats['tie']:.4f})")
+        print(f"{result['trials']} trials, ±{result['margin']:.4f}, {result['trials_per_sec']:.0f} trials/sec")
@@ -0,0 +1,56 @@
+# TexasHoldem が発行するイベントと、コールバックの引数 (最初の引数は常にゲーム)
+#   hand_started  (game)                               ブラインドを払った直後
+#   action        (game, player, action, amount, stage) amount はそのアクションで出したチップ
+#   street_dealt  (game, stage, cards)                 cards はそのストリートで開いたカード
+#   showdown      (game, hands)                        hands は showdown_hands と同じ形
+#   pot_awarded   (game, player, amount, pot)          pot はポット番号 (0 がメイン)
+#   hand_ended    (game, payouts)                      payouts はプレイヤー名 -> 獲得額
+# 以下は対話モード (play_hand) のベッティングラウンドだけが発行する
+#   betting_round (game, stage)                        ラウンドの開始
+#   player_turn   (game, player, to_call)              入力を求める直前
+#   invalid_action(game, player, message)              入力をやり直させるとき
+EVENTS = ('hand_started', 'action', 'street_dealt', 'showdown', 'pot_awarded', 'hand_ended',
+          'betting_round', 'player_turn', 'invalid_action')
+
+
+class ConsoleListener:
+    """ゲームの進行をコンソールに表示する (TexasHoldem(verbose=True) で登録される)"""
+
+    def hand_started(self, game):
+        print("\n-- Player Positions --")
+        for player in game.players:
+            print(player)
+
+    def street_dealt(self, game, stage, cards):
+        print(f"\nBoard ({stage}): {' '.join(map(str, game.board))}")
+
+    def showdown(self, game, hands):
+        print(f"\nPot total: {game.pot}")
+        for name, value in game.allin_equity.items():
+            print(f"{name}: equity {value['equity']:.1%}, EV {value['ev']:.2f}")
+        print("\n-- Showdown --")
+        for name, shown in hands.items():
+            hand_str = ' '.join(map(str, shown['hand']))
+            best_str = ' '.join(map(str, shown['best']))
+            print(f"{name}: {hand_str} -> {shown['hand_name']} ({best_str})")
+
+    def pot_awarded(self, game, player, amount, pot):
+        if sum(1 for p in game.players if p.in_hand) == 1:
+            print(f"\n{player.name} wins the pot of {amount} as all other players folded!")
+        else:
+            print(f"{player.name} wins {amount} chips from pot {pot + 1}")
+
+    def hand_ended(self, game, payouts):
+        print("\n-- Final Player States --")
+        for player in game.players:
+            print(player)
+
+    def betting_round(self, game, stage):
+        print(f"\n--- {stage.upper()} BETTING ROUND ---")
+        print(f"total pot {game.pot}")
+
+    def player_turn(self, game, player, to_call):
+        print(f"\n{player.name}'s turn (stack: {player.stack}, bet: {player.current_bet}, to call: {to_call})")
+
+    def invalid_action(self, game, player, message):
+        print(message)
@@ -1,100 +1,378 @@
-from itertools import combinations
-from collections import Counter
+import os
+from itertools import combinations, combinations_with_replacement
+from collections import Counter, OrderedDict
 
 
 RANK_ORDER = "23456789TJQKA"
 RANK_VALUE = {r: i for i, r in enumerate(RANK_ORDER)}
 REVERSE_RANK_ORDER = RANK_ORDER[::-1]  # "AKQJT98765432"
+SUIT_ORDER = "cdhs"
 
+HAND_NAMES = [
+    "ハイカード",
+    "ワンペア",
+    "ツーペア",
+    "スリーカード",
+    "ストレート",
+    "フラッシュ",
+    "フルハウス",
+    "フォーカード",
+    "ストレートフラッシュ",
+    "ロイヤルストレートフラッシュ",
+]
+
+# ランクごとのキー。7枚までならどのランクの組み合わせでも和が衝突しない (完全ハッシュ)
+RANK_KEYS = (0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181)
+SUIT_BITS = 16  # キーの下位16ビットはスートごとの枚数 (4ビットずつ)
+COUNT_BITS = 4  # その上の4ビットは枚数。枚数が違うと和が衝突しうるのでキーに含める
+FLUSH_CHECK = 0x3333  # 足して 0x8888 のどこかが立てば5枚以上同じスートがある
+
+# カードID (rank << 2 | suit) ごとのキーとランクビット
+CARD_KEY = [
+    (RANK_KEYS[i >> 2] << COUNT_BITS | 1) << SUIT_BITS | 1 << (4 * (i & 3)) for i in range(52)
+]
+CARD_BIT = [1 << (i >> 2) for i in range(52)]
 
-def hand_strength(hand):
-    hand = sorted(hand, key=lambda c: RANK_VALUE[c.rank], reverse=True)
-    counts = Counter(card.rank for card in hand)
-    count_vals = list(reversed(sorted(counts.values())))
-    groups = sorted(counts.items(), key=lambda c: (c[1], RANK_VALUE[c[0]]), reverse=True)
-
-    ranks = "".join(card.rank for card in hand)
-    suits = [card.suit for card in hand]
-    is_flush = len(set(suits)) == 1
-    is_straight = ranks in REVERSE_RANK_ORDER or ranks == "A5432"
-    if ranks == "A5432":
-        straight_vals = (
-            RANK_VALUE["5"],
-            RANK_VALUE["4"],
-            RANK_VALUE["3"],
-            RANK_VALUE["2"],
-            -1,
-        )
-    else:
-        straight_vals = tuple(RANK_VALUE[r] for r in ranks)
 
-    if is_flush and ranks == "AKQJT":
-        return (9,) + tuple(RANK_VALUE[r] for r, _ in groups), "ロイヤルストレートフラッシュ"
+def _classify(ranks, is_flush):
+    """降順に並んだ5枚のランクから比較用タプルを作る"""
+    counts = Counter(ranks)
+    count_vals = sorted(counts.values(), reverse=True)
+    groups = sorted(counts.items(), key=lambda g: (g[1], g[0]), reverse=True)
+    group_ranks = tuple(r for r, _ in groups)
+
+    is_wheel = ranks == (12, 3, 2, 1, 0)
+    is_straight = len(counts) == 5 and (ranks[0] - ranks[4] == 4 or is_wheel)
+    straight_vals = (3, 2, 1, 0, -1) if is_wheel else ranks
+
+    if is_flush and ranks == (12, 11, 10, 9, 8):
+        return (9,) + group_ranks
     elif is_flush and is_straight:
-        return (8,) + straight_vals, "ストレートフラッシュ"
+        return (8,) + straight_vals
     elif count_vals == [4, 1]:
-        primary, kicker = groups[0][0], groups[1][0]
-        return (7, RANK_VALUE[primary], RANK_VALUE[kicker]), "フォーカード"
+        return (7,) + group_ranks
     elif count_vals == [3, 2]:
-        primary, secondary = groups[0][0], groups[1][0]
-        return (6, RANK_VALUE[primary], RANK_VALUE[secondary]), "フルハウス"
+        return (6,) + group_ranks
     elif is_flush:
-        return (5,) + tuple(RANK_VALUE[r] for r, _ in groups), "フラッシュ"
+        return (5,) + group_ranks
     elif is_straight:
-        return (4,) + straight_vals, "ストレート"
+        return (4,) + straight_vals
     elif count_vals == [3, 1, 1]:
-        primary, kicker1, kicker2 = groups[0][0], groups[1][0], groups[2][0]
-        return (
-            3,
-            RANK_VALUE[primary],
-            RANK_VALUE[kicker1],
-            RANK_VALUE[kicker2],
-        ), "スリーカード"
+        return (3,) + group_ranks
     elif count_vals == [2, 2, 1]:
-        primary, secondary, kicker = groups[0][0], groups[1][0], groups[2][0]
-        return (
-            2,
-            RANK_VALUE[primary],
-            RANK_VALUE[secondary],
-            RANK_VALUE[kicker],
-        ), "ツーペア"
+        return (2,) + group_ranks
     elif count_vals == [2, 1, 1, 1]:
-        primary, kicker1, kicker2, kicker3 = (
-            groups[0][0],
-            groups[1][0],
-            groups[2][0],
-            groups[3][0],
-        )
-        return (
-            1,
-            RANK_VALUE[primary],
-            RANK_VALUE[kicker1],
-            RANK_VALUE[kicker2],
-            RANK_VALUE[kicker3],
-        ), "ワンペア"
+        return (1,) + group_ranks
     else:
-        return (0,) + tuple(RANK_VALUE[r] for r, _ in groups), "ハイカード"
-
-
-def best_hand(cards):
-    """最強の役とカードを左から順に並べて返す"""
-    best = max(combinations(cards, 5), key=lambda hand: hand_strength(hand)[0])
-    _, hand_name = hand_strength(best)
-
-    # カードを役に応じて並べ替える
-    if hand_name in ["ロイヤルストレートフラッシュ", "ストレートフラッシュ", "ストレート"]:
-        # ストレート系はランク順に並べる
-        sorted_hand = sorted(best, key=lambda c: RANK_VALUE[c.rank], reverse=True)
-    elif hand_name in ["フラッシュ", "ハイカード"]:
-        # フラッシュやハイカードはランク順に並べる
-        sorted_hand = sorted(best, key=lambda c: RANK_VALUE[c.rank], reverse=True)
-    elif hand_name in ["フォーカード", "フルハウス", "スリーカード", "ツーペア", "ワンペア"]:
-        # グループ化して役の強さ順に並べる
-        counts = Counter(card.rank for card in best)
-        sorted_hand = sorted(best, key=lambda c: (counts[c.rank], RANK_VALUE[c.rank]), reverse=True)
+        return (0,) + group_ranks
+
+
+def _encode(strength):
+    """比較用タプルを大小関係を保ったまま1つの整数にする"""
+    rank = strength[0]
+    kickers = strength[1:]
+    for v in kickers:
+        rank = rank << 4 | (v + 1)  # ホイールの -1 を 0 にずらす
+    return rank << 4 * (5 - len(kickers))
+
+
+def _build_tables():
+    """5〜7枚用のフラッシュテーブルとランク多重集合テーブルを作る"""
+    flush_table = [0] * (1 << 13)
+    unsuited_table = {}
+    strengths = {}
+    groups = []  # (ランクキーの和, 最後のランク, その枚数, 異なるランク) 降順の多重集合
+    for ranks in combinations(range(12, -1, -1), 5):
+        strength = _classify(ranks, True)
+        rank = _encode(strength)
+        flush_table[sum(1 << r for r in ranks)] = rank
+        strengths[rank] = (strength, HAND_NAMES[strength[0]])
+    for ranks in combinations_with_replacement(range(12, -1, -1), 5):
+        if ranks[0] == ranks[4]:
+            continue  # 同じランクは4枚まで
+        strength = _classify(ranks, False)
+        rank = _encode(strength)
+        total = sum(RANK_KEYS[r] for r in ranks)
+        unsuited_table[total << COUNT_BITS | 5] = rank
+        strengths[rank] = (strength, HAND_NAMES[strength[0]])
+        groups.append((total, ranks[4], ranks.count(ranks[4]), tuple(sorted(set(ranks), reverse=True))))
+
+    # 6枚・7枚の値は1枚抜いた組み合わせの最大値 (役は必ず5枚のどれかになる)
+    for n in (6, 7):
+        for ranks in combinations(range(12, -1, -1), n):
+            mask = sum(1 << r for r in ranks)
+            flush_table[mask] = max(flush_table[mask & ~(1 << r)] for r in ranks)
+        extended = []
+        for total, last, run, distinct in groups:
+            for r in range(last, -1, -1):
+                if r != last:
+                    group = (total + RANK_KEYS[r], r, 1, distinct + (r,))
+                elif run < 4:
+                    group = (total + RANK_KEYS[r], r, run + 1, distinct)
+                else:
+                    continue
+                unsuited_table[group[0] << COUNT_BITS | n] = max(
+                    unsuited_table[(group[0] - RANK_KEYS[d]) << COUNT_BITS | (n - 1)] for d in group[3]
+                )
+                extended.append(group)
+        groups = extended
+    return flush_table, unsuited_table, strengths
+
+
+FLUSH_TABLE, UNSUITED_TABLE, _STRENGTHS = _build_tables()
+
+
+def evaluate5(a, b, c, d, e):
+    """5枚のカードIDから役の強さを表す整数を返す (大きいほど強い)"""
+    key = CARD_KEY[a] + CARD_KEY[b] + CARD_KEY[c] + CARD_KEY[d] + CARD_KEY[e]
+    if (key + FLUSH_CHECK) & 0x8888:
+        return FLUSH_TABLE[CARD_BIT[a] | CARD_BIT[b] | CARD_BIT[c] | CARD_BIT[d] | CARD_BIT[e]]
+    return UNSUITED_TABLE[key >> SUIT_BITS]
+
+
+def evaluate(ids):
+    """5〜7枚のカードIDから最強の役の整数を返す (組み合わせを列挙しない)"""
+    key = 0
+    for i in ids:
+        key += CARD_KEY[i]
+    flush = (key + FLUSH_CHECK) & 0x8888
+    if flush:
+        # 7枚以内なら5枚以上あるスートは1つだけ
+        suit = (flush.bit_length() >> 2) - 1
+        mask = 0
+        for i in ids:
+            if i & 3 == suit:
+                mask |= CARD_BIT[i]
+        return FLUSH_TABLE[mask]
+    return UNSUITED_TABLE[key >> SUIT_BITS]
+
+
+def evaluate_key(key, ids):
+    """カードキーの和から役の整数を返す (ids はフラッシュのときだけ使う)
+
+    ボードのキーを先に足しておけば、プレイヤーごとにホールカードの分を足すだけで済む
+    """
+    flush = (key + FLUSH_CHECK) & 0x8888
+    if flush:
+        suit = (flush.bit_length() >> 2) - 1
+        mask = 0
+        for i in ids:
+            if i & 3 == suit:
+                mask |= CARD_BIT[i]
+        return FLUSH_TABLE[mask]
+    return UNSUITED_TABLE[key >> SUIT_BITS]
+
+
+def hand_rank(cards):
+    """5〜7枚の Card から最強の役の整数を返す (enable_cache をしていればキャッシュを使う)"""
+    if _CACHE is None:
+        return evaluate([card.id for card in cards])
+    return _CACHE.rank([card.id for card in cards])
+
+
+# ---- 役の整数のキャッシュ (既定では使わない。enable_cache で有効にする) ----
+
+def canonical_mask(ids):
+    """スートの入れ替えで同じになるカードの組に共通の 52 ビットのキー
+
+    スートごとの 13 ビットのランクの集合を小さい順に並べて詰める。役はスートの入れ替えで変わらない。
+    """
+    masks = [0, 0, 0, 0]
+    for i in ids:
+        masks[i & 3] |= 1 << (i >> 2)
+    masks.sort()
+    return masks[0] | masks[1] << 13 | masks[2] << 26 | masks[3] << 39
+
+
+class LRUCache:
+    """最近使った順に size 件まで残す"""
+
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def rank(self, ids):
+        key = canonical_mask(ids)
+        data = self.data
+        value = data.get(key)
+        if value is not None:
+            self.hits += 1
+            data.move_to_end(key)
+            return value
+        self.misses += 1
+        value = data[key] = evaluate(ids)
+        if len(data) > self.size:
+            data.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {'policy': 'lru', 'size': self.size, 'entries': len(self.data),
+                'hits': self.hits, 'misses': self.misses}
+
+
+class ClockCache:
+    """CLOCK 法で追い出す (ヒット時は参照ビットを立てるだけなので LRU より軽い)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = {}  # キー -> 位置
+        self.keys = [None] * size
+        self.values = [0] * size
+        self.referenced = bytearray(size)
+        self.hand = 0
+        self.hits = 0
+        self.misses = 0
+
+    def rank(self, ids):
+        key = canonical_mask(ids)
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.hits += 1
+            self.referenced[slot] = 1
+            return self.values[slot]
+        self.misses += 1
+        value = evaluate(ids)
+        # 参照ビットが立っていれば下ろして次へ進み、立っていない位置を使う
+        referenced = self.referenced
+        while referenced[self.hand]:
+            referenced[self.hand] = 0
+            self.hand = (self.hand + 1) % self.size
+        slot = self.hand
+        self.hand = (slot + 1) % self.size
+        old = self.keys[slot]
+        if old is not None:
+            del self.slots[old]
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.slots[key] = slot
+        return value
+
+    def stats(self):
+        return {'policy': 'clock', 'size': self.size, 'entries': len(self.slots),
+                'hits': self.hits, 'misses': self.misses}
+
+
+class SharedCache:
+    """共有メモリ上のダイレクトマップのキャッシュ (プロセスプールのワーカーで1つを共有する)
+
+    位置ごとに 64 ビットの語を2つ使う。1つ目はキー、2つ目はキーから作った検査用の 40 ビットと
+    役の整数 (24 ビット)。ロックは取らないので、書き込みが重なったときは検査が合わずミスになるだけ。
+    name を渡すと既存の共有メモリにつなぐ (作ったプロセスが unlink する)。
+    リソーストラッカーを共有する multiprocessing の子プロセスからつなぐことを前提にしている。
+    """
+
+    def __init__(self, size=1 << 20, name=None):
+        from multiprocessing import shared_memory
+        self.size = size
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size * 16)
+            self.memory.buf[:size * 16] = bytes(size * 16)
+            self.owner = os.getpid()
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.size = self.memory.size // 16
+            self.owner = None
+        self.name = self.memory.name
+        self.words = self.memory.buf.cast('Q')
+        self.hits = 0
+        self.misses = 0
+
+    def rank(self, ids):
+        key = canonical_mask(ids)
+        # 位置と検査値はキーを別々の定数で混ぜた上位ビットから取る (下位ビットは偏る)
+        slot = (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % self.size * 2
+        check = ((key * 0xC2B2AE3D27D4EB4F) & 0xFFFFFFFFFFFFFFFF) >> 24
+        words = self.words
+        if words[slot] == key:
+            packed = words[slot + 1]
+            if packed >> 24 == check:
+                self.hits += 1
+                return packed & 0xFFFFFF
+        self.misses += 1
+        value = evaluate(ids)
+        words[slot] = key
+        words[slot + 1] = check << 24 | value
+        return value
+
+    def stats(self):
+        return {'policy': 'shared', 'size': self.size, 'name': self.name,
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        self.words.release()
+        self.memory.close()
+        if self.owner == os.getpid():  # fork したワーカーが引き継いだものは消さない
+            self.memory.unlink()
+
+
+_CACHE = None
+CACHE_POLICIES = {'lru': LRUCache, 'clock': ClockCache}
+
+
+def enable_cache(size=1 << 16, policy='lru', shared=None):
+    """hand_rank (best_hand, hand_strength, ショーダウン) で役の整数をキャッシュする
+
+    shared=True なら共有メモリに新しく作り、共有メモリの名前を渡すとそれにつなぐ
+    (ワーカーの initializer で enable_cache(shared=親の cache.name) を呼ぶ)。作ったキャッシュを返す。
+    """
+    global _CACHE
+    disable_cache()
+    if shared is not None and shared is not False:
+        _CACHE = SharedCache(size, None if shared is True else shared)
+    elif policy in CACHE_POLICIES:
+        _CACHE = CACHE_POLICIES[policy](size)
     else:
-        # その他の場合もランク順に並べる
-        sorted_hand = sorted(best, key=lambda c: RANK_VALUE[c.rank], reverse=True)
+        raise ValueError(f"不明なキャッシュの方式 {policy}")
+    return _CACHE
+
+
+def disable_cache():
+    global _CACHE
+    if isinstance(_CACHE, SharedCache):
+        _CACHE.close()
+    _CACHE = None
+
+
+def cache_stats():
+    """キャッシュのヒット・ミスの数など (無効なら None)"""
+    return None if _CACHE is None else _CACHE.stats()
+
+
+def rank_to_strength(rank):
+    """役の整数を (比較用タプル, 役名) に戻す"""
+    return _STRENGTHS[rank]
+
+
+def hand_strength(hand):
+    return _STRENGTHS[hand_rank(hand)]
+
+
+# 役ごとに、比較用タプルの各ランクを何枚ずつ使うか
+_GROUP_SIZES = {7: (4, 1), 6: (3, 2), 3: (3, 1, 1), 2: (2, 2, 1), 1: (2, 1, 1, 1)}
+
+
+def best_hand(cards, rank=None):
+    """最強の役とカードを左から順に並べて返す (rank が分かっていれば再評価しない)"""
+    if rank is None:
+        rank = hand_rank(cards)
+    strength, _ = _STRENGTHS[rank]
+    category = strength[0]
+
+    if category in (5, 8, 9):
+        # フラッシュ系は5枚以上あるスートのカードだけから選ぶ
+        suits = [card.id & 3 for card in cards]
+        suit = max(set(suits), key=suits.count)
+        cards = [card for card in cards if card.id & 3 == suit]
 
-    return sorted_hand
+    # 比較用タプルのランク順に、同じランクは元の並び順で取り出す
+    best = []
+    for r, size in zip(strength[1:], _GROUP_SIZES.get(category, (1,) * 5)):
+        r %= 13  # ホイールの -1 は A
+        best += [card for card in cards if card.id >> 2 == r][:size]
 
+    if category in (4, 8):
+        # ストレート系はランク順に並べる (ホイールは A が先頭)
+        best.sort(key=lambda c: RANK_VALUE[c.rank], reverse=True)
+    return best
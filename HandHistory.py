@@ -0,0 +1,223 @@
+import mmap
+import os
+import struct
+import sys
+
+from Card import Card
+
+# ファイル形式 (すべてリトルエンディアンの固定長レコード)
+#   データファイル: MAGIC の後にハンドを追記していく
+#     HEADER  ハンド番号, シード, 席数, ディーラー位置, ボード枚数, アクション数
+#     SEAT    席数分。ホールカード2枚 (カードID), 開始時スタック, 獲得額
+#     BOARD   5バイト。カードID (未公開は 0xFF)
+#     ACTION  アクション数分。席, 種類, ストリート, 出したチップ
+#   インデックスファイル (データファイル名 + '.idx'): 各ハンドの開始位置を uint64 で並べたもの
+# チップは CHIP_UNITS 倍した整数で保存する
+MAGIC = b'THH\x01'
+HEADER = struct.Struct('<QQBBBxHxx')
+SEAT = struct.Struct('<BBxxii')
+BOARD = struct.Struct('<5s')
+ACTION = struct.Struct('<BBBxi')
+OFFSET = struct.Struct('<Q')
+CHIP_UNITS = 100
+NO_CARD = 0xFF
+
+ACTIONS = ['sb', 'bb', 'fold', 'call', 'raise']
+STAGES = ['preflop', 'flop', 'turn', 'river']
+
+
+def _units(chips):
+    return int(round(chips * CHIP_UNITS))
+
+
+class HandHistoryWriter:
+    """ハンドの記録を追記する。TexasHoldem.history に設定すると自動で記録される"""
+
+    def __init__(self, path, flush_every=1000):
+        self.path = path
+        self.flush_every = flush_every
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.data = open(path, 'ab')
+        self.index = open(path + '.idx', 'ab')
+        if new_file:
+            self.data.write(MAGIC)
+        self.offset = self.data.tell()
+        self.hand_id = self.index.tell() // OFFSET.size
+        self.pending = []  # まだ書き出していないハンド (bytes)
+        self.current = None
+
+    def begin(self, game):
+        """ブラインドを払った直後のゲーム状態からハンドの記録を始める"""
+        seats = []
+        actions = []
+        for seat, player in enumerate(game.players):
+            seats.append([player.hand[0].id, player.hand[1].id, _units(player.stack + player.current_bet), 0])
+        sb_pos, bb_pos = game.blind_positions()
+        actions.append((sb_pos, ACTIONS.index('sb'), 0, _units(game.players[sb_pos].current_bet)))
+        actions.append((bb_pos, ACTIONS.index('bb'), 0, _units(game.players[bb_pos].current_bet)))
+        self.current = {
+            'seed': game.hand_seed or 0,
+            'dealer': game.dealer_position,
+            'seats': seats,
+            'actions': actions,
+        }
+
+    def action(self, seat, action, amount, stage):
+        """amount はそのアクションで実際に出したチップ"""
+        if self.current is not None:
+            self.current['actions'].append(
+                (seat, ACTIONS.index(action), STAGES.index(stage), _units(amount))
+            )
+
+    def end(self, game, payouts):
+        """payouts はプレイヤー名 -> 獲得額"""
+        hand = self.current
+        if hand is None:
+            return
+        self.current = None
+        for seat, player in enumerate(game.players):
+            hand['seats'][seat][3] = _units(payouts.get(player.name, 0))
+        board = bytes(card.id for card in game.board).ljust(5, bytes([NO_CARD]))
+
+        parts = [HEADER.pack(self.hand_id, hand['seed'], len(hand['seats']), hand['dealer'],
+                             len(game.board), len(hand['actions']))]
+        parts += [SEAT.pack(*seat) for seat in hand['seats']]
+        parts.append(BOARD.pack(board))
+        parts += [ACTION.pack(*action) for action in hand['actions']]
+        record = b''.join(parts)
+
+        self.pending.append(record)
+        self.hand_id += 1
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        offsets = []
+        for record in self.pending:
+            offsets.append(OFFSET.pack(self.offset))
+            self.offset += len(record)
+        self.data.write(b''.join(self.pending))
+        self.data.flush()
+        # インデックスはデータを書いた後に追記する (途中で落ちても壊れたハンドを指さない)
+        self.index.write(b''.join(offsets))
+        self.index.flush()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HandRecord:
+    """mmap 上の1ハンド分。必要になった部分だけを読み出す"""
+
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.offset = offset
+        (self.hand_id, self.seed, self.num_seats, self.dealer,
+         self.board_count, self.action_count) = HEADER.unpack_from(buffer, offset)
+
+    @property
+    def seats(self):
+        """席ごとの {'hand': [Card, Card], 'stack': 開始時スタック, 'payout': 獲得額}"""
+        start = self.offset + HEADER.size
+        seats = []
+        for i in range(self.num_seats):
+            a, b, stack, payout = SEAT.unpack_from(self.buffer, start + i * SEAT.size)
+            seats.append({
+                'hand': [Card.from_id(a), Card.from_id(b)],
+                'stack': stack / CHIP_UNITS,
+                'payout': payout / CHIP_UNITS,
+            })
+        return seats
+
+    @property
+    def board_ids(self):
+        start = self.offset + HEADER.size + self.num_seats * SEAT.size
+        return list(self.buffer[start:start + self.board_count])
+
+    @property
+    def board(self):
+        return [Card.from_id(i) for i in self.board_ids]
+
+    @property
+    def actions(self):
+        """(席, アクション, ストリート, 出したチップ) の一覧"""
+        start = self.offset + HEADER.size + self.num_seats * SEAT.size + BOARD.size
+        return [
+            (seat, ACTIONS[code], STAGES[stage], amount / CHIP_UNITS)
+            for seat, code, stage, amount in ACTION.iter_unpack(
+                self.buffer[start:start + self.action_count * ACTION.size]
+            )
+        ]
+
+    @property
+    def size(self):
+        return (HEADER.size + self.num_seats * SEAT.size + BOARD.size
+                + self.action_count * ACTION.size)
+
+
+class HandHistoryReader:
+    """データファイルとインデックスを mmap して、ハンドを順番にまたは番号で読む"""
+
+    def __init__(self, path):
+        self.data_file = open(path, 'rb')
+        self.index_file = open(path + '.idx', 'rb')
+        self.data = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} はハンド履歴ファイルではありません")
+        index_size = os.fstat(self.index_file.fileno()).st_size
+        if index_size:
+            self.index_map = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.offsets = memoryview(self.index_map).cast('Q')
+        else:
+            self.index_map = None
+            self.offsets = []
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        return HandRecord(self.data, self.offsets[i])
+
+    def __iter__(self):
+        for offset in self.offsets:
+            yield HandRecord(self.data, offset)
+
+    def close(self):
+        if self.index_map is not None:
+            self.offsets.release()
+            self.index_map.close()
+        self.data.close()
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # 例: python HandHistory.py hands.hh 10
+    with HandHistoryReader(sys.argv[1]) as reader:
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else len(reader)
+        print(f"{len(reader)} hands")
+        for i in range(max(0, len(reader) - count), len(reader)):
+            hand = reader[i]
+            board = ' '.join(map(str, hand.board))
+            holes = ' | '.join(' '.join(map(str, s['hand'])) for s in hand.seats)
+            print(f"#{hand.hand_id} seed={hand.seed} board=[{board}] hands=[{holes}]")
+            for seat, action, stage, amount in hand.actions:
+                print(f"  {stage:7} seat {seat + 1} {action} {amount:g}")
+            print("  payouts: " + ', '.join(
+                f"seat {i + 1} {s['payout']:g}" for i, s in enumerate(hand.seats) if s['payout']
+            ))
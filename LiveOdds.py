@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from Equity import exact_equity, monte_carlo_equity
+from Metrics import REGISTRY
+
+PREFLOP_TRIALS = 20000
+PREFLOP_MARGIN = 0.005
+
+
+def compute_odds(hands, board):
+    """各ハンドのエクイティとアウツ (フロップ以降は全列挙、プリフロップはモンテカルロ)"""
+    if len(board) >= 3:
+        result = exact_equity(hands, board)
+    else:
+        # 同じ状況なら同じ値を出すように、シードはカードから決める
+        seed = ','.join(str(card) for hand in hands for card in hand)
+        result = monte_carlo_equity(hands, board, trials=PREFLOP_TRIALS, margin=PREFLOP_MARGIN, seed=seed)
+    return [
+        {'equity': stats['equity'], 'outs': [str(card) for card in stats.get('outs', [])]}
+        for stats in result['players']
+    ]
+
+
+class OddsService:
+    """テーブルのエクイティ計算をプロセスプールで行う (全テーブルで共有する)
+
+    計算は CPU を使い続ける (プリフロップで 150ms ほど) ので、スレッドではなく別のプロセスで行い、
+    Web のスレッドが GIL を待たないようにする。結果は (ハンドの並び, ボード) ごとに LRU でキャッシュする。
+    HTTP のリクエストは計算を待たない。終わった結果は Table.notify で購読者に送る。
+    """
+
+    def __init__(self, workers=1, cache_size=1024, registry=REGISTRY):
+        self.workers = workers
+        self.executor = None
+        self.pid = None
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.jobs = registry.counter('holdem_odds_jobs_total', "Equity jobs by result")
+
+    def cached(self, key):
+        with self.lock:
+            odds = self.cache.get(key)
+            if odds is not None:
+                self.cache.move_to_end(key)
+            return odds
+
+    def store(self, key, odds):
+        with self.lock:
+            self.cache[key] = odds
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def request(self, table):
+        """今のハンドとボードの計算を始める (テーブルのロックを取った状態で呼ぶ)
+
+        呼ぶたびに世代を進めるので、古い世代の計算はまだプールに渡っていなければ取り消され、
+        終わっていても結果は捨てられる。
+        """
+        game = table.game
+        with table.odds_lock:
+            table.odds_generation += 1
+            generation = table.odds_generation
+            table.odds = None
+        seats = [i for i, p in enumerate(game.players) if p.in_hand and p.hand]
+        if table.odds_future is not None and table.odds_future.cancel():
+            self.jobs.inc(result='cancelled')
+        table.odds_future = None
+        if len(seats) < 2:
+            return
+        hands = [list(game.players[i].hand) for i in seats]
+        names = [game.players[i].name for i in seats]
+        board = list(game.board)
+        key = (tuple(card.id for hand in hands for card in hand), tuple(card.id for card in board))
+        odds = self.cached(key)
+        if odds is not None:
+            self.jobs.inc(result='cached')
+            self._publish(table, generation, seats, names, board, odds)
+            return
+        future = self.pool().submit(compute_odds, hands, board)
+        table.odds_future = future
+        future.add_done_callback(lambda f: self._finish(f, table, generation, seats, names, board, key))
+
+    def pool(self):
+        """プロセスプール (最初に使うときに作る。fork した子プロセスでは作り直す)"""
+        if self.executor is None or self.pid != os.getpid():
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.pid = os.getpid()
+        return self.executor
+
+    def _finish(self, future, table, generation, seats, names, board, key):
+        # プールの管理スレッドで呼ばれる (取り消されたときも呼ばれる)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.jobs.inc(result='error')
+            return
+        odds = future.result()
+        self.store(key, odds)
+        if self._publish(table, generation, seats, names, board, odds):
+            self.jobs.inc(result='done')
+        else:
+            self.jobs.inc(result='stale')  # 計算中に次のストリートに進んだ
+
+    def _publish(self, table, generation, seats, names, board, odds):
+        """世代がまだ最新なら結果を table.odds に入れて購読者に送る。古ければ何もせず False を返す
+
+        世代の確認・書き込み・送信は table.odds_lock の中で行い、その間に request で進んだ世代を
+        古い結果で上書きしたり、新しい結果より後に古い結果を送ったりしないようにする。
+        """
+        with table.odds_lock:
+            if generation != table.odds_generation:
+                return False
+            table.odds = {
+                'generation': generation,
+                'board': [str(card) for card in board],
+                'players': [dict(row, seat=seat, name=name) for seat, name, row in zip(seats, names, odds)],
+            }
+            table.notify({'odds': table.odds})
+        return True
+
+    def shutdown(self):
+        if self.executor is not None and self.pid == os.getpid():
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class OddsListener:
+    """ハンドの開始と新しいストリートで OddsService に計算を頼むリスナー (テーブルごと)"""
+
+    def __init__(self, service, table):
+        self.service = service
+        self.table = table
+
+    def hand_started(self, game):
+        self.service.request(self.table)
+
+    def street_dealt(self, game, stage, cards):
+        self.service.request(self.table)
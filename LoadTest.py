@@ -0,0 +1,467 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode, urlsplit
+
+from Card import Card
+from Simulation import CallPolicy, RandomPolicy, TightPolicy
+
+POLICIES = {'random': RandomPolicy, 'call': CallPolicy, 'tight': TightPolicy}
+BIG_BLIND = 1  # TexasHoldem の既定のブラインド
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+# /state が取れないときの待ち時間 (秒)。失敗が続くと倍にしていき、成功したら戻す
+BACKOFF_START = 0.05
+BACKOFF_MAX = 2.0
+
+
+# ---- サーバー (別プロセスで python LoadTest.py --serve ... として動く) ----
+
+def _exit_on_sigterm():
+    """SIGTERM で普通に終了する (エクイティ計算のプロセスプールも終了時に止まり、子プロセスが残らない)"""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def serve(model, host, port, workers):
+    """app.py を threaded (1プロセス・接続ごとにスレッド) または prefork (workers 個のプロセス) で動かす
+
+    prefork では親が待ち受けソケットを作ってから fork し、各子プロセスが app を読み込む。
+    プロセス間でテーブルを共有するため、TABLE_STORE がなければ一時ディレクトリのファイルストアを使う。
+    """
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    if model == 'threaded':
+        from app import app
+        _exit_on_sigterm()
+        make_server(host, port, app, threaded=True).serve_forever()
+        return
+    if model != 'prefork':
+        raise ValueError(f"不明なサーバーの方式 {model}")
+
+    created = None
+    if not os.environ.get('TABLE_STORE'):
+        created = tempfile.mkdtemp(prefix='holdem-load-')
+        os.environ['TABLE_STORE'] = 'file:' + created
+    os.environ.setdefault('SECRET_KEY', os.urandom(16).hex())  # セッションのクッキーを全プロセスで読めるように
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            from app import app
+            _exit_on_sigterm()
+            make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever()
+            os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for child in children:
+            os.kill(child, signal.SIGTERM)
+        if created is not None:
+            shutil.rmtree(created, ignore_errors=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    for _ in children:
+        os.wait()
+
+
+# ---- サーバーの CPU とメモリ (/proc から読む) ----
+
+def _process_tree(pid):
+    """pid とその子孫のプロセスID"""
+    parents = {}
+    for name in os.listdir('/proc'):
+        if name.isdigit():
+            try:
+                with open(f'/proc/{name}/stat') as f:
+                    # コマンド名に空白が入ることがあるので ')' の後ろから数える
+                    parents[int(name)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    tree = [pid]
+    for p in tree:
+        tree += [child for child, parent in parents.items() if parent == p]
+    return tree
+
+
+def process_usage(pid):
+    """(CPU 時間の合計 秒, RSS の合計 バイト)。プロセスツリー全体を足す"""
+    cpu = 0.0
+    rss = 0
+    for p in _process_tree(pid):
+        try:
+            with open(f'/proc/{p}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{p}/statm') as f:
+                rss += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+    return cpu, rss
+
+
+# ---- クライアント ----
+
+class Stats:
+    """リクエストごとの (終了時刻, ルート, 応答時間, 成功したか)
+
+    recoveries はクライアント側で立て直した回数 (待ってやり直した、消えたテーブルを作り直したなど)。
+    """
+
+    def __init__(self):
+        self.samples = []
+        self.errors = {}
+        self.recoveries = {}
+
+    def record(self, route, latency, ok):
+        self.samples.append((time.perf_counter(), route, latency, ok))
+
+    def error(self, route, reason):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+        self.record(route, 0.0, False)
+
+    def recovered(self, reason):
+        self.recoveries[reason] = self.recoveries.get(reason, 0) + 1
+
+
+class HttpClient:
+    """1つの keep-alive 接続で HTTP/1.1 のリクエストを送る最小限のクライアント (クッキーだけ覚える)"""
+
+    def __init__(self, host, port, stats, timeout):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.cookies = {}
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def _exchange(self, raw):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(raw)
+        await self.writer.drain()
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'set-cookie':
+                cookie = value.split(';', 1)[0]
+                key, _, val = cookie.partition('=')
+                self.cookies[key] = val
+            headers[name] = value
+        length = int(headers.get('content-length', 0))
+        body = await self.reader.readexactly(length) if length else b''
+        if headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            await self.close()
+        return status, headers, body
+
+    async def request(self, method, path, route, form=None, headers=(), expect=()):
+        """route ごとに応答時間を記録する。4xx/5xx と通信エラーは失敗として数える
+
+        expect に入れたステータス (呼び出し側が対処する 404 など) は失敗に数えない。
+        """
+        body = urlencode(form).encode() if form is not None else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        if self.cookies:
+            lines.append("Cookie: " + '; '.join(f"{k}={v}" for k, v in self.cookies.items()))
+        if form is not None:
+            lines.append("Content-Type: application/x-www-form-urlencoded")
+        lines.append(f"Content-Length: {len(body)}")
+        lines += [f"{k}: {v}" for k, v in headers]
+        raw = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+        start = time.perf_counter()
+        for attempt in range(2):
+            reused = self.writer is not None
+            try:
+                status, response_headers, response = await asyncio.wait_for(self._exchange(raw), self.timeout)
+                break
+            except asyncio.TimeoutError:
+                await self.close()
+                self.stats.error(route, 'timeout')
+                return None, {}, b''
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+                await self.close()
+                if reused and attempt == 0:
+                    continue  # サーバーが閉じた keep-alive 接続はつなぎ直して送り直す
+                self.stats.error(route, type(e).__name__)
+                return None, {}, b''
+        failed = status >= 400 and status not in expect
+        self.stats.record(route, time.perf_counter() - start, not failed)
+        if failed:
+            self.stats.errors[f"http {status}"] = self.stats.errors.get(f"http {status}", 0) + 1
+        return status, response_headers, response
+
+
+def _policy_state(view):
+    """/state の JSON (手番のプレイヤーのカードが見えるホットシート) を Simulation のポリシーの形にする"""
+    seat = view['seats'][view['acting']]
+    return {
+        'seat': view['acting'],
+        'position': seat['position'],
+        'stage': view['stage'],
+        'hand': [Card(c[0], c[1]) for c in seat['cards']],
+        'board': [Card(c[0], c[1]) for c in view['board']],
+        'pot': view['pot'],
+        'stack': seat['stack'],
+        'bet': seat['bet'],
+        'current_bet': view['current_bet'],
+        'to_call': view['to_call'],
+        'big_blind': BIG_BLIND,
+        'players_in_hand': sum(1 for s in view['seats'] if s['in_hand']),
+        'seats': len(view['seats']),
+        'aggressor': None,
+    }
+
+
+async def _back_off(client, reason, delay, deadline, rng):
+    """reason を数えて delay 秒 (ゆらぎ付き、締め切りまで) 待ち、次の待ち時間を返す"""
+    client.stats.recovered(reason)
+    await asyncio.sleep(min(delay * rng.uniform(0.5, 1.5), max(0.0, deadline - time.perf_counter())))
+    return min(delay * 2, BACKOFF_MAX)
+
+
+async def play(client, policy, deadline, think, rng):
+    """自分のテーブルを作り、全席をホットシートで進める (ページ表示 → 状態の取得 → アクション)
+
+    /state やテーブルの作成に失敗したら (タイムアウト・5xx) 待ってからやり直し、すぐに送り直して
+    サーバーを叩き続けないようにする。テーブルが消えていたら (404) 作り直す。
+    """
+    path = None
+    delay = BACKOFF_START
+    while time.perf_counter() < deadline:
+        if path is None:
+            status, headers, _ = await client.request('POST', '/tables', 'POST /tables')
+            if status == 302:
+                path = urlsplit(headers['location']).path
+                delay = BACKOFF_START
+            else:
+                delay = await _back_off(client, 'create retry', delay, deadline, rng)
+            continue
+        await client.request('GET', path, 'GET /table', expect=(404,))
+        status, _, body = await client.request('GET', path + '/state', 'GET /state', expect=(404,))
+        if status == 404:
+            client.stats.recovered('table lost')  # 破棄されたテーブルは作り直す
+            path = None
+            continue
+        if status != 200:
+            delay = await _back_off(client, 'state retry', delay, deadline, rng)
+            continue
+        delay = BACKOFF_START
+        view = json.loads(body)
+        if view['stage'] == 'showdown':
+            await client.request('POST', path + '/new', 'POST /new')
+        else:
+            action, amount = policy.decide(_policy_state(view))
+            await client.request('POST', path + '/action', 'POST /action',
+                                 form={'action': action, 'amount': int(amount)},
+                                 headers=[('X-Requested-With', 'fetch')])
+        if think:
+            await asyncio.sleep(rng.expovariate(1 / think))
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def summarize(samples, start, end):
+    """[start, end) に終わったリクエストのルートごとの件数・失敗率・p50/p95/p99 (ms)"""
+    routes = {}
+    for finished, route, latency, ok in samples:
+        if start <= finished < end:
+            routes.setdefault(route, []).append((latency, ok))
+    result = {}
+    for route, rows in sorted(routes.items()):
+        latencies = sorted(latency for latency, ok in rows if ok)
+        errors = sum(1 for _, ok in rows if not ok)
+        result[route] = {
+            'requests': len(rows),
+            'per_sec': len(rows) / (end - start) if end > start else 0.0,
+            'error_rate': errors / len(rows),
+        }
+        for pct in (50, 95, 99):
+            result[route][f'p{pct}'] = _percentile(latencies, pct) * 1000 if latencies else None
+    return result
+
+
+async def load(host, port, clients, duration, ramp, think, policy, timeout, server_pid, interval, seed):
+    """clients 人を ramp 秒かけて増やし、合わせて duration 秒動かす
+
+    interval 秒ごとに、その間のスループット・応答時間・サーバーの CPU とメモリを記録する。
+    """
+    stats = Stats()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    deadline = start + duration
+    http = [HttpClient(host, port, stats, timeout) for _ in range(clients)]
+
+    async def client_task(i, client):
+        await asyncio.sleep(ramp * i / clients)
+        try:
+            await play(client, POLICIES[policy](), deadline, think, random.Random(rng.random()))
+        finally:
+            await client.close()
+
+    tasks = [asyncio.create_task(client_task(i, c)) for i, c in enumerate(http)]
+    timeline = []
+    cpu_before, _ = process_usage(server_pid)
+    window_start = start
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(min(interval, max(0.0, deadline - time.perf_counter())))
+        now = time.perf_counter()
+        cpu, rss = process_usage(server_pid)
+        requests = sum(1 for finished, _, _, _ in stats.samples if window_start <= finished < now)
+        latencies = sorted(l for finished, _, l, ok in stats.samples if window_start <= finished < now and ok)
+        timeline.append({
+            'time': now - start,
+            'clients': min(clients, int(clients * (now - start) / ramp) + 1) if ramp else clients,
+            'per_sec': requests / (now - window_start),
+            'p95': _percentile(latencies, 95) * 1000 if latencies else None,
+            'server_cpu': (cpu - cpu_before) / (now - window_start),
+            'server_rss': rss,
+        })
+        cpu_before = cpu
+        window_start = now
+    await asyncio.gather(*tasks, return_exceptions=True)
+    end = time.perf_counter()
+    return {
+        'routes': summarize(stats.samples, start, end),
+        'requests': len(stats.samples),
+        'per_sec': len(stats.samples) / (end - start),
+        'error_rate': sum(1 for s in stats.samples if not s[3]) / max(1, len(stats.samples)),
+        'errors': stats.errors,
+        'recoveries': stats.recoveries,
+        'timeline': timeline,
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_server(host, port, timeout=30):
+    limit = time.monotonic() + timeout
+    while time.monotonic() < limit:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("サーバーが起動しません")
+
+
+def run(clients=100, duration=30, ramp=10, think=0.0, policy='random', server='threaded', workers=4,
+        timeout=10.0, interval=1.0, seed=0, host='127.0.0.1', port=None):
+    """サーバーを起動して負荷をかけ、結果の辞書を返す (サーバーは最後に止める)"""
+    # 数千の接続を開けるように、ファイルディスクリプタの上限を上げられるところまで上げる
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    port = port or _free_port()
+    command = [sys.executable, os.path.abspath(__file__), '--serve', server,
+               '--host', host, '--port', str(port), '--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        _wait_for_server(host, port)
+        _, rss_before = process_usage(process.pid)
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        result = asyncio.run(load(host, port, clients, duration, ramp, think, policy, timeout,
+                                  process.pid, interval, seed))
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        result['client_cpu'] = (usage.ru_utime + usage.ru_stime
+                                - usage_before.ru_utime - usage_before.ru_stime) / duration
+        result['server_rss_start'] = rss_before
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    result['config'] = {
+        'clients': clients, 'duration': duration, 'ramp': ramp, 'think': think, 'policy': policy,
+        'server': server, 'workers': workers if server == 'prefork' else 1,
+    }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app.py に模擬クライアントで負荷をかける")
+    parser.add_argument('--clients', type=int, default=100, help="同時に動かすクライアント数")
+    parser.add_argument('--duration', type=float, default=30, help="全体の秒数")
+    parser.add_argument('--ramp', type=float, default=10, help="クライアントを全員そろえるまでの秒数")
+    parser.add_argument('--think', type=float, default=0.0, help="アクションの間の平均待ち時間 (秒)")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--server', choices=['threaded', 'prefork'], default='threaded')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="prefork のプロセス数")
+    parser.add_argument('--timeout', type=float, default=10.0, help="1リクエストの待ち時間の上限 (秒)")
+    parser.add_argument('--interval', type=float, default=1.0, help="経過を記録する間隔 (秒)")
+    parser.add_argument('--output', help="結果を JSON で書き出すファイル")
+    parser.add_argument('--serve', choices=['threaded', 'prefork'], help=argparse.SUPPRESS)
+    parser.add_argument('--host', default='127.0.0.1', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.host, args.port, args.workers)
+        return 0
+
+    result = run(args.clients, args.duration, args.ramp, args.think, args.policy, args.server,
+                 args.workers, args.timeout, args.interval)
+    print(f"{'time':>6} {'clients':>8} {'req/s':>8} {'p95 ms':>8} {'cpu':>6} {'rss MB':>8}")
+    for row in result['timeline']:
+        p95 = f"{row['p95']:8.1f}" if row['p95'] is not None else f"{'-':>8}"
+        print(f"{row['time']:6.1f} {row['clients']:8d} {row['per_sec']:8.1f} {p95} "
+              f"{row['server_cpu']:6.0%} {row['server_rss'] / 2**20:8.1f}")
+    print()
+    for route, r in result['routes'].items():
+        latency = ' '.join(
+            f"p{pct} {r[f'p{pct}']:.1f}ms" if r[f'p{pct}'] is not None else f"p{pct} -" for pct in (50, 95, 99)
+        )
+        print(f"{route:14} {r['requests']:8d} req {r['per_sec']:8.1f}/s  errors {r['error_rate']:.2%}  {latency}")
+    print(f"\n{result['requests']} requests, {result['per_sec']:.1f} req/s, errors {result['error_rate']:.2%} "
+          f"{result['errors'] or ''}")
+    if result['recoveries']:
+        print(f"client recoveries (失敗には数えない): {result['recoveries']}")
+    print(f"client CPU {result['client_cpu']:.0%} (同じマシンで動かすとサーバーと CPU を取り合う)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
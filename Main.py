@@ -1,16 +1,46 @@
 import random
-from Card import Card
-from HandEvaluator import hand_strength, best_hand
+from Deck import Deck
+from HandEvaluator import hand_rank, rank_to_strength, best_hand
 from Player import Player
+from PotLedger import PotLedger, to_units, to_chips
+from Equity import player_equity
+from PreflopTable import default_table
+from Events import EVENTS, ConsoleListener
+from Metrics import timed
+
+
+@timed('holdem_evaluator_seconds', "Hand evaluations at showdown")
+def showdown_rank(cards):
+    return hand_rank(cards)
 
-class TexasHoldem:
-    POSITION_NAMES = ['UTG', 'HJ', 'CO', 'BTN', 'SB', 'BB']
 
-    def __init__(self):
-        self.players = [Player(f"Player {i+1}", 100) for i in range(6)]
-        self.deck = []
+class TexasHoldem:
+    # 人数ごとのポジション名 (プリフロップで最初に行動する人から順に)
+    POSITION_NAMES = {
+        2: ['BTN', 'BB'],
+        3: ['BTN', 'SB', 'BB'],
+        4: ['CO', 'BTN', 'SB', 'BB'],
+        5: ['HJ', 'CO', 'BTN', 'SB', 'BB'],
+        6: ['UTG', 'HJ', 'CO', 'BTN', 'SB', 'BB'],
+        7: ['UTG', 'LJ', 'HJ', 'CO', 'BTN', 'SB', 'BB'],
+        8: ['UTG', 'UTG+1', 'LJ', 'HJ', 'CO', 'BTN', 'SB', 'BB'],
+        9: ['UTG', 'UTG+1', 'UTG+2', 'LJ', 'HJ', 'CO', 'BTN', 'SB', 'BB'],
+        10: ['UTG', 'UTG+1', 'UTG+2', 'UTG+3', 'LJ', 'HJ', 'CO', 'BTN', 'SB', 'BB'],
+    }
+
+    def __init__(self, verbose=True, seed=None, seats=6):
+        if seats not in TexasHoldem.POSITION_NAMES:
+            raise ValueError("席数は2〜10にしてください")
+        self.starting_stack = 100
+        self.players = [Player(f"Player {i+1}", self.starting_stack) for i in range(seats)]
+        # False にするとスタックが0になったプレイヤーを補充しない (トーナメント用。抜けた人は players から外す)
+        self.rebuy = True
+        # テーブルの乱数。ハンドごとのシードはここから作る
+        self.rng = random.Random(seed)
+        self.deck = Deck()
         self.board = []
-        self.pot = 0
+        # ポットは整数単位の台帳で管理する (self.pot は表示用のチップ額)
+        self.ledger = PotLedger(len(self.players))
         self.small_blind = 0.5
         self.big_blind = 1
         self.dealer_position = 0
@@ -19,20 +49,98 @@ class TexasHoldem:
         self.action_order = []
         self.action_index = 0
         self.current_bet = 0
+        self.aggressor = None  # このストリートで最後にベット額を上げた人の席番号 (ブラインドだけなら None)
         self.winner = None
         # ショーダウン情報
         self.showdown_hands = {}
         self.showdown_payouts = {}
         self.side_pots = []
+        # プリフロップで2人がオールインしたときの {名前: {'equity': .., 'ev': ..}} (事前計算の表から引く)
+        self.allin_equity = {}
+        self.preflop_table = default_table()
+        # イベント名 -> コールバックの一覧。空のときはイベントを作らない
+        self.listeners = {}
+        # False にするとコンソール出力をしない (シミュレーション用)
+        self.verbose = verbose
+        if verbose:
+            self.add_listener(ConsoleListener())
+        # ハンドごとのシード (start_hand(seed=...) に渡せば同じカードが配られる)
+        self.hand_seed = None
+        # HandHistory.HandHistoryWriter を設定するとハンドを記録する
+        self.history = None
+
+    def on(self, event, callback):
+        """event が起きたら callback(game, ...) を呼ぶ (引数は Events.py を参照)"""
+        if event not in EVENTS:
+            raise ValueError(f"不明なイベント {event}")
+        self.listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        callbacks = self.listeners.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.listeners.pop(event, None)
+
+    def add_listener(self, listener):
+        """イベント名と同じ名前のメソッドを持つオブジェクトをまとめて登録する"""
+        for event in EVENTS:
+            callback = getattr(listener, event, None)
+            if callback is not None:
+                self.on(event, callback)
+
+    def emit(self, event, *args):
+        for callback in self.listeners.get(event, ()):
+            callback(self, *args)
+
+    @property
+    def pot(self):
+        return to_chips(self.ledger.total)
+
+    def put_chips(self, player, chips):
+        """player がスタックから chips を出してベットに加える (スタックとベットは単位で計算して誤差を出さない)"""
+        units = to_units(chips)
+        player.stack = to_chips(to_units(player.stack) - units)
+        player.current_bet = to_chips(to_units(player.current_bet) + units)
+        self.ledger.bet(self.players.index(player), units)
+
+    def award(self, player, units):
+        """player のスタックに units 単位を足す"""
+        player.stack = to_chips(to_units(player.stack) + units)
+
+    def fold(self, player):
+        player.in_hand = False
+        self.ledger.fold(self.players.index(player))
+
+    def end_street(self):
+        """ストリートのベットを締めてサイドポットを確定させる"""
+        for player in self.players:
+            player.total_bet = to_chips(to_units(player.total_bet) + to_units(player.current_bet))
+            player.current_bet = 0
+            player.has_acted = False
+        self.update_side_pots()
+
+    def blind_positions(self):
+        """(SB の席, BB の席)。2人のときはディーラーが SB になる"""
+        n = len(self.players)
+        if n == 2:
+            return self.dealer_position, (self.dealer_position + 1) % 2
+        return (self.dealer_position + 1) % n, (self.dealer_position + 2) % n
 
     def assign_positions(self):
-        for i in range(6):
-            pos_index = (self.dealer_position + 3 + i) % 6
-            self.players[pos_index].position = TexasHoldem.POSITION_NAMES[i]
+        n = len(self.players)
+        first = self.get_action_order('preflop')[0]
+        start = self.players.index(first)
+        for i, name in enumerate(TexasHoldem.POSITION_NAMES[n]):
+            self.players[(start + i) % n].position = name
+
+    def reseed(self, seed):
+        """テーブルの乱数を初期化する (以降のハンドのシードが決まる)"""
+        self.rng.seed(seed)
 
-    def create_deck(self):
-        self.deck = [Card(rank, suit) for suit in Card.SUITS for rank in Card.RANKS]
-        random.shuffle(self.deck)
+    def create_deck(self, seed=None):
+        self.hand_seed = self.rng.getrandbits(64) if seed is None else seed
+        self.deck.shuffle(self.hand_seed)
 
     def deal_hole_cards(self):
         for player in self.players:
@@ -42,60 +150,42 @@ class TexasHoldem:
         self.dealer_position = (self.dealer_position + 1) % len(self.players)
 
     def post_blinds(self):
-        sb_pos = (self.dealer_position + 1) % 6
-        bb_pos = (self.dealer_position + 2) % 6
-
-        self.players[sb_pos].current_bet = self.small_blind
-        self.players[sb_pos].stack -= self.small_blind
-
-        self.players[bb_pos].current_bet = self.big_blind
-        self.players[bb_pos].stack -= self.big_blind
-
-        self.pot += self.small_blind + self.big_blind
+        sb_pos, bb_pos = self.blind_positions()
+        # スタックが足りなければあるだけ出してオールイン
+        sb, bb = self.players[sb_pos], self.players[bb_pos]
+        self.put_chips(sb, min(self.small_blind, sb.stack))
+        self.put_chips(bb, min(self.big_blind, bb.stack))
 
     def check_for_winner_after_fold(self):
         """ベッティングラウンド中に一人以外がフォールドした場合、勝者を決定する"""
         active_players = [player for player in self.players if player.in_hand]
         if len(active_players) == 1:
             winner = active_players[0]
-            if self.pot > 0:  
-                print(f"\n{winner.name} wins the pot of {self.pot} as all other players folded!")
-                winner.stack += self.pot 
-                self.pot = 0
-
-                print("\n-- Final Player States --")
-                for player in self.players:
-                    print(player)
+            if self.pot > 0:
+                pot = self.pot
+                self.award(winner, self.ledger.total)
+                self.ledger.reset()
+                if self.listeners:
+                    self.emit('pot_awarded', winner, pot, 0)
+                self.record_hand_end({winner.name: pot})
             return True
         return False
 
+    @timed('holdem_side_pots_seconds', "Side pot construction")
     def update_side_pots(self):
-        """現在のベット額に基づいてサイドポットを再計算する"""
-        contributions = {
-            p: p.total_bet + p.current_bet for p in self.players if p.total_bet + p.current_bet > 0
-        }
-        sorted_players = sorted(contributions.items(), key=lambda x: x[1])
-        pots = []
-        prev = 0
-        players_remaining = [p for p, _ in sorted_players]
-        for player, amount in sorted_players:
-            if amount > prev:
-                pot_amt = (amount - prev) * len(players_remaining)
-                eligible = [pl for pl in players_remaining if pl.in_hand]
-                if pot_amt > 0:
-                    pots.append({"amount": pot_amt, "players": eligible})
-                prev = amount
-            players_remaining.remove(player)
-        self.side_pots = pots
+        """台帳からサイドポットを作る (ストリート終了時とショーダウンでだけ呼ぶ)"""
+        self.side_pots = [
+            {"amount": to_chips(amount), "players": [self.players[seat] for seat in seats]}
+            for amount, seats in self.ledger.side_pots()
+        ]
 
     def betting_round(self, stage):
-        print(f"\n--- {stage.upper()} BETTING ROUND ---")
-        print(f"total pot {self.pot}")
+        self.emit('betting_round', stage)
         current_bet = max(p.current_bet for p in self.players)
         players_in_hand = [p for p in self.players if p.in_hand]
         action_order = self.get_action_order(stage)
 
-        bb_position = (self.dealer_position + 2) % len(self.players)  # BBの位置
+        bb_position = self.blind_positions()[1]  # BBの位置
         bb_player = self.players[bb_position]
         bb_has_option = (stage == 'preflop' and current_bet == self.big_blind)  # プリフロップでレイズがない場合
 
@@ -104,197 +194,228 @@ class TexasHoldem:
                 if not player.in_hand or player.stack == 0:
                     continue
                 if player.current_bet < current_bet or not player.has_acted:
-                    print(f"\n{player.name}'s turn (stack: {player.stack}, bet: {player.current_bet}, to call: {current_bet - player.current_bet})")
+                    self.emit('player_turn', player, current_bet - player.current_bet)
                     if player == bb_player and bb_has_option and current_bet == self.big_blind:
                         move = input("Enter action (call/raise): ").strip().lower()
                     else:
                         move = input("Enter action (fold/call/raise): ").strip().lower()
 
+                    stack_before = player.stack
                     if move == 'fold':
                         if player == bb_player and bb_has_option and current_bet == self.big_blind:
-                            print("Big Blind cannot fold as no raise has been made.")
+                            self.emit('invalid_action', player, "Big Blind cannot fold as no raise has been made.")
                             continue
-                        player.in_hand = False
+                        self.fold(player)
+                        self.record_action(player, 'fold', 0, stage)
                         if self.check_for_winner_after_fold():
                             return
                     elif move == 'call':
                         to_call = current_bet - player.current_bet
-                        actual_call = min(to_call, player.stack)
-                        player.stack -= actual_call
-                        player.current_bet += actual_call
-                        self.pot += actual_call
+                        self.put_chips(player, min(to_call, player.stack))
                     elif move == 'raise':
                         while True:
                             min_raise = max(self.big_blind, 2 * (current_bet))
                             raise_amount = int(input(f"Enter raise amount (minimum: {min_raise}): "))
                             if raise_amount < min_raise:
-                                print(f"Raise amount must be at least {min_raise}.")
+                                self.emit('invalid_action', player, f"Raise amount must be at least {min_raise}.")
                                 continue
                             if raise_amount > player.stack + player.current_bet:
                                 raise_amount = player.stack + player.current_bet
-                            self.pot += raise_amount - player.current_bet
-                            player.stack -= (raise_amount - player.current_bet)
-                            player.current_bet = raise_amount
+                            self.put_chips(player, raise_amount - player.current_bet)
                             current_bet = raise_amount
                             # レイズ後に他のプレイヤーのアクションをリセット
                             for p in players_in_hand:
                                 if p != player:
                                     p.has_acted = False
                             break
+                    if move in ('call', 'raise'):
+                        self.record_action(player, move, stack_before - player.stack, stage)
                     player.has_acted = True
-                    self.update_side_pots()
 
             # すべてのプレイヤーが現在のベット額に一致しているか、スタックが 0 またはフォールドしている場合に終了
             all_done = all((p.current_bet == current_bet or p.stack == 0 or not p.in_hand) for p in players_in_hand)
             if all_done:
                 break
 
-        for player in self.players:
-            player.total_bet += player.current_bet
-            player.current_bet = 0
-            player.has_acted = False
-        self.update_side_pots()
+        self.end_street()
 
     def get_action_order(self, stage):
+        n = len(self.players)
         if stage == 'preflop':
-            start = (self.dealer_position + 3) % 6
+            # BB の次から。2人のときは SB (ディーラー) から
+            start = (self.blind_positions()[1] + 1) % n
         else:
-            start = (self.dealer_position + 1) % 6 
-        order = []
-        for i in range(6):
-            pos = (start + i) % 6
-            order.append(self.players[pos])
-        return order
+            # ディーラーの次から。2人のときは BB から
+            start = (self.dealer_position + 1) % n
+        return [self.players[(start + i) % n] for i in range(n)]
 
     def deal_board(self, stage):
         if stage == 'flop':
-            self.board += [self.deck.pop() for _ in range(3)]
-        elif stage in ('turn', 'river'):
-            self.board.append(self.deck.pop())
-        print(f"\nBoard ({stage}): {' '.join(map(str, self.board))}")
+            cards = [self.deck.pop() for _ in range(3)]
+        else:
+            cards = [self.deck.pop()]
+        self.board += cards
+        if self.listeners:
+            self.emit('street_dealt', stage, cards)
 
     def determine_winner(self):
         active_players = [p for p in self.players if p.in_hand]
         self.showdown_hands = {}
-        best_hands = {}
+        ranks = {}
         for player in active_players:
-            player_best_hand = best_hand(player.hand + self.board)
-            strength, hand_name = hand_strength(player_best_hand)
-            best_hands[player] = (player_best_hand, (strength, hand_name))
+            cards = player.hand + self.board
+            rank = showdown_rank(cards)
+            ranks[player] = rank
             self.showdown_hands[player.name] = {
                 'hand': list(player.hand),
-                'best': player_best_hand,
-                'hand_name': hand_name,
+                'best': best_hand(cards, rank),  # 表示用の5枚は役の整数から組み立てる
+                'hand_name': rank_to_strength(rank)[1],
             }
 
-        print("\n-- Showdown --")
-        for p in active_players:
-            hand_str = ' '.join(map(str, self.showdown_hands[p.name]['hand']))
-            best_str = ' '.join(map(str, self.showdown_hands[p.name]['best']))
-            name = self.showdown_hands[p.name]['hand_name']
-            print(f"{p.name}: {hand_str} -> {name} ({best_str})")
+        if self.listeners:
+            self.emit('showdown', self.showdown_hands)
 
         self.update_side_pots()
 
-        payouts = {}
+        # 配当は整数単位で分け、割り切れない端数はディーラーの左から順に1単位ずつ渡す
+        seats = len(self.players)
+        first = (self.dealer_position + 1) % seats
+        won = {}
         main_pot_winners = []
-        for i, pot in enumerate(self.side_pots):
-            amount = pot["amount"]
-            eligible = [p for p in pot["players"] if p.in_hand]
+        for i, (amount, eligible) in enumerate(self.ledger.side_pots()):
             if not eligible:
-                self.pot -= amount
                 continue
-            best_strength = max(best_hands[p][1][0] for p in eligible)
-            winners = [p for p in eligible if best_hands[p][1][0] == best_strength]
-            split = amount / len(winners)
-            for j, w in enumerate(winners):
-                if j == len(winners) - 1:
-                    win = amount - split * (len(winners) - 1)
-                else:
-                    win = split
-                w.stack += win
-                payouts[w.name] = payouts.get(w.name, 0) + win
-                print(f"{w.name} wins {win} chips from pot {i+1}")
-            self.pot -= amount
+            best_rank = max(ranks[self.players[s]] for s in eligible)
+            winners = sorted(
+                (s for s in eligible if ranks[self.players[s]] == best_rank),
+                key=lambda s: (s - first) % seats,
+            )
+            share, odd = divmod(amount, len(winners))
+            for j, seat in enumerate(winners):
+                win = share + (1 if j < odd else 0)
+                won[seat] = won.get(seat, 0) + win
+                if self.listeners:
+                    self.emit('pot_awarded', self.players[seat], to_chips(win), i)
             if i == 0:
-                main_pot_winners = winners
+                main_pot_winners = [self.players[s] for s in winners]
 
-        self.showdown_payouts = payouts
+        payouts = {}
+        for seat, units in won.items():
+            player = self.players[seat]
+            self.award(player, units)
+            payouts[player.name] = to_chips(units)
+        self.ledger.reset()
 
-        print("\n-- Final Player States --")
-        for player in self.players:
-            print(player)
+        self.showdown_payouts = payouts
+        self.record_hand_end(payouts)
 
         if main_pot_winners:
             self.winner = ", ".join(w.name for w in main_pot_winners)
             return self.winner
         return None
 
+    def record_hand_start(self):
+        if self.history is not None:
+            self.history.begin(self)
+        if self.listeners:
+            self.emit('hand_started')
+
+    def record_action(self, player, action, amount, stage):
+        """amount はそのアクションで実際に出したチップ"""
+        if self.history is not None:
+            self.history.action(self.players.index(player), action, amount, stage)
+        if self.listeners:
+            self.emit('action', player, action, amount, stage)
+
+    def record_hand_end(self, payouts):
+        if self.history is not None:
+            self.history.end(self, payouts)
+        if self.listeners:
+            self.emit('hand_ended', payouts)
+
+    def equities(self):
+        """ハンドに残っているプレイヤーのエクイティを名前ごとに返す (フロップ以降は全列挙)"""
+        return player_equity(self.players, self.board, margin=0.005)
+
     # Web アプリ用のメソッド
-    def start_hand(self):
-        """ゲームを初期化して新しいハンドを開始する"""
+    def start_hand(self, seed=None):
+        """ゲームを初期化して新しいハンドを開始する (seed を指定するとそのシードで配る)"""
         self.board = []
-        self.pot = 0
+        self.ledger.reset()
         self.winner = None
         self.showdown_hands = {}
         self.showdown_payouts = {}
         self.side_pots = []
+        self.allin_equity = {}
+        if self.ledger.seats != len(self.players):
+            self.ledger = PotLedger(len(self.players))  # 席数が変わった (トーナメントで人が抜けた)
 
         for player in self.players:
-            if player.stack == 0:
-                player.stack = 100
+            if player.stack == 0 and self.rebuy:
+                player.stack = self.starting_stack
             player.reset_for_new_round()
 
-        self.create_deck()
+        self.create_deck(seed)
         self.deal_hole_cards()
         self.rotate_positions()
         self.assign_positions()
         self.post_blinds()
-
+        self.record_hand_start()
 
         self.stage = 'preflop'
         self.current_bet = self.big_blind
+        self.aggressor = None
         self.action_order = self.get_action_order('preflop')
         self.action_index = 0
         self.current_player()
 
-    def current_player(self):
-        for _ in range(len(self.action_order)):
-            player = self.action_order[self.action_index]
+    def acting_index(self):
+        """次に行動する人の action_order 上の位置 (action_index は変えない)"""
+        order = self.action_order
+        for step in range(len(order)):
+            index = (self.action_index + step) % len(order)
+            player = order[index]
             if player.in_hand and player.stack > 0:
-                return player
-            self.action_index = (self.action_index + 1) % len(self.action_order)
+                return index
+        return self.action_index
+
+    def acting_player(self):
+        """current_player と同じ人を返すが、状態を変えない (表示用)"""
+        return self.action_order[self.acting_index()]
+
+    def current_player(self):
+        self.action_index = self.acting_index()
         return self.action_order[self.action_index]
 
+    @timed('holdem_action_seconds', "Processing of one player action")
     def process_action(self, action, amount=0):
         """現在のプレイヤーのアクションを処理する"""
         if self.stage is None or self.stage == 'showdown':
             return
 
         player = self.current_player()
+        stack_before = player.stack
 
         if action == 'fold':
-            player.in_hand = False
+            self.fold(player)
         elif action == 'call':
             to_call = self.current_bet - player.current_bet
-            actual_call = min(to_call, player.stack)
-            player.stack -= actual_call
-            player.current_bet += actual_call
-            self.pot += actual_call
+            self.put_chips(player, min(to_call, player.stack))
         elif action == 'raise':
-            raise_to = max(amount, self.current_bet + self.big_blind)
+            # 額は台帳の単位に丸める
+            raise_to = to_chips(to_units(max(amount, self.current_bet + self.big_blind)))
             if raise_to > player.stack + player.current_bet:
                 raise_to = player.stack + player.current_bet
-            diff = raise_to - player.current_bet
-            player.stack -= diff
-            player.current_bet = raise_to
-            self.pot += diff
+            self.put_chips(player, raise_to - player.current_bet)
+            if raise_to > self.current_bet:
+                self.aggressor = self.players.index(player)
             self.current_bet = raise_to
             for p in self.players:
                 if p != player and p.in_hand:
                     p.has_acted = False
         player.has_acted = True
-        self.update_side_pots()
+        if action in ('fold', 'call', 'raise'):
+            self.record_action(player, action, stack_before - player.stack, self.stage)
 
         self.action_index = (self.action_index + 1) % len(self.action_order)
         for _ in range(len(self.action_order)):
@@ -305,11 +426,7 @@ class TexasHoldem:
 
         players_in_hand = [p for p in self.players if p.in_hand]
         if len(players_in_hand) == 1:
-            for p in self.players:
-                p.total_bet += p.current_bet
-                p.current_bet = 0
-                p.has_acted = False
-            self.update_side_pots()
+            self.end_street()
             self.skip_to_showdown()
             return
 
@@ -321,12 +438,7 @@ class TexasHoldem:
             for p in players_in_hand
         )
         if all_done:
-            for p in self.players:
-                p.total_bet += p.current_bet
-                p.current_bet = 0
-                p.has_acted = False
-            self.update_side_pots()
-            p.has_acted = (p.stack == 0)
+            self.end_street()
 
             players_in_hand = [p for p in self.players if p.in_hand]
             players_can_act = [p for p in players_in_hand if p.stack > 0]
@@ -350,13 +462,34 @@ class TexasHoldem:
                 return
 
             self.current_bet = 0
+            self.aggressor = None
             self.action_order = self.get_action_order(self.stage)
             self.action_index = 0
             self.current_player()
 
 
+    def preflop_allin_equity(self, players):
+        """2人のプリフロップオールインのエクイティと期待値 (チップ) を表から求める。表がなければ None"""
+        if self.preflop_table is None:
+            return None
+        a, b = players
+        equity = self.preflop_table.equity(a.hand, b.hand)
+        shares = {a: equity, b: 1.0 - equity}
+        ev = {a: 0.0, b: 0.0}
+        for amount, seats in self.ledger.side_pots():
+            eligible = [self.players[seat] for seat in seats]
+            if len(eligible) == 1:
+                ev[eligible[0]] += to_chips(amount)  # コールされなかった分は戻る
+            elif eligible:
+                for player in eligible:
+                    ev[player] += shares[player] * to_chips(amount)
+        return {p.name: {'equity': shares[p], 'ev': ev[p]} for p in players}
+
     def skip_to_showdown(self):
         """残りのコミュニティカードをすべてめくってショーダウンに進む"""
+        active_players = [p for p in self.players if p.in_hand]
+        if self.stage == 'preflop' and len(active_players) == 2:
+            self.allin_equity = self.preflop_allin_equity(active_players) or {}
         if self.stage == 'preflop':
             self.deal_board('flop')
             self.deal_board('turn')
@@ -368,11 +501,15 @@ class TexasHoldem:
             self.deal_board('river')
         self.stage = 'showdown'
 
-        active_players = [p for p in self.players if p.in_hand]
         if len(active_players) == 1:
             winner = active_players[0]
-            winner.stack += self.pot
-            self.showdown_payouts = {winner.name: self.pot}
+            pot = self.pot
+            self.award(winner, self.ledger.total)
+            self.ledger.reset()
+            if self.listeners:
+                self.emit('pot_awarded', winner, pot, 0)
+            self.showdown_payouts = {winner.name: pot}
+            self.record_hand_end(self.showdown_payouts)
             self.showdown_hands = {
                 winner.name: {
                     'hand': list(winner.hand),
@@ -380,30 +517,29 @@ class TexasHoldem:
                     'hand_name': 'No showdown',
                 }
             }
-            self.pot = 0
             self.winner = winner.name
         else:
             self.winner = self.determine_winner()
             
-    def play_hand(self):
+    def play_hand(self, seed=None):
         self.board = []
-        self.pot = 0
+        self.ledger.reset()
         self.side_pots = []
+        self.allin_equity = {}
+        if self.ledger.seats != len(self.players):
+            self.ledger = PotLedger(len(self.players))  # 席数が変わった (トーナメントで人が抜けた)
 
         for player in self.players:
-            if player.stack == 0:
-                player.stack = 100
+            if player.stack == 0 and self.rebuy:
+                player.stack = self.starting_stack
             player.reset_for_new_round()
 
-        self.create_deck()
+        self.create_deck(seed)
         self.deal_hole_cards()
         self.rotate_positions()
         self.assign_positions()
         self.post_blinds()
-
-        print("\n-- Player Positions --")
-        for player in self.players:
-            print(player)
+        self.record_hand_start()
 
         self.betting_round('preflop')
         if self.check_for_winner_after_fold():
@@ -424,8 +560,7 @@ class TexasHoldem:
         if self.check_for_winner_after_fold():
             return
 
-        # ショーダウンによる勝者判定
-        print(f"\nPot total: {self.pot}")
+        # ショーダウンによる勝者判定 (ポットの合計は showdown イベントで表示する)
         self.determine_winner()  # クラス内メソッドとして呼び出し
 
 
@@ -0,0 +1,135 @@
+import threading
+import time
+from functools import wraps
+
+# 処理時間のヒストグラムのバケット (秒)
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}  # ラベルの組 (タプル) -> 値
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {total}')
+        lines.append(f"{self.name}_sum {self.sum:.9g}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class Registry:
+    """メトリクスの一覧。enabled が False の間は timed() の計測をしない"""
+
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+
+    def counter(self, name, help):
+        if name not in self.metrics:
+            self.metrics[name] = Counter(name, help)
+        return self.metrics[name]
+
+    def histogram(self, name, help, buckets=BUCKETS):
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, help, buckets)
+        return self.metrics[name]
+
+    def render(self):
+        """Prometheus のテキスト形式"""
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def timed(name, help):
+    """関数の処理時間をヒストグラム name に記録するデコレータ (REGISTRY.enabled のときだけ)"""
+    histogram = REGISTRY.histogram(name, help)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class MetricsListener:
+    """ゲームのイベントを数えるリスナー (TexasHoldem.add_listener で登録する)"""
+
+    def __init__(self, registry=REGISTRY):
+        self.hands = registry.counter('holdem_hands_total', "Hands started")
+        self.actions = registry.counter('holdem_actions_total', "Player actions by type")
+        self.streets = registry.counter('holdem_streets_dealt_total', "Streets dealt by stage")
+        self.showdowns = registry.counter('holdem_showdowns_total', "Hands that reached a showdown")
+        self.chips = registry.counter('holdem_chips_awarded_total', "Chips awarded from pots")
+
+    def hand_started(self, game):
+        self.hands.inc()
+
+    def action(self, game, player, action, amount, stage):
+        self.actions.inc(action=action)
+
+    def street_dealt(self, game, stage, cards):
+        self.streets.inc(stage=stage)
+
+    def showdown(self, game, hands):
+        self.showdowns.inc()
+
+    def pot_awarded(self, game, player, amount, pot):
+        self.chips.inc(amount)
@@ -1,4 +1,6 @@
 class Player:
+    __slots__ = ('name', 'stack', 'hand', 'in_hand', 'current_bet', 'total_bet', 'has_acted', 'position')
+
     def __init__(self, name, stack):
         self.name = name
         self.stack = stack
@@ -0,0 +1,67 @@
+# チップは 1 チップ (= 1BB) を UNITS_PER_CHIP 単位の整数で数える (SB の 0.5 は 5 単位)
+UNITS_PER_CHIP = 10
+
+
+def to_units(chips):
+    return int(round(chips * UNITS_PER_CHIP))
+
+
+def to_chips(units):
+    """整数単位をチップ額に戻す (割り切れるときは int にして、スタックの表示を 99 と 102.0 のように混ぜない)"""
+    if units % UNITS_PER_CHIP == 0:
+        return int(units // UNITS_PER_CHIP)
+    return units / UNITS_PER_CHIP
+
+
+class PotLedger:
+    """ハンド中にポットへ入ったチップを席ごとの整数で記録する
+
+    ベット・コール・オールインでは席の拠出額に足し、フォールドでは印を付けるだけにして、
+    サイドポットへの分割はストリート終了時とショーダウンで side_pots() を呼んだときにだけ行う。
+    """
+
+    def __init__(self, seats):
+        self.seats = seats
+        self.reset()
+
+    def reset(self):
+        self.contributed = [0] * self.seats
+        self.live = [True] * self.seats
+        self.total = 0
+
+    def bet(self, seat, units):
+        self.contributed[seat] += units
+        self.total += units
+
+    def fold(self, seat):
+        self.live[seat] = False
+
+    def side_pots(self):
+        """メインポットから順に (額, [獲得できる席, ...]) を返す
+
+        ポットの境目はフォールドしていない席の拠出額 (オールイン額など)。
+        フォールドした席のチップはその額までの各ポットに入る。
+        """
+        contributed = self.contributed
+        live = self.live
+        levels = sorted({contributed[s] for s in range(self.seats) if live[s] and contributed[s] > 0})
+        if not levels:
+            return [(self.total, [])] if self.total else []
+        pots = []
+        prev = 0
+        for level in levels:
+            amount = 0
+            eligible = []
+            for seat in range(self.seats):
+                c = contributed[seat]
+                if c > prev:
+                    amount += (c if c < level else level) - prev
+                    if live[seat] and c >= level:
+                        eligible.append(seat)
+            pots.append((amount, eligible))
+            prev = level
+        # フォールドした席が残りの誰よりも多く出していた分は最後のポットに入れる
+        rest = self.total - sum(amount for amount, _ in pots)
+        if rest:
+            pots[-1] = (pots[-1][0] + rest, pots[-1][1])
+        return pots
@@ -0,0 +1,276 @@
+import itertools
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Card import Card
+
+# 169 種類のスターティングハンド (スートの入れ替えで同じになるものをまとめたクラス)
+# 13x13 のマス目で、行が高いランク・列が低いランクならスーテッド、逆ならオフスート、対角はペア
+CLASSES = 169
+MAX_OPPONENTS = 8
+
+# ファイル形式 (リトルエンディアン)
+#   HEADER  MAGIC, クラス数, 最大相手数, 1マッチアップあたりのボード数 (0 は全列挙)
+#   HEADS_UP  float32 の 169x169。[i][j] はクラス i がクラス j に対して持つエクイティ (引き分けは半分)
+#   VS_RANDOM float32 の 169x8。[i][k-1] はクラス i がランダムな k 人に対して持つエクイティ
+MAGIC = b'PFT\x01'
+HEADER = struct.Struct('<4sHHI')
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_table.bin')
+
+
+def class_index(a, b):
+    """カードID 2枚からクラス番号 (0〜168) を返す"""
+    high, low = a >> 2, b >> 2
+    if high < low:
+        high, low = low, high
+    if high == low or (a & 3) == (b & 3):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def hand_class(hand):
+    """Player.hand (Card 2枚) のクラス番号"""
+    return class_index(hand[0].id, hand[1].id)
+
+
+def class_name(index):
+    row, col = divmod(index, 13)
+    if row == col:
+        return Card.RANKS[row] * 2
+    if row > col:
+        return Card.RANKS[row] + Card.RANKS[col] + 's'
+    return Card.RANKS[col] + Card.RANKS[row] + 'o'
+
+
+def class_combos(index):
+    """クラスに属する具体的なカードIDの組 (ペア6通り・スーテッド4通り・オフスート12通り)"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return [(row << 2 | s, row << 2 | t) for s, t in itertools.combinations(range(4), 2)]
+    if row > col:
+        return [(row << 2 | s, col << 2 | s) for s in range(4)]
+    return [(col << 2 | s, row << 2 | t) for s in range(4) for t in range(4) if s != t]
+
+
+class PreflopTable:
+    """build() で作ったファイルを mmap して、クラスの組からエクイティを O(1) で引く"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, classes, max_opponents, self.samples = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or classes != CLASSES:
+            raise ValueError(f"{path} はプリフロップ表ではありません")
+        self.max_opponents = max_opponents
+        values = memoryview(self.buffer)[HEADER.size:].cast('f')
+        self.heads_up = values[:CLASSES * CLASSES]
+        self.vs_random = values[CLASSES * CLASSES:CLASSES * (CLASSES + max_opponents)]
+        self.values = values
+
+    def class_equity(self, i, j):
+        return self.heads_up[i * CLASSES + j]
+
+    def equity(self, hand, other):
+        """hand (Card 2枚) が other に対して持つエクイティ (クラス同士の平均)"""
+        return self.heads_up[hand_class(hand) * CLASSES + hand_class(other)]
+
+    def equity_vs_random(self, hand, opponents=1):
+        return self.vs_random[hand_class(hand) * self.max_opponents + opponents - 1]
+
+    def multiway_equity(self, hands):
+        """3人以上のおおよそのエクイティ
+
+        各ハンドの「全員に勝つ確率」を1対1のエクイティの積で近似し、合計が1になるように正規化する。
+        """
+        classes = [hand_class(hand) for hand in hands]
+        if len(classes) == 2:
+            e = self.heads_up[classes[0] * CLASSES + classes[1]]
+            return [e, 1.0 - e]
+        scores = []
+        for i, a in enumerate(classes):
+            score = 1.0
+            for j, b in enumerate(classes):
+                if i != j:
+                    score *= self.heads_up[a * CLASSES + b]
+            scores.append(score)
+        total = sum(scores)
+        return [score / total for score in scores]
+
+    def close(self):
+        self.values.release()
+        self.heads_up.release()
+        self.vs_random.release()
+        self.buffer.close()
+        self.file.close()
+
+
+_DEFAULT = {}
+
+
+def default_table():
+    """DEFAULT_PATH の表 (プロセスごとに一度だけ開く)。ファイルがなければ None
+
+    None は覚えないので、あとから build() で作った表は次の呼び出しで開く。
+    """
+    if 'table' not in _DEFAULT:
+        if not os.path.exists(DEFAULT_PATH):
+            return None
+        _DEFAULT['table'] = PreflopTable(DEFAULT_PATH)
+    return _DEFAULT['table']
+
+
+# ---- 表の作成 (numpy が必要) ----
+
+_PERMUTATIONS = list(itertools.permutations(range(4)))
+_BOARD_INDEXES = {}
+
+
+def _canonical(hero, villain):
+    """スートの入れ替えで同じになるマッチアップを一つにまとめるためのキー"""
+    best = None
+    for perm in _PERMUTATIONS:
+        h = tuple(sorted((c & ~3 | perm[c & 3] for c in hero), reverse=True))
+        v = tuple(sorted((c & ~3 | perm[c & 3] for c in villain), reverse=True))
+        if best is None or (h, v) < best:
+            best = (h, v)
+    return best
+
+
+def _all_boards():
+    """残り48枚から5枚を選ぶ全組み合わせ (位置の配列)"""
+    import numpy as np
+
+    boards = _BOARD_INDEXES.get('exact')
+    if boards is None:
+        boards = np.fromiter(
+            itertools.chain.from_iterable(itertools.combinations(range(48), 5)), dtype=np.uint8
+        ).reshape(-1, 5)
+        _BOARD_INDEXES['exact'] = boards
+    return boards
+
+
+def _matchup_equity(hero, villain, samples, rng):
+    import numpy as np
+    from BatchEvaluator import evaluate_batch
+
+    rest = np.array([c for c in range(52) if c not in hero and c not in villain], dtype=np.uint8)
+    if samples:
+        positions = rng.random((samples, 48)).argpartition(5, axis=1)[:, :5]
+    else:
+        positions = _all_boards()
+    boards = rest[positions]
+    cards = np.empty((len(boards), 7), dtype=np.uint8)
+    cards[:, 2:] = boards
+    cards[:, :2] = hero
+    hero_ranks = evaluate_batch(cards)
+    cards[:, :2] = villain
+    villain_ranks = evaluate_batch(cards)
+    wins = np.count_nonzero(hero_ranks > villain_ranks)
+    ties = np.count_nonzero(hero_ranks == villain_ranks)
+    return (wins + ties / 2) / len(boards)
+
+
+def _heads_up_row(i, samples, seed):
+    """クラス i から見た、クラス i 以降の各クラスへのエクイティ"""
+    import numpy as np
+
+    rng = np.random.default_rng([seed, i])
+    hero = class_combos(i)[0]  # クラス内の組はすべてスートの入れ替えで移り合う
+    cache = {}
+    row = []
+    for j in range(i, CLASSES):
+        if j == i:
+            row.append(0.5)
+            continue
+        total = 0.0
+        count = 0
+        for villain in class_combos(j):
+            if villain[0] in hero or villain[1] in hero:
+                continue
+            key = _canonical(hero, villain)
+            if key not in cache:
+                cache[key] = _matchup_equity(hero, villain, samples, rng)
+            total += cache[key]
+            count += 1
+        row.append(total / count)
+    return row
+
+
+def _vs_random_row(i, samples, seed):
+    """クラス i がランダムな 1〜MAX_OPPONENTS 人に対して持つエクイティ (モンテカルロ)"""
+    import numpy as np
+    from BatchEvaluator import evaluate_batch
+
+    rng = np.random.default_rng([seed, i, 1])
+    hero = class_combos(i)[0]
+    rest = np.array([c for c in range(52) if c not in hero], dtype=np.uint8)
+    trials = samples or 20000
+    row = []
+    for opponents in range(1, MAX_OPPONENTS + 1):
+        need = 5 + 2 * opponents
+        drawn = rest[rng.random((trials, 50)).argpartition(need, axis=1)[:, :need]]
+        cards = np.empty((trials, 7), dtype=np.uint8)
+        cards[:, 2:] = drawn[:, :5]
+        cards[:, :2] = hero
+        hero_ranks = evaluate_batch(cards)
+        best = np.zeros(trials, dtype=np.uint32)
+        best_count = np.zeros(trials, dtype=np.int64)
+        for k in range(opponents):
+            cards[:, :2] = drawn[:, 5 + 2 * k:7 + 2 * k]
+            ranks = evaluate_batch(cards)
+            best_count = np.where(ranks > best, 1, best_count + (ranks == best))
+            best = np.maximum(best, ranks)
+        share = np.where(hero_ranks > best, 1.0, np.where(hero_ranks == best, 1.0 / (best_count + 1), 0.0))
+        row.append(float(share.mean()))
+    return row
+
+
+def build(path=DEFAULT_PATH, samples=0, workers=1, seed=0):
+    """表を作って path に書き出す
+
+    samples が 0 なら1対1は残り48枚から5枚の全ボード (1,712,304通り) を列挙する正確な値。
+    時間がかかるので、試すときは samples にマッチアップごとのランダムなボード数を指定する。
+    ランダムな複数人に対するエクイティは常にモンテカルロ (samples または 20000 回)。
+    """
+    start = time.perf_counter()
+    rows = range(CLASSES)
+    args = (rows, [samples] * CLASSES, [seed] * CLASSES)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            heads_up_rows = list(executor.map(_heads_up_row, *args))
+            vs_random_rows = list(executor.map(_vs_random_row, *args))
+    else:
+        heads_up_rows = list(map(_heads_up_row, *args))
+        vs_random_rows = list(map(_vs_random_row, *args))
+
+    heads_up = [[0.0] * CLASSES for _ in range(CLASSES)]
+    for i, row in enumerate(heads_up_rows):
+        for offset, equity in enumerate(row):
+            j = i + offset
+            heads_up[i][j] = equity
+            heads_up[j][i] = 1.0 - equity
+
+    values = [e for row in heads_up for e in row] + [e for row in vs_random_rows for e in row]
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, CLASSES, MAX_OPPONENTS, samples))
+        f.write(struct.pack(f'<{len(values)}f', *values))
+    os.replace(path + '.tmp', path)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # 正確な表: python PreflopTable.py 0 8   試し用: python PreflopTable.py 20000 (ボード数, プロセス数)
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    elapsed = build(samples=samples, workers=workers)
+    table = PreflopTable()
+    print(f"wrote {DEFAULT_PATH} in {elapsed:.1f}s")
+    for a, b in (('AA', 'KK'), ('AKs', 'QQ'), ('AKo', '22'), ('72o', 'AA')):
+        i = [class_name(k) for k in range(CLASSES)].index(a)
+        j = [class_name(k) for k in range(CLASSES)].index(b)
+        print(f"{a} vs {b}: {table.class_equity(i, j):.4f}")
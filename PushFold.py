@@ -0,0 +1,213 @@
+import os
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from Main import TexasHoldem
+from PreflopTable import CLASSES, DEFAULT_PATH, PreflopTable, build, class_combos, class_name, default_table, hand_class
+from Simulation import TightPolicy
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pushfold_cache')
+ITERATIONS = 2000
+BUILD_SAMPLES = 2000  # プリフロップ表がないときに作る表の、1マッチアップあたりのボード数
+# その近似の表は DEFAULT_PATH とは別の場所に置く (Main や AllInEV が正確な表と思って使わないように)
+APPROX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_table_approx.bin')
+
+
+def equity_table():
+    """解くのに使うプリフロップ表 (DEFAULT_PATH になければ APPROX_PATH の近似の表。それもなければ作る)"""
+    table = default_table()
+    if table is not None:
+        return table
+    if not os.path.exists(APPROX_PATH):
+        warnings.warn(f"{DEFAULT_PATH} がないので、ボード {BUILD_SAMPLES} 枚/マッチアップの近似の表を "
+                      f"{APPROX_PATH} に作成します", RuntimeWarning, stacklevel=2)
+        build(APPROX_PATH, samples=BUILD_SAMPLES, workers=os.cpu_count())
+    return PreflopTable(APPROX_PATH)
+
+
+def equity_matrix():
+    """169x169 の1対1エクイティ (equity_table の表)"""
+    table = equity_table()
+    return np.array(table.heads_up, dtype=np.float64).reshape(CLASSES, CLASSES)
+
+
+def combo_weights():
+    """W[i][j] = クラス i の1組と重ならないクラス j の組の数 (相手のクラスの出やすさ)"""
+    combos = [class_combos(i) for i in range(CLASSES)]
+    weights = np.zeros((CLASSES, CLASSES))
+    for i in range(CLASSES):
+        a, b = combos[i][0]  # クラス内の組はスートの入れ替えで移り合うので1組で足りる
+        for j in range(CLASSES):
+            weights[i, j] = sum(1 for c, d in combos[j] if c not in (a, b) and d not in (a, b))
+    return weights
+
+
+_MATRICES = {}
+
+
+def _matrices():
+    if not _MATRICES:
+        weights = combo_weights()
+        _MATRICES['w'] = weights
+        _MATRICES['we'] = weights * equity_matrix()
+    return _MATRICES['w'], _MATRICES['we']
+
+
+def _blinds(players):
+    blinds = np.zeros(players)
+    if players == 2:
+        blinds[:] = (0.5, 1.0)  # 2人のときはボタンが SB
+    else:
+        blinds[-2:] = (0.5, 1.0)
+    return blinds
+
+
+def _solve(players, stack, iterations):
+    """架空プレイ (最善応答の平均) で push と call の頻度を求める
+
+    プレイヤー k (プリフロップの行動順) は前の全員がフォールドしたらオールインかフォールド。
+    後ろのプレイヤー j はそれにコールかフォールドする。最初にコールした人との1対1になるとして、
+    それ以降のオーバーコールは考えない。金額はすべて BB 単位で、stack は開始時の有効スタック。
+    """
+    w, we = _matrices()
+    blinds = _blinds(players)
+    dead_total = blinds.sum()
+    push = np.full((players - 1, CLASSES), 0.5)
+    call = np.full((players - 1, players, CLASSES), 0.5)
+    for t in range(1, iterations + 1):
+        push_br = np.empty_like(push)
+        call_br = np.zeros_like(call)
+        for k in range(players - 1):
+            gain = np.zeros(CLASSES)
+            nobody = np.ones(CLASSES)
+            # j のハンド g ごとの、k のプッシュのレンジに対するエクイティ (j によらない)
+            pushed = w @ push[k]
+            eq_call = np.divide(we @ push[k], pushed, out=np.zeros(CLASSES), where=pushed > 0)
+            for j in range(k + 1, players):
+                # k のハンド h ごとに、j がコールする確率とコールされたときのエクイティ
+                called = w @ call[k, j]
+                p_call = called / 1225.0
+                equity = np.divide(we @ call[k, j], called, out=np.zeros(CLASSES), where=called > 0)
+                pot = 2 * stack + dead_total - blinds[k] - blinds[j]
+                gain += nobody * p_call * (equity * pot - stack)
+                nobody *= 1.0 - p_call
+
+                # j のコールの損得 (フォールドなら出しているブラインドを失うだけ)
+                call_br[k, j] = (eq_call * pot - stack + blinds[j]) > 0
+            gain += nobody * (dead_total - blinds[k])
+            push_br[k] = (gain + blinds[k]) > 0
+        step = 1.0 / (t + 1)
+        push += (push_br - push) * step
+        for k in range(players - 1):
+            call[k, k + 1:] += (call_br[k, k + 1:] - call[k, k + 1:]) * step
+    return push, call
+
+
+def solve(players, stack, iterations=ITERATIONS, cache_dir=CACHE_DIR):
+    """players 人 (2〜6)、有効スタック stack BB の push/fold の均衡を求める (ディスクにキャッシュする)
+
+    {'positions': POSITION_NAMES, 'push': {ポジション: 169個の頻度},
+     'call': {(プッシュした人, コールする人): 169個の頻度}, 'stack': .., 'elapsed': ..} を返す。
+    """
+    if not 2 <= players <= 6:
+        raise ValueError("push/fold は2〜6人で解きます")
+    start = time.perf_counter()
+    # 表のボード数もキャッシュの名前に入れる (近似の表で解いた結果を正確な表を作ったあとに使わない)
+    table = default_table()
+    samples = BUILD_SAMPLES if table is None else table.samples
+    path = os.path.join(cache_dir, f"pf_{players}_{stack:g}_{iterations}_{samples}.npz")
+    if os.path.exists(path):
+        data = np.load(path)
+        push, call = data['push'], data['call']
+    else:
+        push, call = _solve(players, stack, iterations)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez_compressed(tmp, push=push, call=call)
+        os.replace(tmp, path)
+    names = TexasHoldem.POSITION_NAMES[players]
+    return {
+        'positions': names,
+        'stack': stack,
+        'push': {names[k]: push[k] for k in range(players - 1)},
+        'call': {(names[k], names[j]): call[k, j] for k in range(players - 1) for j in range(k + 1, players)},
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def range_percent(frequencies):
+    """頻度から、全1326組のうち何割をプレイするか"""
+    sizes = np.array([len(class_combos(i)) for i in range(CLASSES)])
+    return float((np.asarray(frequencies) * sizes).sum() / 1326)
+
+
+def chart(frequencies, threshold=0.5):
+    """13x13 の表 (行・列とも A から 2。右上がスーテッド、左下がオフスート) を文字列にする"""
+    lines = []
+    for row in range(12, -1, -1):
+        cells = []
+        for col in range(12, -1, -1):
+            index = row * 13 + col
+            cells.append(f"{class_name(index):>4}" if frequencies[index] >= threshold else "   .")
+        lines.append(''.join(cells))
+    return '\n'.join(lines)
+
+
+class PushFoldPolicy:
+    """スタックが max_stack BB 以下のときは push/fold の均衡に従い、それより深ければ fallback に任せる"""
+
+    def __init__(self, max_stack=15, fallback=None, seed=None, iterations=ITERATIONS):
+        self.max_stack = max_stack
+        self.fallback = fallback or TightPolicy()
+        self.rng = random.Random(seed)
+        self.iterations = iterations
+        self.solutions = {}
+
+    def reseed(self, seed):
+        self.rng.seed(seed)
+
+    def solution(self, players, stack):
+        key = (players, stack)
+        if key not in self.solutions:
+            self.solutions[key] = solve(players, stack, self.iterations)
+        return self.solutions[key]
+
+    def decide(self, state):
+        bb = state['big_blind']
+        depth = (state['stack'] + state['bet']) / bb
+        players = state['seats']
+        if state['stage'] != 'preflop' or depth > self.max_stack or not 2 <= players <= 6:
+            if state['stage'] != 'preflop' and depth <= self.max_stack:
+                return 'call', 0  # 浅いスタックのフロップ以降はチェック/コール
+            return self.fallback.decide(state)
+        spot = self.solution(players, max(1, min(self.max_stack, round(depth))))
+        index = hand_class(state['hand'])
+        all_in = state['stack'] + state['bet']
+        if state['current_bet'] <= bb:
+            if state['position'] not in spot['push']:
+                return 'call', 0  # 全員フォールドで回ってきた BB はチェック
+            if self.rng.random() < spot['push'][state['position']][index]:
+                return 'raise', all_in
+            return ('call', 0) if state['to_call'] == 0 else ('fold', 0)
+        frequencies = spot['call'].get((state['aggressor'], state['position']))
+        if frequencies is not None and self.rng.random() < frequencies[index]:
+            return 'call', 0
+        return 'fold', 0
+
+
+if __name__ == "__main__":
+    # 例: python PushFold.py 6 10  (人数, スタック BB)
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    stack = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    result = solve(players, stack)
+    for position, frequencies in result['push'].items():
+        print(f"\n{position} push ({range_percent(frequencies):.1%}) at {stack:g}bb")
+        print(chart(frequencies))
+    for (pusher, caller), frequencies in result['call'].items():
+        print(f"\n{caller} call vs {pusher} ({range_percent(frequencies):.1%})")
+        print(chart(frequencies))
+    print(f"\nsolved in {result['elapsed']:.2f}s")
@@ -0,0 +1,290 @@
+import itertools
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from Card import Card
+from Equity import parse_cards
+from HandEvaluator import CARD_KEY, FLUSH_CHECK, SUIT_BITS, UNSUITED_TABLE, evaluate, evaluate_key
+from PreflopTable import CLASSES, class_combos, class_index, class_name, default_table
+
+RANKS = "".join(Card.RANKS)  # "23456789TJQKA"
+_PERMUTATIONS = list(itertools.permutations(range(4)))
+_CLASS_ORDER = []
+
+
+def _combo(a, b):
+    return (a, b) if a > b else (b, a)
+
+
+def _class_of(high, low, kind):
+    """ランク番号2つと 's' / 'o' / '' (ペア) からクラス番号"""
+    if high == low:
+        return high * 13 + high
+    return high * 13 + low if kind == 's' else low * 13 + high
+
+
+def _class_strength(index, trials=2000):
+    """ランダムな1人に対するおおよそのエクイティ (表がないときの並び順用)"""
+    rng = random.Random(index)
+    a, b = class_combos(index)[0]
+    deck = [c for c in range(52) if c != a and c != b]
+    score = 0.0
+    for _ in range(trials):
+        cards = rng.sample(deck, 7)
+        mine = evaluate([a, b] + cards[:5])
+        other = evaluate(cards)
+        score += 1.0 if mine > other else 0.5 if mine == other else 0.0
+    return score / trials
+
+
+def class_order():
+    """169 クラスを強い順に並べたもの ('20%' のような指定に使う)"""
+    if not _CLASS_ORDER:
+        table = default_table()
+        if table is not None:
+            strength = [table.vs_random[i * table.max_opponents] for i in range(CLASSES)]
+        else:
+            strength = [_class_strength(i) for i in range(CLASSES)]
+        _CLASS_ORDER.extend(sorted(range(CLASSES), key=lambda i: -strength[i]))
+    return _CLASS_ORDER
+
+
+def _parse_token(token):
+    token = token.strip()
+    if not token:
+        return []
+    if token.endswith('%'):
+        target = float(token[:-1]) / 100 * 1326
+        classes = []
+        combos = 0
+        for index in class_order():
+            if combos >= target:
+                break
+            classes.append(index)
+            combos += len(class_combos(index))
+        return classes
+    if len(token) == 4 and token[1] in 'cdhs' and token[3] in 'cdhs':
+        a, b = parse_cards(token)
+        return [_combo(a.id, b.id)]
+    if '-' in token:
+        first, last = token.split('-')
+        h1, l1, k1 = _parse_class(first)
+        h2, l2, k2 = _parse_class(last)
+        if h1 == l1 and h2 == l2:
+            return [_class_of(r, r, '') for r in range(min(h1, h2), max(h1, h2) + 1)]
+        if h1 != h2 or k1 != k2:
+            raise ValueError(f"範囲 {token} は上のランクとスーテッド/オフスートをそろえてください")
+        return [c for k in _kinds(k1) for c in
+                (_class_of(h1, r, k) for r in range(min(l1, l2), max(l1, l2) + 1))]
+    plus = token.endswith('+')
+    high, low, kind = _parse_class(token.rstrip('+'))
+    if high == low:
+        return [_class_of(r, r, '') for r in range(high, 13 if plus else high + 1)]
+    lows = range(low, high) if plus else [low]
+    return [_class_of(high, r, k) for k in _kinds(kind) for r in lows]
+
+
+def _parse_class(text):
+    if len(text) not in (2, 3) or text[0] not in RANKS or text[1] not in RANKS:
+        raise ValueError(f"ハンドの指定 {text} が読めません")
+    high, low = RANKS.index(text[0]), RANKS.index(text[1])
+    if high < low:
+        high, low = low, high
+    kind = text[2] if len(text) == 3 else ''
+    if kind not in ('', 's', 'o') or (high == low and kind):
+        raise ValueError(f"ハンドの指定 {text} が読めません")
+    return high, low, kind
+
+
+def _kinds(kind):
+    return [kind] if kind else ['s', 'o']
+
+
+def parse_range(text):
+    """'QQ+,AKs,A5s-A2s,KQ,AsKd,20%' のようなレンジを (カードID, カードID) の frozenset にする"""
+    combos = set()
+    for token in text.split(','):
+        for item in _parse_token(token):
+            if isinstance(item, tuple):
+                combos.add(item)
+            else:
+                combos.update(_combo(a, b) for a, b in class_combos(item))
+    return frozenset(combos)
+
+
+def range_classes(combos):
+    """レンジに含まれるクラス名 (表示用)"""
+    return sorted({class_name(class_index(a, b)) for a, b in combos})
+
+
+def _permute(cards, perm):
+    return [c & ~3 | perm[c & 3] for c in cards]
+
+
+def canonical(range_a, range_b, board):
+    """スートの入れ替えで同じになる (レンジ, レンジ, ボード) を1つの形にそろえる"""
+    best = None
+    for perm in _PERMUTATIONS:
+        mapped_board = tuple(sorted(_permute(board, perm)))
+        if best is not None and mapped_board > best[0]:
+            continue
+        a = tuple(sorted(_combo(*_permute(c, perm)) for c in range_a))
+        b = tuple(sorted(_combo(*_permute(c, perm)) for c in range_b))
+        key = (mapped_board, a, b)
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def _ranks(combos, board_key, board_ids, dead):
+    """ボードと重ならないコンボの (役の整数, a, b)。ボードのキーは全コンボで共有する"""
+    out = []
+    for a, b in combos:
+        if a in dead or b in dead:
+            continue
+        key = board_key + CARD_KEY[a] + CARD_KEY[b]
+        if (key + FLUSH_CHECK) & 0x8888:
+            rank = evaluate_key(key, [a, b] + board_ids)
+        else:
+            rank = UNSUITED_TABLE[key >> SUIT_BITS]
+        out.append((rank, a, b))
+    return out
+
+
+def _runout(range_a, range_b, board_ids, totals):
+    """5枚そろったボード1つについて、重ならない全組み合わせの勝ち・引き分け数を足す
+
+    B のコンボは役の整数で並べておき、A の各コンボに対して二分探索で数える。
+    A と同じカードを含む B のコンボはカードごとのリストで引く。
+    """
+    board_key = 0
+    for i in board_ids:
+        board_key += CARD_KEY[i]
+    dead = set(board_ids)
+    ranked_a = _ranks(range_a, board_key, board_ids, dead)
+    ranked_b = _ranks(range_b, board_key, board_ids, dead)
+    if not ranked_a or not ranked_b:
+        return
+    everything = []
+    by_card = {}
+    combos_b = set()
+    for rank, a, b in ranked_b:
+        everything.append(rank)
+        by_card.setdefault(a, []).append(rank)
+        by_card.setdefault(b, []).append(rank)
+        combos_b.add((a, b))
+    everything.sort()
+    for ranks in by_card.values():
+        ranks.sort()
+    empty = []
+    n = len(everything)
+    wins = ties = pairs = 0
+    for rank, a, b in ranked_a:
+        with_a = by_card.get(a, empty)
+        with_b = by_card.get(b, empty)
+        both = 1 if (a, b) in combos_b else 0  # 同じコンボは2回引いているので戻す
+        lo = bisect_left(everything, rank) - bisect_left(with_a, rank) - bisect_left(with_b, rank)
+        hi = bisect_right(everything, rank) - bisect_right(with_a, rank) - bisect_right(with_b, rank) + both
+        wins += lo
+        ties += hi - lo
+        pairs += n - len(with_a) - len(with_b) + both
+    totals[0] += wins
+    totals[1] += ties
+    totals[2] += pairs
+
+
+def _compute(range_a, range_b, board, trials, seed):
+    board = list(board)
+    deck = [i for i in range(52) if i not in board]
+    totals = [0, 0, 0]
+    if len(board) >= 3:
+        runouts = 0
+        for runout in itertools.combinations(deck, 5 - len(board)):
+            _runout(range_a, range_b, board + list(runout), totals)
+            runouts += 1
+    else:
+        rng = random.Random(seed)
+        runouts = trials
+        for _ in range(trials):
+            _runout(range_a, range_b, board + rng.sample(deck, 5 - len(board)), totals)
+    wins, ties, pairs = totals
+    if pairs == 0:
+        raise ValueError("ボードとレンジが重なって、組み合わせが1つもありません")
+    return {
+        'equity': [(wins + ties / 2) / pairs, (pairs - wins - ties / 2) / pairs],
+        'win': wins / pairs,
+        'tie': ties / pairs,
+        'matchups': pairs,
+        'runouts': runouts,
+    }
+
+
+class RangeEquityCalculator:
+    """レンジ同士のエクイティを、スートの入れ替えでそろえた形で計算して LRU に保存する"""
+
+    def __init__(self, maxsize=1024, trials=2000, seed=0):
+        self.maxsize = maxsize
+        self.trials = trials  # プリフロップ・ターンまでのボードでランダムに配るランアウト数
+        self.seed = seed
+        self.cache = OrderedDict()  # 最近使った順 (末尾が最新)
+        self.hits = 0
+        self.misses = 0
+
+    def equity(self, range_a, range_b, board=()):
+        """range_a / range_b はレンジの文字列か parse_range の結果、board は Card のリストか文字列"""
+        start = time.perf_counter()
+        if isinstance(range_a, str):
+            range_a = parse_range(range_a)
+        if isinstance(range_b, str):
+            range_b = parse_range(range_b)
+        if isinstance(board, str):
+            board = parse_cards(board)
+        board_ids = [card.id for card in board]
+        key = canonical(range_a, range_b, board_ids)
+
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        else:
+            self.misses += 1
+            result = _compute(key[1], key[2], key[0], self.trials, self.seed)
+            self.cache[key] = result
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        dead = set(board_ids)
+        result = dict(result)
+        result['combos'] = [
+            sum(1 for a, b in r if a not in dead and b not in dead) for r in (range_a, range_b)
+        ]
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache)}
+
+
+_DEFAULT = RangeEquityCalculator()
+
+
+def range_equity(range_a, range_b, board=()):
+    """共有の計算機 (キャッシュ付き) でレンジ同士のエクイティを求める"""
+    return _DEFAULT.equity(range_a, range_b, board)
+
+
+if __name__ == "__main__":
+    # 例: python RangeEquity.py "QQ+,AKs" "20%" --board 2c7d9h
+    args = sys.argv[1:]
+    board = ''
+    if "--board" in args:
+        i = args.index("--board")
+        board = args[i + 1]
+        args = args[:i] + args[i + 2:]
+    result = range_equity(args[0], args[1], board)
+    for text, equity, combos in zip(args, result['equity'], result['combos']):
+        print(f"{text}: equity {equity:.4f} ({combos} combos)")
+    print(f"{result['matchups']} matchups over {result['runouts']} runouts "
+          f"in {result['elapsed'] * 1000:.1f} ms")
@@ -0,0 +1,177 @@
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from HandEvaluator import RANK_VALUE, hand_rank
+from HandHistory import HandHistoryWriter
+from Main import TexasHoldem
+
+MAX_ACTIONS_PER_HAND = 500  # これを超えたら進行のバグとみなす
+
+
+class CallPolicy:
+    """常にチェック/コールする"""
+
+    def decide(self, state):
+        return 'call', 0
+
+
+class RandomPolicy:
+    """ランダムにフォールド・コール・レイズする (チェックできるときはフォールドしない)"""
+
+    def __init__(self, fold=0.2, raise_=0.2, seed=None):
+        self.fold = fold
+        self.raise_ = raise_
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed):
+        self.rng.seed(seed)
+
+    def decide(self, state):
+        r = self.rng.random()
+        if r < self.fold and state['to_call'] > 0:
+            return 'fold', 0
+        if r > 1 - self.raise_:
+            size = self.rng.choice((2, 3, 4))
+            return 'raise', state['current_bet'] + size * state['big_blind']
+        return 'call', 0
+
+
+class TightPolicy:
+    """強いハンドだけで参加し、役ができたらポットサイズでベットする"""
+
+    def decide(self, state):
+        to_call = state['to_call']
+        if state['stage'] == 'preflop':
+            high, low = sorted((RANK_VALUE[c.rank] for c in state['hand']), reverse=True)
+            pair = high == low
+            suited = state['hand'][0].suit == state['hand'][1].suit
+            if (pair and high >= RANK_VALUE['T']) or (high == RANK_VALUE['A'] and low >= RANK_VALUE['Q']):
+                return 'raise', state['current_bet'] + 3 * state['big_blind']
+            if pair or (suited and low >= RANK_VALUE['T']) or to_call == 0:
+                return 'call', 0
+            return 'fold', 0
+
+        category = hand_rank(state['hand'] + state['board']) >> 20
+        if category >= 2:
+            return 'raise', state['current_bet'] + max(state['pot'], state['big_blind'])
+        if category == 1 or to_call == 0:
+            return 'call', 0
+        return 'fold', 0
+
+
+def game_state(game, player):
+    """ポリシーに渡す、現在のプレイヤーから見た状態"""
+    return {
+        'seat': game.players.index(player),
+        'position': player.position,
+        'stage': game.stage,
+        'hand': player.hand,
+        'board': game.board,
+        'pot': game.pot,
+        'stack': player.stack,
+        'bet': player.current_bet,
+        'current_bet': game.current_bet,
+        'to_call': game.current_bet - player.current_bet,
+        'big_blind': game.big_blind,
+        'players_in_hand': sum(1 for p in game.players if p.in_hand),
+        'seats': len(game.players),
+        # このストリートで最後にベット額を上げた人のポジション (コールした人ではない)
+        'aggressor': None if game.aggressor is None else game.players[game.aggressor].position,
+    }
+
+
+def play_hands(policies, hands, seed=None, reset_stacks=True, history_path=None):
+    """入出力なしで hands ハンド進め、席ごとの収支 (チップ) を返す (席数はポリシーの数)
+
+    ルールは TexasHoldem の Web 用メソッド (start_hand / process_action) をそのまま使う。
+    reset_stacks が True なら毎ハンド開始時に全員のスタックを初期値に戻す。
+    history_path を指定するとハンド履歴をそのファイルに追記する。
+    """
+    rng = random.Random(seed)
+    game = TexasHoldem(verbose=False, seed=rng.getrandbits(64), seats=len(policies))
+    if history_path is not None:
+        game.history = HandHistoryWriter(history_path)
+    for policy in policies:
+        if hasattr(policy, 'reseed'):
+            policy.reseed(rng.getrandbits(64))
+
+    net = [0.0] * len(policies)
+    showdowns = 0
+    for _ in range(hands):
+        if reset_stacks:
+            for player in game.players:
+                player.stack = game.starting_stack
+        before = [p.stack if p.stack > 0 else game.starting_stack for p in game.players]
+        game.start_hand()
+        actions = 0
+        while game.stage != 'showdown':
+            player = game.current_player()
+            seat = game.players.index(player)
+            action, amount = policies[seat].decide(game_state(game, player))
+            game.process_action(action, amount)
+            actions += 1
+            if actions > MAX_ACTIONS_PER_HAND:
+                raise RuntimeError("ハンドが終了しません")
+        if len(game.showdown_hands) > 1:
+            showdowns += 1
+        for seat, player in enumerate(game.players):
+            net[seat] += player.stack - before[seat]
+    if game.history is not None:
+        game.history.close()
+    return net, showdowns
+
+
+def run_simulation(policies, hands, workers=1, seed=None, batch_size=10000, history_path=None):
+    """hands ハンドをバッチに分けてプロセスプールで並列に実行し、集計結果を返す
+
+    バッチごとに seed から別々のシードを作るので、同じ引数なら結果も同じになる。
+    history_path を指定すると、バッチ i のハンド履歴を '{history_path}.{i}' に書き出す。
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    sizes = [min(batch_size, hands - i) for i in range(0, hands, batch_size)]
+    seeds = [f"{seed}-{i}" for i in range(len(sizes))]
+    paths = [None if history_path is None else f"{history_path}.{i}" for i in range(len(sizes))]
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                play_hands, [policies] * len(sizes), sizes, seeds, [True] * len(sizes), paths
+            ))
+    else:
+        results = [
+            play_hands(policies, size, s, history_path=path) for size, s, path in zip(sizes, seeds, paths)
+        ]
+    elapsed = time.perf_counter() - start
+
+    big_blind = TexasHoldem(verbose=False).big_blind
+    net = [sum(result[0][seat] for result in results) for seat in range(len(policies))]
+    return {
+        'hands': hands,
+        'showdowns': sum(result[1] for result in results),
+        'elapsed': elapsed,
+        'hands_per_sec': hands / elapsed if elapsed > 0 else float('inf'),
+        'seats': [
+            {
+                'policy': type(policy).__name__,
+                'net': net[seat],
+                'bb_per_100': net[seat] / big_blind / hands * 100 if hands else 0.0,
+            }
+            for seat, policy in enumerate(policies)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    # 例: python Simulation.py 100000 4
+    hands = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    policies = [TightPolicy(), RandomPolicy(), CallPolicy(), TightPolicy(), RandomPolicy(), CallPolicy()]
+    result = run_simulation(policies, hands, workers=workers, seed=0)
+    for seat, stats in enumerate(result['seats']):
+        print(f"seat {seat + 1} {stats['policy']:>12}: {stats['bb_per_100']:+9.2f} bb/100")
+    print(f"{result['hands']} hands ({result['showdowns']} showdowns) "
+          f"in {result['elapsed']:.2f}s: {result['hands_per_sec']:.0f} hands/sec")
@@ -0,0 +1,262 @@
+import base64
+import json
+import os
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+
+from Deck import CARDS
+from Main import TexasHoldem
+
+# スナップショットの形式の版。形式を変えたら上げ、古い版を読む処理を load_game に足す
+# 2: テーブルの乱数を作り直したシードではなく状態そのもので持つ
+VERSION = 2
+RNG_WORDS = struct.Struct('<625I')  # random.Random の内部状態 (メルセンヌ・ツイスタの 624 語と位置)
+
+
+def dump_rng(rng):
+    """random.Random の状態を JSON にできる形にする (状態の整数列は base64 で約 3.3KB)"""
+    version, words, gauss = rng.getstate()
+    return [version, base64.b64encode(RNG_WORDS.pack(*words)).decode(), gauss]
+
+
+def load_rng(rng, state):
+    version, words, gauss = state
+    rng.setstate((version, RNG_WORDS.unpack(base64.b64decode(words)), gauss))
+
+
+def dump_game(game):
+    """TexasHoldem の状態を JSON にできる小さな辞書にする
+
+    デッキは残りの並びではなく、ハンドのシードと配った枚数だけを持つ (復元時に同じ順で配り直す)。
+    テーブルの乱数は状態をそのまま写すので、保存しても game のこの先の配り方は変わらない。
+    """
+    players = game.players
+    return {
+        'v': VERSION,
+        'rng': dump_rng(game.rng),
+        'blinds': [game.small_blind, game.big_blind, game.starting_stack],
+        'dealer': game.dealer_position,
+        'stage': game.stage,
+        'bet': game.current_bet,
+        'aggressor': game.aggressor,
+        'order': [players.index(p) for p in game.action_order],
+        'index': game.action_index,
+        'seed': game.hand_seed,
+        'dealt': 52 - len(game.deck),
+        'board': [card.id for card in game.board],
+        'players': [
+            [p.name, p.stack, p.current_bet, p.total_bet, p.in_hand, p.has_acted, p.position,
+             [card.id for card in p.hand]]
+            for p in players
+        ],
+        'pot': game.ledger.contributed,
+        'winner': game.winner,
+        'showdown': {
+            name: [[c.id for c in shown['hand']], [c.id for c in shown['best']], shown['hand_name']]
+            for name, shown in game.showdown_hands.items()
+        },
+        'payouts': game.showdown_payouts,
+        'allin': game.allin_equity,
+    }
+
+
+def load_game(state, game=None):
+    """dump_game の辞書から状態を戻す。game を渡すとそのオブジェクト (リスナーなど) を使い回す"""
+    if state.get('v') not in (1, VERSION):
+        raise ValueError(f"スナップショットの版 {state.get('v')} は読めません")
+    if game is None:
+        game = TexasHoldem(verbose=False, seats=len(state['players']))
+    elif len(game.players) != len(state['players']):
+        raise ValueError("スナップショットと席数が違います")
+    if state['v'] == 1:
+        game.rng.seed(state['rng'])  # 版 1 は保存時に引き直したシード
+    else:
+        load_rng(game.rng, state['rng'])
+    game.small_blind, game.big_blind, game.starting_stack = state['blinds']
+    game.dealer_position = state['dealer']
+    game.stage = state['stage']
+    game.current_bet = state['bet']
+    game.aggressor = state.get('aggressor')  # 古いスナップショットにはない
+    game.hand_seed = state['seed']
+    if game.hand_seed is None:
+        game.deck.shuffle()
+    else:
+        game.deck.shuffle(game.hand_seed)
+        for _ in range(state['dealt']):
+            game.deck.pop()
+    game.board = [CARDS[i] for i in state['board']]
+
+    players = game.players
+    for player, (name, stack, bet, total, in_hand, acted, position, hand) in zip(players, state['players']):
+        player.name = name
+        player.stack = stack
+        player.current_bet = bet
+        player.total_bet = total
+        player.in_hand = in_hand
+        player.has_acted = acted
+        player.position = position
+        player.hand = [CARDS[i] for i in hand]
+    game.action_order = [players[i] for i in state['order']]
+    game.action_index = state['index']
+
+    ledger = game.ledger
+    ledger.contributed = list(state['pot'])
+    ledger.live = [p.in_hand for p in players]
+    ledger.total = sum(ledger.contributed)
+    game.update_side_pots()
+
+    game.winner = state['winner']
+    game.showdown_hands = {
+        name: {'hand': [CARDS[i] for i in hand], 'best': [CARDS[i] for i in best], 'hand_name': hand_name}
+        for name, (hand, best, hand_name) in state['showdown'].items()
+    }
+    game.showdown_payouts = state['payouts']
+    game.allin_equity = state['allin']
+    return game
+
+
+def encode(state):
+    return json.dumps(state, separators=(',', ':')).encode()
+
+
+def decode(blob):
+    return json.loads(blob)
+
+
+def snapshot(game):
+    """TexasHoldem を bytes にする"""
+    return encode(dump_game(game))
+
+
+def restore(blob, game=None):
+    """snapshot の bytes から TexasHoldem を戻す"""
+    return load_game(decode(blob), game)
+
+
+class MemoryStore:
+    """プロセス内の辞書に保存する (1プロセスで動かすとき・テスト用)"""
+
+    def __init__(self):
+        self.data = {}
+        self.locks = {}
+        self.guard = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def put(self, key, blob):
+        self.data[key] = blob
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def keys(self):
+        return list(self.data)
+
+    @contextmanager
+    def lock(self, key):
+        with self.guard:
+            lock = self.locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+
+class FileStore:
+    """ディレクトリにキーごとのファイルとして保存する。ロックは flock なので別プロセスとも排他になる"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.state")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, blob):
+        # 書きかけのファイルを読まれないように、別名で書いてから置き換える
+        tmp = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp, self.path(key))
+
+    def delete(self, key):
+        for path in (self.path(key), self.path(key) + '.lock'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def keys(self):
+        return [name[:-len('.state')] for name in os.listdir(self.directory) if name.endswith('.state')]
+
+    @contextmanager
+    def lock(self, key):
+        import fcntl  # POSIX だけにあるので、FileStore を使うときだけ読み込む (Windows でもアプリは起動できる)
+
+        with open(self.path(key) + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SqliteStore(FileStore):
+    """1つの SQLite ファイルをキーバリューストアとして使う (外部の KVS の代わり)
+
+    ロックは FileStore と同じく、ファイルと同じ場所に置く flock を使う。
+    """
+
+    def __init__(self, path):
+        self.file = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.local = threading.local()
+        self.connection().execute('CREATE TABLE IF NOT EXISTS snapshots (key TEXT PRIMARY KEY, blob BLOB)')
+
+    def connection(self):
+        # 接続はスレッドごとに作る (sqlite3 の接続はスレッドをまたいで使えない)
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.file, isolation_level=None, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+
+    def path(self, key):
+        return f"{self.file}.{key}"
+
+    def get(self, key):
+        row = self.connection().execute('SELECT blob FROM snapshots WHERE key = ?', (key,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def put(self, key, blob):
+        self.connection().execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?)', (key, blob))
+
+    def delete(self, key):
+        self.connection().execute('DELETE FROM snapshots WHERE key = ?', (key,))
+        super().delete(key)
+
+    def keys(self):
+        return [row[0] for row in self.connection().execute('SELECT key FROM snapshots')]
+
+
+def open_store(url):
+    """'memory', 'file:/ディレクトリ', 'sqlite:/ファイル' からストアを作る。空なら None"""
+    if not url:
+        return None
+    if url == 'memory':
+        return MemoryStore()
+    kind, _, path = url.partition(':')
+    if kind == 'file':
+        return FileStore(path)
+    if kind == 'sqlite':
+        return SqliteStore(path)
+    raise ValueError(f"不明なストア {url}")
@@ -0,0 +1,406 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from LiveOdds import OddsListener
+from Main import TexasHoldem
+from PotLedger import to_chips
+from Snapshot import decode, dump_game, encode, load_game
+
+
+class TableLock:
+    """テーブルのロック
+
+    store があれば、取ったときにストアの最新の状態を読み込み、放すときに変更があれば書き戻す
+    (変更は publish でバージョンが上がったかで判断する)。
+    ストア側のロックも取るので、別のワーカープロセスが同じテーブルを同時に変更することはない。
+    """
+
+    def __init__(self, table, store=None):
+        self.table = table
+        self.store = store
+        self.lock = threading.Lock()
+        self.held = None
+        self.loaded = None  # 読み込んだときのバージョン (ストアになければ None)
+
+    def __enter__(self):
+        self.lock.acquire()
+        if self.store is not None:
+            self.held = self.store.lock(self.table.id)
+            self.held.__enter__()
+            blob = self.store.get(self.table.id)
+            self.loaded = None
+            if blob is not None:
+                self.table.load(blob)
+                self.loaded = self.table.version
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if self.store is not None:
+                try:
+                    if self.loaded != self.table.version:
+                        self.store.put(self.table.id, self.table.dump())
+                finally:
+                    held, self.held = self.held, None
+                    held.__exit__(None, None, None)
+        finally:
+            self.lock.release()
+
+
+class Table:
+    """1つのテーブルのゲーム状態と、席とセッションの対応"""
+
+    def __init__(self, table_id, listeners=(), store=None, odds=None):
+        self.id = table_id
+        self.game = TexasHoldem(verbose=False)
+        for listener in listeners:
+            self.game.add_listener(listener)
+        # ゲーム状態の読み書きはこのロックを取ってから行う
+        self.lock = TableLock(self, store)
+        self.seats = {}  # セッションID -> 席番号
+        self.last_used = time.monotonic()
+        self.version = 0  # 変更を配信するたびに増える
+        self.subscribers = []  # (キュー, 見ている人の席番号)
+        # LiveOdds.OddsService を渡すと、ストリートが変わるたびにエクイティを別のプロセスで計算する
+        self.odds_service = odds
+        self.odds = None  # 最新の計算結果
+        self.odds_generation = 0
+        self.odds_future = None
+        # odds と odds_generation の読み書き用 (計算の終わりはプールの管理スレッドから届く)
+        self.odds_lock = threading.Lock()
+        self.view_cache = None  # ViewModel.public_view の (バージョン, 表示用の状態)
+        if odds is not None:
+            self.game.add_listener(OddsListener(odds, self))
+        self.game.start_hand()
+
+    def dump(self):
+        """席の割り当てとバージョンを含めたテーブルのスナップショット (used は保存した時刻)"""
+        return encode({'seats': self.seats, 'version': self.version, 'used': time.time(),
+                       'game': dump_game(self.game)})
+
+    def load(self, blob):
+        """スナップショットを読み込む (テーブルのロックを取った状態で呼ぶ)
+
+        別のワーカーで進んでいた (バージョンが違う) ときは、手元のエクイティは古いので計算し直す。
+        """
+        state = decode(blob)
+        changed = state['version'] != self.version
+        self.seats = state['seats']
+        self.version = state['version']
+        load_game(state['game'], self.game)
+        self.view_cache = None
+        if changed and self.odds_service is not None:
+            self.odds_service.request(self)
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def seat_of(self, session_id):
+        return self.seats.get(session_id)
+
+    def join(self, session_id, seat=None):
+        """空いている席 (または指定の席) に座る。座れなければ None を返す"""
+        if session_id in self.seats:
+            return self.seats[session_id]
+        taken = set(self.seats.values())
+        free = [i for i in range(len(self.game.players)) if i not in taken]
+        if seat is None:
+            seat = free[0] if free else None
+        elif seat not in free:
+            seat = None
+        if seat is not None:
+            self.seats[session_id] = seat
+        return seat
+
+    def leave(self, session_id):
+        self.seats.pop(session_id, None)
+
+    def can_act(self, session_id):
+        """誰も座っていない席のアクションは誰でも (ホットシート)、座っている席は本人だけが行える"""
+        if self.game.stage in (None, 'showdown'):
+            return True
+        seat = self.game.players.index(self.game.acting_player())
+        owner = [sid for sid, s in self.seats.items() if s == seat]
+        return not owner or owner[0] == session_id
+
+    def can_start_hand(self, session_id):
+        """次のハンドはハンドが終わってから、座っている人か、空いた席があればホットシートの誰かが始められる"""
+        if self.game.stage not in (None, 'showdown'):
+            return False
+        return session_id in self.seats or len(self.seats) < len(self.game.players)
+
+    def public_state(self):
+        """全員に見せてよい状態 (差分の計算に使う)"""
+        game = self.game
+        acting = None
+        if game.stage not in (None, 'showdown'):
+            acting = game.players.index(game.acting_player())
+        return {
+            'stage': game.stage,
+            'pot': game.pot,
+            'current_bet': game.current_bet,
+            'board': [str(card) for card in game.board],
+            'acting': acting,
+            'seats': [(p.stack, p.current_bet, p.in_hand) for p in game.players],
+        }
+
+    def act(self, action, amount=0):
+        """アクションを処理し、変化した部分だけを購読者に配信して返す"""
+        before = self.public_state()
+        seat = before['acting']
+        self.game.process_action(action, amount)
+        after = self.public_state()
+
+        diff = {'actor': seat, 'action': action}
+        if seat is not None:
+            diff['bet'] = self.game.players[seat].current_bet
+        if after['stage'] != before['stage']:
+            diff['stage'] = after['stage']
+        if after['board'] != before['board']:
+            diff['board'] = after['board'][len(before['board']):]
+        for key in ('pot', 'current_bet'):
+            if after[key] != before[key]:
+                diff[key] = after[key]
+        diff['acting'] = after['acting']
+        if after['acting'] is not None:
+            player = self.game.players[after['acting']]
+            diff['actor_name'] = player.name
+            diff['to_call'] = self.game.current_bet - player.current_bet
+        diff['seats'] = {
+            i: state for i, (state, old) in enumerate(zip(after['seats'], before['seats'])) if state != old
+        }
+        if after['stage'] == 'showdown':
+            diff['reload'] = True  # 結果表示は全体を描き直す
+        self.publish(diff)
+        return diff
+
+    def subscribe(self, seat=None):
+        events = queue.Queue(maxsize=256)
+        self.subscribers.append((events, seat))
+        return events
+
+    def unsubscribe(self, events):
+        self.subscribers = [s for s in self.subscribers if s[0] is not events]
+
+    def is_subscribed(self, events):
+        return any(s[0] is events for s in self.subscribers)
+
+    def publish(self, event):
+        """購読者ごとのキューに差分を入れる (テーブルのロックを取った状態で呼ぶ)"""
+        self.version += 1
+        event['version'] = self.version
+        hotseat = None
+        if 'acting' in event:
+            # 座っていない人 (ホットシート) には手番のプレイヤーのカードとエクイティを見せる
+            hotseat = {'seat_odds': self.odds_for(None)}
+            acting = self.hotseat_seat()
+            if acting is not None:
+                hotseat['hand'] = [str(card) for card in self.game.players[acting].hand]
+        for events, seat in list(self.subscribers):
+            message = event
+            if seat is None and hotseat is not None:
+                message = dict(event, **hotseat)
+            try:
+                events.put_nowait(message)
+            except queue.Full:
+                # 読み出しが追いつかない購読者は切る (再接続時にバージョンの違いで描き直す)
+                self.unsubscribe(events)
+
+    def notify(self, event):
+        """バージョンを上げずに購読者へ送る (ゲームの状態ではない情報。ロックなしで呼べる)
+
+        エクイティは odds_for で見ている人ごとに見せてよい分だけにして送る。
+        """
+        for events, seat in list(self.subscribers):
+            message = event
+            if 'odds' in event:
+                message = {'odds': self.odds_for(seat, event['odds'])}
+            try:
+                events.put_nowait(message)
+            except queue.Full:
+                self.unsubscribe(events)
+
+    def hotseat_seat(self):
+        """手番の席が誰も座っていない席ならその席番号 (ホットシートで座っていない人に手札を見せる席)"""
+        game = self.game
+        if game.stage in (None, 'showdown'):
+            return None
+        seat = game.players.index(game.acting_player())
+        return None if seat in self.seats.values() else seat
+
+    def odds_for(self, seat, odds=None):
+        """席 seat の人に見せてよいエクイティ
+
+        座っている人には自分の分だけ、座っていない人 (seat が None) には手番の空いた席の分だけ
+        (手札を見せている席と同じ)。ほかの人のエクイティとアウツは手札がわかるので送らない。
+        """
+        odds = odds or self.odds
+        if odds is None:
+            return None
+        if seat is None:
+            seat = self.hotseat_seat()
+        return dict(odds, players=[row for row in odds['players'] if seat is not None and row['seat'] == seat])
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'stage': self.game.stage,
+            'pot': self.game.pot,
+            'seated': len(self.seats),
+            'seats': len(self.game.players),
+        }
+
+
+def stored_summary(table_id, state):
+    """ストアのスナップショット (decode したもの) から Table.summary と同じ内容を作る (ゲームは組み立てない)"""
+    game = state['game']
+    return {
+        'id': table_id,
+        'stage': game['stage'],
+        'pot': to_chips(sum(game['pot'])),
+        'seated': len(state['seats']),
+        'seats': len(game['players']),
+    }
+
+
+class TableRegistry:
+    """テーブルの作成・検索・一覧と、使われていないテーブルの破棄
+
+    テーブルごとにロックを持つので、別々のテーブルへのアクションは並行に処理できる。
+    レジストリ自体のロックは辞書の操作の間だけ取る。
+    """
+
+    def __init__(self, max_tables=1000, idle_timeout=30 * 60, listeners=(), store=None, odds=None,
+                 sweep_interval=60, evict_after=60):
+        self.max_tables = max_tables
+        self.idle_timeout = idle_timeout
+        # 上限に達したとき、ストアがなければ evict_after 秒以上使われていないテーブルだけを捨てられる
+        self.evict_after = evict_after
+        # ストアの中で idle_timeout 秒以上変更のないテーブルを消す間隔 (create と summaries のついでに行う)
+        self.sweep_interval = sweep_interval
+        self.next_sweep = 0
+        self.listeners = listeners  # 作るテーブルすべてのゲームに登録するイベントリスナー
+        # Snapshot のストアを渡すと、テーブルの状態はロックのたびにストアと同期する
+        # (どのワーカープロセスでもどのテーブルのリクエストを処理できる)
+        self.store = store
+        self.odds = odds  # LiveOdds.OddsService (テーブルのライブのエクイティ表示)
+        self.tables = OrderedDict()  # 最近使った順 (末尾が最新)
+        self.lock = threading.Lock()
+
+    def create(self, table_id=None):
+        """テーブルを作って返す (同じ ID のテーブルがあればそれを返す)
+
+        上限に達していて、捨ててよいテーブルがなければ None を返す。
+        """
+        table_id = table_id or uuid.uuid4().hex[:8]
+        with self.lock:
+            self._evict()
+            if table_id in self.tables:
+                return self.tables[table_id]
+            if not self._make_room():
+                return None
+        # Table() はハンドを始めるので、ID と空きを確かめてから作る
+        table = Table(table_id, self.listeners, self.store, self.odds)
+        if self.store is not None:
+            with table.lock:
+                pass  # ストアにあればその状態を読み込み、なければ新しいテーブルとして保存する
+        with self.lock:
+            if table.id in self.tables:
+                return self.tables[table.id]  # 作っている間に別のスレッドが作った
+            if not self._make_room():
+                return None
+            self.tables[table.id] = table
+        self.sweep()
+        return table
+
+    def _make_room(self):
+        """上限未満になるまで最も古いテーブルを捨てる。空けられなければ False (self.lock を取った状態で呼ぶ)
+
+        ストアがあれば状態はストアに残っているので、古い順にそのまま捨てる。ストアがなければ捨てると
+        ゲームが失われるので、見ている人がおらず、座っている人もおらず、evict_after 秒以上使われていない
+        テーブルだけを捨てる。
+        """
+        limit = time.monotonic() - self.evict_after
+        while len(self.tables) >= self.max_tables:
+            if self.store is not None:
+                self.tables.popitem(last=False)
+                continue
+            idle = next((table_id for table_id, table in self.tables.items()
+                         if not table.subscribers and not table.seats and table.last_used < limit), None)
+            if idle is None:
+                return False
+            del self.tables[idle]
+        return True
+
+    def get(self, table_id):
+        with self.lock:
+            table = self.tables.get(table_id)
+            if table is not None:
+                table.touch()
+                self.tables.move_to_end(table_id)
+                return table
+        if self.store is not None and self.store.get(table_id) is not None:
+            return self.create(table_id)  # 別のプロセスが作ったテーブル
+        return None
+
+    def get_or_create(self, table_id):
+        return self.get(table_id) or self.create(table_id)
+
+    def stored_version(self, table_id):
+        """ストアに保存されているテーブルのバージョン (別のワーカーでの変更の検出用)。なければ None"""
+        blob = None if self.store is None else self.store.get(table_id)
+        return None if blob is None else decode(blob)['version']
+
+    def summaries(self):
+        """テーブルの一覧 (Table.summary の辞書のリスト)
+
+        ストアがあればストアのスナップショットから作り、テーブルを読み込んだり使った印を付けたりはしない
+        (一覧を見ても使われていないテーブルは破棄される)。
+        """
+        if self.store is None:
+            with self.lock:
+                self._evict()
+                tables = list(self.tables.values())
+            return [table.summary() for table in tables]
+        self.sweep()
+        result = []
+        for table_id in self.store.keys():
+            blob = self.store.get(table_id)
+            if blob is not None:
+                result.append(stored_summary(table_id, decode(blob)))
+        return result
+
+    def sweep(self, now=None):
+        """ストアから idle_timeout 秒以上変更のないテーブルを消す (sweep_interval 秒に一度だけ)
+
+        このプロセスで最近使ったテーブルは残す。消すときはストアのロックを取って時刻を確かめ直す。
+        """
+        if self.store is None:
+            return
+        now = time.time() if now is None else now
+        if now < self.next_sweep:
+            return
+        self.next_sweep = now + self.sweep_interval
+        limit = now - self.idle_timeout
+        with self.lock:
+            self._evict()
+            active = set(self.tables)
+        for table_id in self.store.keys():
+            if table_id in active:
+                continue
+            with self.store.lock(table_id):
+                blob = self.store.get(table_id)
+                if blob is not None and decode(blob).get('used', 0) < limit:
+                    self.store.delete(table_id)
+
+    def _evict(self):
+        """idle_timeout 秒以上使われていないテーブルを捨てる (self.lock を取った状態で呼ぶ)"""
+        limit = time.monotonic() - self.idle_timeout
+        while self.tables:
+            table_id, table = next(iter(self.tables.items()))
+            if table.last_used >= limit:
+                break
+            del self.tables[table_id]
@@ -0,0 +1,89 @@
+import sys
+import time
+
+import numpy as np
+
+from PotLedger import to_units
+
+
+class TableState:
+    """多数のテーブルの状態を列ごとの配列 (テーブル x 席) で持つ
+
+    スタックとベットは台帳と同じ整数単位。席が空いているところは seated が False。
+    1テーブルずつ Player を持つより1テーブルあたりのメモリが小さく、
+    ストリートが終わったかどうかなどの判定を全テーブルまとめて行える。
+    """
+
+    def __init__(self, tables, seats=10):
+        self.tables = tables
+        self.seats = seats
+        shape = (tables, seats)
+        self.stack = np.zeros(shape, dtype=np.int64)
+        self.bet = np.zeros(shape, dtype=np.int64)
+        self.total_bet = np.zeros(shape, dtype=np.int64)
+        self.seated = np.zeros(shape, dtype=bool)
+        self.in_hand = np.zeros(shape, dtype=bool)
+        self.has_acted = np.zeros(shape, dtype=bool)
+        self.current_bet = np.zeros(tables, dtype=np.int64)
+
+    @classmethod
+    def from_games(cls, games, seats=None):
+        """TexasHoldem の一覧から作る"""
+        state = cls(len(games), seats or max(len(g.players) for g in games))
+        for i, game in enumerate(games):
+            state.load(i, game)
+        return state
+
+    def load(self, table, game):
+        """テーブル table の行に game の状態を写す"""
+        n = len(game.players)
+        if n > self.seats:
+            raise ValueError("席数が列の数より多いです")
+        for column in (self.stack, self.bet, self.total_bet, self.seated, self.in_hand, self.has_acted):
+            column[table] = 0
+        for seat, player in enumerate(game.players):
+            self.stack[table, seat] = to_units(player.stack)
+            self.bet[table, seat] = to_units(player.current_bet)
+            self.total_bet[table, seat] = to_units(player.total_bet)
+            self.in_hand[table, seat] = player.in_hand
+            self.has_acted[table, seat] = player.has_acted
+        self.seated[table, :n] = True
+        self.current_bet[table] = to_units(game.current_bet)
+
+    def players_in_hand(self):
+        """テーブルごとのフォールドしていない人数"""
+        return (self.in_hand & self.seated).sum(axis=1)
+
+    def players_can_act(self):
+        """テーブルごとのまだチップが残っていてアクションできる人数"""
+        return (self.in_hand & self.seated & (self.stack > 0)).sum(axis=1)
+
+    def street_done(self):
+        """テーブルごとに、残っている全員がベットをそろえて行動済みか (process_action の all_done と同じ条件)"""
+        all_in = self.stack == 0
+        matched = (self.bet == self.current_bet[:, None]) | all_in
+        acted = self.has_acted | all_in
+        return ((matched & acted) | ~(self.in_hand & self.seated)).all(axis=1)
+
+    @property
+    def nbytes(self):
+        columns = (self.stack, self.bet, self.total_bet, self.seated, self.in_hand, self.has_acted, self.current_bet)
+        return sum(column.nbytes for column in columns)
+
+
+if __name__ == "__main__":
+    # 例: python TableState.py 1000000  (テーブル数) 1テーブルあたりのメモリと判定の速さを表示
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    state = TableState(tables, 6)
+    rng = np.random.default_rng(0)
+    state.seated[:] = True
+    state.in_hand[:] = rng.random(state.in_hand.shape) < 0.5
+    state.has_acted[:] = True
+    state.stack[:] = rng.integers(0, 2000, state.stack.shape)
+    state.bet[:] = rng.choice([10, 20], state.bet.shape, p=[0.1, 0.9])
+    state.current_bet[:] = 20
+    start = time.perf_counter()
+    done = state.street_done()
+    elapsed = time.perf_counter() - start
+    print(f"{tables} tables: {state.nbytes / tables:.0f} bytes/table, "
+          f"street_done in {elapsed * 1000:.1f} ms ({done.sum()} done)")
@@ -0,0 +1,220 @@
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Main import TexasHoldem
+from PotLedger import to_chips, to_units
+from Simulation import MAX_ACTIONS_PER_HAND, CallPolicy, RandomPolicy, TightPolicy, game_state
+
+# (SB, BB) のブラインドレベル。最後のレベルのあとはそのまま
+DEFAULT_LEVELS = [
+    (10, 20), (15, 30), (25, 50), (50, 100), (75, 150), (100, 200), (150, 300), (200, 400),
+    (300, 600), (400, 800), (500, 1000), (750, 1500), (1000, 2000), (1500, 3000), (2000, 4000),
+    (3000, 6000), (5000, 10000), (7500, 15000), (10000, 20000), (15000, 30000),
+]
+DEFAULT_PAYOUTS = (0.5, 0.3, 0.2)  # 賞金総額に対する 1位, 2位, ... の割合
+
+
+def play_table(policies, seats, dealer, blinds, hands, seed):
+    """1つのテーブルで最大 hands ハンド進める (プロセスプールのワーカーで動く)
+
+    seats は [(参加者番号, スタック, ポリシー番号), ...]。スタックが0になった人はその場で抜け、
+    補充はしない。2人未満になったら終わる。
+    (最後のスタック一覧, 飛んだ人 [(参加者番号, 何ハンド目か, そのハンド開始時のスタック)], ハンド数, ディーラー位置)
+    を返す。
+    """
+    rng = random.Random(seed)
+    for policy in policies:
+        if hasattr(policy, 'reseed'):
+            policy.reseed(rng.getrandbits(64))
+    game = TexasHoldem(verbose=False, seed=rng.getrandbits(64), seats=len(seats))
+    game.rebuy = False
+    game.small_blind, game.big_blind = blinds
+    entrant = {}
+    policy_of = {}
+    for player, (entry, stack, policy) in zip(game.players, seats):
+        player.stack = stack
+        entrant[player] = entry
+        policy_of[player] = policies[policy]
+    game.dealer_position = (dealer - 1) % len(game.players)  # start_hand で1つ進む
+
+    busts = []
+    played = 0
+    for hand in range(hands):
+        if len(game.players) < 2:
+            break
+        starts = [p.stack for p in game.players]
+        game.start_hand()
+        actions = 0
+        while game.stage != 'showdown':
+            player = game.current_player()
+            action, amount = policy_of[player].decide(game_state(game, player))
+            game.process_action(action, amount)
+            actions += 1
+            if actions > MAX_ACTIONS_PER_HAND:
+                raise RuntimeError("ハンドが終了しません")
+        played += 1
+
+        remaining = []
+        dealer = game.dealer_position
+        for seat, (player, start) in enumerate(zip(game.players, starts)):
+            player.stack = to_chips(to_units(player.stack))  # 浮動小数点の誤差を単位にそろえる
+            if player.stack > 0:
+                remaining.append(player)
+            else:
+                busts.append((entrant[player], hand, start))
+                if seat <= game.dealer_position:
+                    dealer -= 1  # ボタンは抜けた人の分だけ前に詰める
+        if len(remaining) != len(game.players):
+            game.players = remaining
+            game.dealer_position = dealer % len(remaining) if remaining else 0
+
+    stacks = [(entrant[p], p.stack) for p in game.players]
+    return stacks, busts, played, game.dealer_position
+
+
+def _table_count(players, table_size):
+    """players 人を table_size 人以下のテーブルに分けるときのテーブル数
+
+    どのテーブルも2人以上になる数にする (table_size が2で人数が奇数なら1テーブルだけ3人になる)。
+    """
+    return max(1, min(math.ceil(players / table_size), players // 2))
+
+
+def _balance(tables, alive, table_size, rng):
+    """人が減ったテーブルを割って、各テーブルの人数の差を1以内にそろえる (1人だけのテーブルは作らない)"""
+    tables = [t for t in tables if t['seats']]
+    needed = _table_count(alive, table_size)
+    while len(tables) > needed:
+        broken = min(tables, key=lambda t: len(t['seats']))
+        tables.remove(broken)
+        for seat in broken['seats']:
+            min(tables, key=lambda t: len(t['seats']))['seats'].append(seat)
+    while True:
+        big = max(tables, key=lambda t: len(t['seats']))
+        small = min(tables, key=lambda t: len(t['seats']))
+        if len(big['seats']) - len(small['seats']) <= 1:
+            break
+        small['seats'].append(big['seats'].pop(rng.randrange(len(big['seats']))))
+    for table in tables:
+        table['dealer'] %= len(table['seats'])
+    return tables
+
+
+def run_tournament(entrants, policies, table_size=9, starting_stack=1500, levels=DEFAULT_LEVELS,
+                   hands_per_level=20, hands_per_round=5, seed=None, executor=None):
+    """1回のトーナメントを最後の1人になるまで進め、参加者ごとの順位を返す
+
+    参加者 i はポリシー policies[i % len(policies)] でプレイする。
+    各ラウンドで全テーブルが hands_per_round ハンドずつ (executor があれば並列に) 進め、
+    ラウンドの終わりに中央で飛んだ人の順位を決め、テーブルを割ったり人を移したりする。
+    """
+    if not 2 <= table_size <= 10:
+        raise ValueError("テーブルの席数は2〜10にしてください")
+    rng = random.Random(seed)
+    order = list(range(entrants))
+    rng.shuffle(order)
+    count = _table_count(entrants, table_size)
+    tables = [
+        {'seats': [[e, starting_stack] for e in order[i::count]], 'dealer': 0}
+        for i in range(count)
+    ]
+    places = {}
+    alive = entrants
+    hands = 0
+    rounds = 0
+    while alive > 1:
+        level = levels[min(len(levels) - 1, rounds * hands_per_round // hands_per_level)]
+        tasks = [
+            (policies, [(e, stack, e % len(policies)) for e, stack in table['seats']],
+             table['dealer'], level, hands_per_round, rng.getrandbits(64))
+            for table in tables
+        ]
+        if executor is not None:
+            results = list(executor.map(play_table, *zip(*tasks), chunksize=max(1, len(tasks) // 64)))
+        else:
+            results = [play_table(*task) for task in tasks]
+
+        busts = []
+        for table, (stacks, table_busts, played, dealer) in zip(tables, results):
+            table['seats'] = [[e, stack] for e, stack in stacks]
+            table['dealer'] = dealer
+            busts += table_busts
+            hands += played
+        # 早く飛んだ人ほど下の順位。同じハンドで飛んだらそのハンドの開始時のスタックが少ない方が下
+        for entry, _, _ in sorted(busts, key=lambda b: (b[1], b[2])):
+            places[entry] = alive
+            alive -= 1
+        tables = _balance(tables, alive, table_size, rng)
+        rounds += 1
+
+    for table in tables:
+        for entry, _ in table['seats']:
+            places[entry] = 1
+    return {'places': places, 'hands': hands, 'rounds': rounds}
+
+
+def simulate(entrants, policies, tournaments=1, workers=1, payouts=DEFAULT_PAYOUTS, seed=None, **kwargs):
+    """トーナメントを tournaments 回行い、ポリシーごとの成績と順位の分布をまとめる
+
+    参加費を1として賞金総額は参加者数。distribution は順位を上位から10%ずつに分けた割合。
+    kwargs は run_tournament に渡す。
+    """
+    rng = random.Random(seed)
+    stats = [
+        {'policy': type(p).__name__, 'entries': 0, 'finish': 0, 'wins': 0, 'itm': 0, 'prize': 0.0,
+         'distribution': [0] * 10}
+        for p in policies
+    ]
+    hands = 0
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for _ in range(tournaments):
+            result = run_tournament(entrants, policies, seed=rng.getrandbits(64), executor=executor, **kwargs)
+            hands += result['hands']
+            for entry, place in result['places'].items():
+                s = stats[entry % len(policies)]
+                s['entries'] += 1
+                s['finish'] += place
+                s['wins'] += place == 1
+                if place <= len(payouts):
+                    s['itm'] += 1
+                    s['prize'] += payouts[place - 1] * entrants
+                s['distribution'][min(9, (place - 1) * 10 // entrants)] += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    for s in stats:
+        entries = s['entries'] or 1
+        s['avg_finish'] = s.pop('finish') / entries
+        s['itm'] /= entries
+        s['roi'] = s.pop('prize') / entries - 1.0
+        s['distribution'] = [count / entries for count in s['distribution']]
+    return {
+        'tournaments': tournaments,
+        'entrants': entrants,
+        'hands': hands,
+        'elapsed': elapsed,
+        'hands_per_sec': hands / elapsed if elapsed > 0 else float('inf'),
+        'policies': stats,
+    }
+
+
+if __name__ == "__main__":
+    # 例: python Tournament.py 5000 4 10  (参加者数, プロセス数, トーナメント数)
+    entrants = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    tournaments = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    policies = [TightPolicy(), RandomPolicy(), CallPolicy()]
+    result = simulate(entrants, policies, tournaments=tournaments, workers=workers, seed=0)
+    for s in result['policies']:
+        deciles = ' '.join(f"{d:.2f}" for d in s['distribution'])
+        print(f"{s['policy']:>12}: avg finish {s['avg_finish']:8.1f}  itm {s['itm']:.3%}  "
+              f"roi {s['roi']:+.2%}  wins {s['wins']}  deciles [{deciles}]")
+    print(f"{result['tournaments']} x {result['entrants']} entrants, {result['hands']} hands "
+          f"in {result['elapsed']:.1f}s: {result['hands_per_sec']:.0f} hands/sec")
@@ -0,0 +1,72 @@
+def _cards(cards):
+    return [str(card) for card in cards]
+
+
+def public_view(table):
+    """全員に共通の表示用の状態 (テーブルのロックを取った状態で呼ぶ)
+
+    テーブルのバージョンが変わったときだけ作り直す。テンプレートと /state はこれを使い、
+    ゲームのメソッドを呼ばない (current_player は action_index を進めることがある)。
+    """
+    cached = table.view_cache
+    if cached is not None and cached[0] == table.version:
+        return cached[1]
+    game = table.game
+    showdown = game.stage == 'showdown'
+    acting = None
+    if game.stage is not None and not showdown:
+        acting = game.players.index(game.acting_player())
+    view = {
+        'table': table.id,
+        'version': table.version,
+        'stage': game.stage,
+        'pot': game.pot,
+        'current_bet': game.current_bet,
+        'board': _cards(game.board),
+        'acting': acting,
+        'seats': [
+            {
+                'name': p.name,
+                'stack': p.stack,
+                'bet': p.current_bet,
+                'in_hand': p.in_hand,
+                'position': p.position,
+                'claimed': False,
+                'cards': _cards(p.hand) if showdown else [],
+            }
+            for p in game.players
+        ],
+        'payouts': dict(game.showdown_payouts) if showdown else {},
+    }
+    for seat in table.seats.values():
+        view['seats'][seat]['claimed'] = True
+    if acting is not None:
+        player = game.players[acting]
+        to_call = game.current_bet - player.current_bet
+        view['actor_name'] = player.name
+        view['to_call'] = to_call
+        view['call_label'] = 'Check' if to_call == 0 else 'Call'
+        view['raise_label'] = 'Bet' if game.current_bet == 0 else 'Raise'
+    table.view_cache = (table.version, view)
+    return view
+
+
+def view_for(table, viewer_seat):
+    """見ている人ごとの表示用の状態 (自分のカード、ホットシートなら手番の人のカード、エクイティ)"""
+    view = public_view(table)
+    shown = None
+    if view['stage'] != 'showdown':
+        if viewer_seat is not None:
+            shown = viewer_seat
+        elif view['acting'] is not None and not view['seats'][view['acting']]['claimed']:
+            shown = view['acting']  # ホットシートでは手番のプレイヤーのカードを見せる
+    seats = view['seats']
+    if shown is not None:
+        seats = list(seats)
+        seats[shown] = dict(seats[shown], cards=_cards(table.game.players[shown].hand))
+    return dict(view, seats=seats, viewer_seat=viewer_seat, odds=table.odds_for(viewer_seat))
+
+
+def etag(table, viewer_seat):
+    """view_for の内容が変わったら変わる値 (エクイティはバージョンとは別に届くので世代と有無も入れる)"""
+    return f"{table.id}-{table.version}-{viewer_seat}-{table.odds_generation}-{int(table.odds is not None)}"
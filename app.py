@@ -1,26 +1,203 @@
-from flask import Flask, render_template, request, redirect, url_for
-from Main import TexasHoldem
+import json
+import os
+import queue
+import uuid
+
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, session, abort, jsonify,
+    stream_with_context,
+)
+from LiveOdds import OddsService
+from Metrics import REGISTRY, MetricsListener
+from Snapshot import open_store
+from TableRegistry import TableRegistry
+from ViewModel import etag, view_for
 
 app = Flask(__name__)
+app.secret_key = os.environ.get('SECRET_KEY') or os.urandom(16)
+
+REGISTRY.enabled = True
+# TABLE_STORE=file:/var/lib/holdem や sqlite:/var/lib/holdem.db を指定すると、テーブルの状態を
+# ストアに保存する (再起動しても消えず、複数のワーカープロセスで動かせる)
+# ストリートごとのエクイティは別のプロセスで計算し、終わったら SSE で送る (リクエストは待たない)
+registry = TableRegistry(listeners=[MetricsListener()], store=open_store(os.environ.get('TABLE_STORE')),
+                         odds=OddsService(workers=int(os.environ.get('ODDS_WORKERS', 1))))
+DEFAULT_TABLE = 'default'
+registry.create(DEFAULT_TABLE)
+KEEPALIVE_SECONDS = 15
+# 購読者のキューに入るのはこのプロセスでの変更だけなので、ストアがあるときはこの間隔でストアの
+# バージョンを確かめ、別のワーカーで進んでいれば sync を送って描き直してもらう
+STORE_POLL_SECONDS = 1
+
+
+def session_id():
+    """ブラウザごとのセッションID (席との対応に使う)"""
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+    return session['sid']
+
+
+def get_table(table_id):
+    if table_id == DEFAULT_TABLE:
+        table = registry.get_or_create(DEFAULT_TABLE)
+        if table is None:
+            abort(503)  # テーブル数が上限で、捨ててよいテーブルもない
+        return table
+    table = registry.get(table_id)
+    if table is None:
+        abort(404)
+    return table
+
+
+def wants_redirect():
+    """JavaScript からの送信 (fetch) ならリダイレクトせずに応答する"""
+    return not (request.headers.get('X-Requested-With') or request.accept_mimetypes.best == 'application/json')
+
+
+def table_url(table):
+    if table.id == DEFAULT_TABLE:
+        return url_for('index')
+    return url_for('show_table', table_id=table.id)
 
-game = TexasHoldem()
-game.start_hand()
 
 @app.route('/')
 def index():
-    return render_template('index.html', game=game)
+    return show_table(DEFAULT_TABLE)
 
 @app.route('/action', methods=['POST'])
 def action():
+    return table_action(DEFAULT_TABLE)
+
+@app.route('/state')
+def state():
+    return table_state(DEFAULT_TABLE)
+
+@app.route('/new', methods=['POST'])
+def new_hand():
+    return table_new_hand(DEFAULT_TABLE)
+
+@app.route('/metrics')
+def metrics():
+    """処理時間とイベント数 (Prometheus のテキスト形式)"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/tables', methods=['GET'])
+def list_tables():
+    return jsonify(registry.summaries())
+
+@app.route('/tables', methods=['POST'])
+def create_table():
+    table = registry.create()
+    if table is None:
+        abort(503)
+    return redirect(table_url(table))
+
+@app.route('/table/<table_id>')
+def show_table(table_id):
+    table = get_table(table_id)
+    with table.lock:
+        view = view_for(table, table.seat_of(session_id()))
+    return render_template('index.html', view=view)
+
+@app.route('/table/<table_id>/state')
+def table_state(table_id):
+    """表示用の状態を JSON で返す。If-None-Match が今の ETag と同じなら 304"""
+    table = get_table(table_id)
+    with table.lock:
+        seat = table.seat_of(session_id())
+        tag = etag(table, seat)
+        if request.if_none_match.contains(tag):
+            response = Response(status=304)
+        else:
+            response = jsonify(view_for(table, seat))
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/table/<table_id>/join', methods=['POST'])
+def join_table(table_id):
+    table = get_table(table_id)
+    seat = request.form.get('seat', type=int)
+    with table.lock:
+        if table.join(session_id(), seat) is None:
+            abort(409)
+        table.publish({'reload': True})
+    return redirect(table_url(table))
+
+@app.route('/table/<table_id>/leave', methods=['POST'])
+def leave_table(table_id):
+    table = get_table(table_id)
+    with table.lock:
+        table.leave(session_id())
+        table.publish({'reload': True})
+    return redirect(table_url(table))
+
+@app.route('/table/<table_id>/action', methods=['POST'])
+def table_action(table_id):
+    table = get_table(table_id)
     act = request.form.get('action')
     amount = int(request.form.get('amount', 0) or 0)
-    game.process_action(act, amount)
-    return redirect(url_for('index'))
+    with table.lock:
+        if not table.can_act(session_id()):
+            abort(403)
+        diff = table.act(act, amount)
+    if wants_redirect():
+        return redirect(table_url(table))
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(diff)
+    return '', 204
 
-@app.route('/new')
-def new_hand():
-    game.start_hand()
-    return redirect(url_for('index'))
+@app.route('/table/<table_id>/new', methods=['POST'])
+def table_new_hand(table_id):
+    table = get_table(table_id)
+    with table.lock:
+        if not table.can_start_hand(session_id()):
+            abort(403)
+        table.game.start_hand()
+        table.publish({'reload': True})
+    return redirect(table_url(table))
+
+@app.route('/table/<table_id>/events')
+def table_events(table_id):
+    """テーブルの変化を Server-Sent Events で配信する"""
+    table = get_table(table_id)
+    with table.lock:
+        events = table.subscribe(table.seat_of(session_id()))
+        version = table.version
+
+    def stream():
+        seen = version
+        wait = KEEPALIVE_SECONDS if registry.store is None else min(STORE_POLL_SECONDS, KEEPALIVE_SECONDS)
+        idle = 0
+        try:
+            # 接続時に現在のバージョンを送り、ページが古ければ描き直してもらう
+            yield f"data: {json.dumps({'version': version, 'sync': True})}\n\n"
+            while True:
+                try:
+                    event = events.get(timeout=wait)
+                except queue.Empty:
+                    if not table.is_subscribed(events):
+                        return
+                    stored = registry.stored_version(table.id)
+                    if stored is not None and stored != seen:
+                        seen = stored
+                        idle = 0
+                        yield f"data: {json.dumps({'version': stored, 'sync': True})}\n\n"
+                        continue
+                    idle += wait
+                    if idle >= KEEPALIVE_SECONDS:
+                        idle = 0
+                        yield ": keepalive\n\n"
+                    continue
+                seen = event.get('version', seen)
+                idle = 0
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            with table.lock:
+                table.unsubscribe(events)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,151 @@
+// サーバーから配信される差分を受け取って画面を更新する
+(function () {
+    var body = document.body;
+    var version = Number(body.dataset.version);
+    var cardUrl = body.dataset.cards;
+    var hotseat = body.dataset.hotseat === 'true';
+
+    function format(amount) {
+        return Number(amount).toFixed(2);
+    }
+
+    function cardImage(card) {
+        var img = document.createElement('img');
+        img.src = cardUrl + card.toLowerCase() + '.png';
+        img.alt = card;
+        img.className = 'card-img';
+        return img;
+    }
+
+    function updateSeat(index, state) {
+        var seat = document.getElementById('seat-' + index);
+        var stack = state[0], bet = state[1], inHand = state[2];
+        seat.querySelector('.stack').textContent = format(stack);
+        var betElement = seat.querySelector('.bet');
+        betElement.textContent = format(bet);
+        betElement.hidden = bet <= 0;
+        seat.classList.toggle('folded', !inHand);
+    }
+
+    function showPending() {
+        var pending = document.createElement('li');
+        pending.className = 'pending';
+        pending.textContent = 'calculating...';
+        document.getElementById('odds-list').replaceChildren(pending);
+    }
+
+    function renderOdds(odds) {
+        // 計算中に次のストリートが配られていたら古い結果なので表示しない
+        if (odds.board.length !== document.getElementById('board').children.length) {
+            return;
+        }
+        var list = document.getElementById('odds-list');
+        list.replaceChildren();
+        odds.players.forEach(function (row) {
+            var item = document.createElement('li');
+            var text = row.name + ': ' + (row.equity * 100).toFixed(1) + '%';
+            if (row.outs.length) {
+                text += ' (' + row.outs.length + ' outs)';
+            }
+            item.textContent = text;
+            list.appendChild(item);
+        });
+    }
+
+    function apply(diff) {
+        if (diff.odds) {
+            // エクイティはゲームの状態ではないのでバージョンを持たない
+            renderOdds(diff.odds);
+            return;
+        }
+        if (diff.sync) {
+            // 接続 (再接続) 時点で画面が古ければ描き直す
+            if (diff.version !== version) {
+                location.reload();
+            }
+            return;
+        }
+        if (diff.reload || diff.version !== version + 1) {
+            location.reload();
+            return;
+        }
+        version = diff.version;
+
+        if (diff.stage) {
+            document.getElementById('stage').textContent = diff.stage;
+        }
+        if (diff.pot !== undefined) {
+            document.querySelectorAll('.pot-amount').forEach(function (e) {
+                e.textContent = format(diff.pot);
+            });
+        }
+        (diff.board || []).forEach(function (card) {
+            document.getElementById('board').appendChild(cardImage(card));
+        });
+        if (diff.board) {
+            showPending();
+        }
+        Object.keys(diff.seats || {}).forEach(function (index) {
+            updateSeat(index, diff.seats[index]);
+        });
+
+        document.querySelectorAll('.seat').forEach(function (seat, index) {
+            seat.classList.toggle('acting', index === diff.acting);
+            if (hotseat) {
+                // ホットシートでは手番のプレイヤーのカードだけを表示する
+                var hand = seat.querySelector('.hand');
+                hand.replaceChildren();
+                if (index === diff.acting && diff.hand) {
+                    diff.hand.forEach(function (card) {
+                        hand.appendChild(cardImage(card));
+                    });
+                }
+            }
+        });
+        if (hotseat && 'seat_odds' in diff) {
+            // エクイティも手番のプレイヤーの分に切り替える
+            if (diff.seat_odds) {
+                renderOdds(diff.seat_odds);
+            } else {
+                showPending();
+            }
+        }
+
+        if (diff.actor_name) {
+            document.getElementById('actor').textContent = diff.actor_name;
+            document.getElementById('call-button').textContent = diff.to_call === 0 ? 'Check' : 'Call';
+            if (diff.current_bet !== undefined) {
+                var raiseLabel = diff.current_bet === 0 ? 'Bet' : 'Raise';
+                document.getElementById('raise-button').textContent = raiseLabel;
+                document.getElementById('amount').placeholder = raiseLabel + ' to';
+            }
+        }
+    }
+
+    var source = new EventSource(body.dataset.events);
+    source.onmessage = function (event) {
+        apply(JSON.parse(event.data));
+    };
+
+    // アクションはリダイレクトなしで送信し、結果は配信で受け取る
+    var form = document.getElementById('action-form');
+    if (form) {
+        form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            var data = new FormData(form);
+            if (event.submitter) {
+                data.append(event.submitter.name, event.submitter.value);
+            }
+            fetch(form.action, {
+                method: 'POST',
+                body: data,
+                headers: {'X-Requested-With': 'fetch'}
+            }).then(function (response) {
+                if (response.status === 403) {
+                    alert('It is not your turn.');
+                }
+            });
+            document.getElementById('amount').value = '';
+        });
+    }
+})();
@@ -0,0 +1,102 @@
+from itertools import combinations
+
+import pytest
+
+import AllInEV
+from AllInEV import analyze, analyze_hand, canonical, layer_equity
+from Equity import exact_equity, live_deck, monte_carlo_equity, parse_cards
+from HandEvaluator import evaluate
+from HandHistory import ACTION, ACTIONS, BOARD, HEADER, SEAT, HandHistoryReader
+from Simulation import RandomPolicy, play_hands
+
+
+def record(holes, board, actions, payouts, stack=100000):
+    """1ハンド分の履歴レコードを直接組み立てる (actions は (席, 種類, ストリート, 額))"""
+    parts = [HEADER.pack(0, 0, len(holes), 0, len(board), len(actions))]
+    parts += [SEAT.pack(a.id, b.id, stack, payout) for (a, b), payout in zip(holes, payouts)]
+    parts.append(BOARD.pack(bytes(card.id for card in board).ljust(5, b'\xff')))
+    parts += [ACTION.pack(seat, ACTIONS.index(kind), stage, amount) for seat, kind, stage, amount in actions]
+    return b''.join(parts)
+
+
+@pytest.fixture(scope='module')
+def history(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('ev') / 'hands.hh')
+    play_hands([RandomPolicy(fold=0.1, raise_=0.5, seed=i) for i in range(6)], 300, seed=1,
+               history_path=path)
+    return path
+
+
+def test_expected_is_zero_sum_and_matches_actual_without_all_ins(history):
+    all_ins = 0
+    with HandHistoryReader(history) as reader:
+        for offset in reader.offsets:
+            actual, expected, flags = analyze_hand(reader.data, offset)
+            assert sum(actual) == 0
+            assert sum(expected) == pytest.approx(0, abs=1e-6)
+            if any(flags):
+                all_ins += 1
+            else:
+                assert expected == actual
+    assert all_ins > 0
+
+
+def test_analyze_totals_and_chunks_agree(history):
+    whole = analyze(history, chunk_size=10000)
+    split = analyze(history, chunk_size=7)
+    assert whole['hands'] == split['hands'] == 300
+    for seat, stats in whole['seats'].items():
+        assert split['seats'][seat]['actual'] == stats['actual']
+        assert split['seats'][seat]['ev'] == pytest.approx(stats['ev'])
+    assert sum(s['actual'] for s in whole['seats'].values()) == pytest.approx(0, abs=1e-6)
+    assert sum(s['ev'] for s in whole['seats'].values()) == pytest.approx(0, abs=1e-6)
+
+
+def test_side_pot_goes_only_to_eligible_players():
+    # 席0が短いスタックでフロップにオールイン、席1・2が残りの層を争う
+    holes = [parse_cards('AsAd'), parse_cards('KhKc'), parse_cards('9h8h')]
+    board = parse_cards('Ah7h2c3d4s')
+    actions = [(0, 'sb', 0, 50), (1, 'bb', 0, 100), (2, 'call', 0, 100), (0, 'call', 0, 50),
+               (1, 'call', 0, 0), (0, 'raise', 1, 200), (1, 'raise', 1, 800), (2, 'call', 1, 800)]
+    # 実際の結果: 席0 (セット) がメインポット 900、席2 (ストレート) がサイドポット 1200
+    buffer = record(holes, board, actions, [900, 0, 1200])
+    actual, expected, flags = analyze_hand(buffer, 0)
+    assert actual == [600, -900, 300]
+    assert flags == [True, True, True]
+
+    flop = board[:3]
+    three = exact_equity(holes, flop)['players']
+    # サイドポットは席0のカードも配られないランアウトで、席1と席2だけを比べる
+    ids = [[card.id for card in hand] for hand in holes]
+    flop_ids = [card.id for card in flop]
+    side = 0.0
+    runouts = 0
+    for runout in combinations(live_deck(holes, flop), 2):
+        one, two = (evaluate(hand + flop_ids + list(runout)) for hand in ids[1:])
+        side += 1.0 if one > two else 0.5 if one == two else 0.0
+        runouts += 1
+    side /= runouts
+    assert expected[0] == pytest.approx(900 * three[0]['equity'] - 300)
+    assert expected[1] == pytest.approx(900 * three[1]['equity'] + 1200 * side - 900)
+    assert expected[2] == pytest.approx(900 * three[2]['equity'] + 1200 * (1 - side) - 900)
+
+
+def test_preflop_equity_is_exact_enumeration():
+    holes = [parse_cards('AsKd'), parse_cards('QhQc')]
+    ids = tuple(tuple(card.id for card in hand) for hand in holes)
+    (shares,) = layer_equity(ids, (), ((0, 1),))
+    assert AllInEV._runout_indexes(48, 5).shape == (1712304, 5)
+    assert sum(shares) == pytest.approx(1.0)
+    sampled = monte_carlo_equity(holes, trials=100000, seed=3)['players']
+    assert shares[0] == pytest.approx(sampled[0]['equity'], abs=0.01)
+
+
+def test_canonical_ignores_suits_and_seat_order():
+    first = [tuple(card.id for card in parse_cards(text)) for text in ('AsKs', 'QhQd')]
+    second = [tuple(card.id for card in parse_cards(text)) for text in ('QsQc', 'AhKh')]
+    board = [card.id for card in parse_cards('2s7h9d')]
+    other_board = [card.id for card in parse_cards('2h7s9c')]
+    a = canonical(first, board)
+    b = canonical(second, other_board)
+    assert a[:2] == b[:2]
+    assert [first[i] for i in a[2]][0] != [second[i] for i in b[2]][0]  # 並びは元の席を指す
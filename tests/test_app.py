@@ -0,0 +1,78 @@
+import pytest
+
+import app as web
+
+
+@pytest.fixture
+def table():
+    table = web.registry.create()
+    yield table
+    with table.lock:
+        table.seats.clear()
+
+
+def finish_hand(table):
+    with table.lock:
+        while table.game.stage != 'showdown':
+            table.game.process_action('fold')
+
+
+def test_new_hand_is_post_only(table):
+    client = web.app.test_client()
+    assert client.get(f'/table/{table.id}/new').status_code == 405
+
+
+def test_new_hand_waits_for_showdown(table):
+    client = web.app.test_client()
+    assert client.post(f'/table/{table.id}/new').status_code == 403
+
+
+def test_new_hand_by_seated_player(table):
+    client = web.app.test_client()
+    client.post(f'/table/{table.id}/join')
+    finish_hand(table)
+    assert client.post(f'/table/{table.id}/new').status_code == 302
+    assert table.game.stage == 'preflop'
+
+
+def test_new_hand_rejected_when_every_seat_is_claimed(table):
+    owner = web.app.test_client()
+    for _ in table.game.players:
+        with owner.session_transaction() as session:
+            session.clear()
+        owner.post(f'/table/{table.id}/join')
+    finish_hand(table)
+    stranger = web.app.test_client()
+    assert stranger.post(f'/table/{table.id}/new').status_code == 403
+    assert table.game.stage == 'showdown'
+
+
+def test_event_stream_syncs_changes_from_another_worker(monkeypatch):
+    from Snapshot import MemoryStore
+    from TableRegistry import TableRegistry
+
+    store = MemoryStore()
+    monkeypatch.setattr(web, 'registry', TableRegistry(store=store))
+    monkeypatch.setattr(web, 'STORE_POLL_SECONDS', 0.05)
+    other = TableRegistry(store=store)  # 別のワーカープロセスの代わり
+    table = web.registry.create('shared')
+
+    response = web.app.test_client().get('/table/shared/events', buffered=False)
+    chunks = iter(response.response)
+    assert b'"sync": true' in next(chunks)
+    with other.get('shared').lock as held:
+        held.table.act('call')
+        version = held.table.version
+    assert table.version < version
+    assert f'"version": {version}, "sync": true'.encode() in next(chunks)
+    response.close()
+
+
+def test_creating_a_table_beyond_capacity_is_503(monkeypatch):
+    from TableRegistry import TableRegistry
+
+    full = TableRegistry(max_tables=1)
+    full.create('busy').join('someone')
+    monkeypatch.setattr(web, 'registry', full)
+    assert web.app.test_client().post('/tables').status_code == 503
+    assert list(full.tables) == ['busy']
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from BatchEvaluator import CHUNK, evaluate_batch, random_hands
+from HandEvaluator import evaluate
+
+
+@pytest.mark.parametrize('size', [5, 6, 7])
+def test_batch_matches_scalar(size):
+    hands = random_hands(5000, size, seed=size)
+    assert evaluate_batch(hands).tolist() == [evaluate(ids) for ids in hands.tolist()]
+
+
+def test_batch_spans_several_chunks():
+    hands = random_hands(CHUNK + 123, 7, seed=1)
+    ranks = evaluate_batch(hands)
+    assert ranks.dtype == np.uint32 and ranks.shape == (len(hands),)
+    for i in (0, CHUNK - 1, CHUNK, len(hands) - 1):
+        assert ranks[i] == evaluate(hands[i].tolist())
+
+
+def test_batch_handles_flushes_in_every_suit():
+    hands = np.array([[r << 2 | suit for r in (12, 9, 7, 4, 1)] + [2 << 2 | (suit ^ 1), 3 << 2 | (suit ^ 2)]
+                      for suit in range(4)], dtype=np.uint8)
+    ranks = evaluate_batch(hands)
+    assert len(set(ranks.tolist())) == 1
+    assert ranks[0] == evaluate(hands[0].tolist())
+
+
+def test_random_hands_have_no_duplicate_cards():
+    hands = random_hands(1000, 7, seed=3)
+    assert all(len(set(row)) == 7 for row in hands.tolist())
+    assert hands.max() < 52
+
+
+def test_batch_rejects_bad_shapes():
+    with pytest.raises(ValueError):
+        evaluate_batch(np.zeros((3, 4), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        evaluate_batch(np.zeros(7, dtype=np.uint8))
@@ -0,0 +1,52 @@
+from Main import TexasHoldem
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def betting_round(self, game, stage):
+        self.events.append(('betting_round', stage))
+
+    def player_turn(self, game, player, to_call):
+        self.events.append(('player_turn', player.name))
+
+    def invalid_action(self, game, player, message):
+        self.events.append(('invalid_action', message))
+
+
+def scripted_input(monkeypatch):
+    """BB の最初の入力だけ fold (できないので入力し直し)、あとはすべてコール/チェック"""
+    asked = []
+
+    def answer(prompt):
+        asked.append(prompt)
+        if prompt == "Enter action (call/raise): " and asked.count(prompt) == 1:
+            return 'fold'
+        return 'call'
+
+    monkeypatch.setattr('builtins.input', answer)
+    return asked
+
+
+def test_interactive_hand_reports_through_events(monkeypatch, capsys):
+    scripted_input(monkeypatch)
+    game = TexasHoldem(verbose=False, seed=3)
+    recorder = Recorder()
+    game.add_listener(recorder)
+    game.play_hand()
+
+    assert capsys.readouterr().out == ""  # 表示はすべてリスナーに任せる
+    rounds = [stage for kind, stage in recorder.events if kind == 'betting_round']
+    assert rounds == ['preflop', 'flop', 'turn', 'river']
+    assert ('invalid_action', "Big Blind cannot fold as no raise has been made.") in recorder.events
+    assert sum(1 for kind, _ in recorder.events if kind == 'player_turn') >= 4 * 6
+
+
+def test_console_listener_prints_rounds_and_pot(monkeypatch, capsys):
+    scripted_input(monkeypatch)
+    TexasHoldem(seed=3).play_hand()
+    out = capsys.readouterr().out
+    assert "--- PREFLOP BETTING ROUND ---" in out
+    assert "Big Blind cannot fold" in out
+    assert "\nPot total: 6\n" in out
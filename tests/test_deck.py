@@ -0,0 +1,62 @@
+from collections import Counter
+
+import pytest
+
+from Deck import CARDS, Deck
+from Main import TexasHoldem
+
+
+def draw(deck, n):
+    return [deck.pop() for _ in range(n)]
+
+
+def test_cards_are_interned():
+    assert len(set(map(id, CARDS))) == 52
+    assert [card.id for card in CARDS] == list(range(52))
+
+
+def test_same_seed_deals_the_same_cards():
+    a, b = Deck(), Deck()
+    a.shuffle(123)
+    b.shuffle(123)
+    assert draw(a, 17) == draw(b, 17)
+    a.shuffle(124)
+    b.shuffle(123)
+    assert draw(a, 17) != draw(b, 17)
+
+
+def test_full_deal_is_a_permutation():
+    deck = Deck(seed=9)
+    cards = draw(deck, 52)
+    assert sorted(card.id for card in cards) == list(range(52))
+    assert len(deck) == 0
+    with pytest.raises(IndexError):
+        deck.pop()
+
+
+def test_remaining_ids_excludes_dealt_cards():
+    deck = Deck(seed=1)
+    dealt = {card.id for card in draw(deck, 10)}
+    remaining = deck.remaining_ids()
+    assert len(remaining) == 42 and not dealt & set(remaining)
+
+
+def test_draws_are_roughly_uniform():
+    deck = Deck(seed=0)
+    counts = Counter()
+    for _ in range(5200):
+        deck.shuffle()
+        counts[deck.pop().id] += 1
+    assert set(counts) == set(range(52))
+    assert max(counts.values()) < 2 * min(counts.values())
+
+
+def test_a_hand_replays_from_its_seed():
+    game = TexasHoldem(verbose=False, seed=77)
+    for _ in range(3):
+        game.start_hand()
+    seed = game.hand_seed
+    holes = [[c.id for c in p.hand] for p in game.players]
+    other = TexasHoldem(verbose=False)
+    other.start_hand(seed)
+    assert [[c.id for c in p.hand] for p in other.players] == holes
@@ -0,0 +1,79 @@
+import pytest
+
+from Equity import exact_equity, live_deck, monte_carlo_equity, parse_cards
+from HandEvaluator import evaluate
+
+HANDS = ['AhKh', 'QsQd', '7c8c']
+FLOP = 'Qh9c2h'
+
+
+def hands_of(texts):
+    return [parse_cards(text) for text in texts]
+
+
+def test_monte_carlo_is_reproducible_for_a_seed():
+    hands = hands_of(HANDS)
+    first = monte_carlo_equity(hands, trials=20000, seed=42)
+    again = monte_carlo_equity(hands, trials=20000, seed=42)
+    assert first['players'] == again['players']
+    other = monte_carlo_equity(hands, trials=20000, seed=43)
+    assert other['players'] != first['players']
+
+
+def test_monte_carlo_gives_the_same_result_with_worker_processes():
+    hands = hands_of(HANDS)
+    single = monte_carlo_equity(hands, trials=20000, seed=7, batch_size=5000)
+    pooled = monte_carlo_equity(hands, trials=20000, seed=7, batch_size=5000, workers=2)
+    assert pooled['players'] == single['players']
+    assert pooled['trials'] == single['trials'] == 20000
+
+
+def test_monte_carlo_stops_at_the_margin():
+    result = monte_carlo_equity(hands_of(['AsAd', '7h2c']), trials=1000000, seed=1, margin=0.01)
+    assert result['trials'] < 1000000
+    assert result['margin'] <= 0.01
+    assert result['players'][0]['equity'] == pytest.approx(0.87, abs=0.02)
+
+
+def test_monte_carlo_agrees_with_exact_enumeration():
+    hands = hands_of(HANDS)
+    board = parse_cards(FLOP)
+    exact = exact_equity(hands, board)
+    estimate = monte_carlo_equity(hands, board, trials=20000, seed=5)
+    for e, m in zip(exact['players'], estimate['players']):
+        assert m['equity'] == pytest.approx(e['equity'], abs=0.02)
+
+
+def test_equity_needs_two_players():
+    with pytest.raises(ValueError):
+        monte_carlo_equity(hands_of(['AsAd']), trials=10)
+
+
+def test_exact_equity_matches_brute_force_on_the_turn():
+    hands = hands_of(HANDS)
+    board = parse_cards(FLOP + 'Td')
+    result = exact_equity(hands, board)
+    assert result['runouts'] == 52 - 6 - 4
+    shares = [0.0] * len(hands)
+    for river in live_deck(hands, board):
+        ranks = [evaluate([c.id for c in hand + board] + [river]) for hand in hands]
+        best = max(ranks)
+        winners = [i for i, r in enumerate(ranks) if r == best]
+        for i in winners:
+            shares[i] += 1 / len(winners)
+    for stats, share in zip(result['players'], shares):
+        assert stats['equity'] == pytest.approx(share / result['runouts'])
+    assert sum(stats['equity'] for stats in result['players']) == pytest.approx(1)
+
+
+def test_exact_equity_finds_flush_outs():
+    result = exact_equity(hands_of(['AhKh', 'QsQd']), parse_cards(FLOP))
+    outs = sorted(str(card) for card in result['players'][0]['outs'])
+    assert outs == sorted(r + 'h' for r in '345678TJ')  # 9h はボードがペアになり QQ がフルハウス
+    assert result['players'][1]['outs'] == []
+
+
+def test_exact_equity_on_the_river_is_the_showdown():
+    result = exact_equity(hands_of(['AhKh', 'QsQd']), parse_cards(FLOP + 'Td5h'))
+    assert result['runouts'] == 1
+    assert [p['equity'] for p in result['players']] == [1.0, 0.0]
@@ -0,0 +1,104 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from Card import Card
+from Deck import CARDS
+from HandEvaluator import RANK_VALUE, best_hand, evaluate, evaluate5, hand_rank, hand_strength, rank_to_strength
+
+REVERSE_RANK_ORDER = "AKQJT98765432"
+
+
+def reference_strength(hand):
+    """テーブルを使う前の hand_strength (文字列と Counter で役を数える) と同じ結果を返す比較用"""
+    hand = sorted(hand, key=lambda c: RANK_VALUE[c.rank], reverse=True)
+    counts = Counter(card.rank for card in hand)
+    count_vals = sorted(counts.values(), reverse=True)
+    groups = sorted(counts.items(), key=lambda c: (c[1], RANK_VALUE[c[0]]), reverse=True)
+    order = tuple(RANK_VALUE[r] for r, _ in groups)
+    ranks = "".join(card.rank for card in hand)
+    is_flush = len({card.suit for card in hand}) == 1
+    is_straight = ranks in REVERSE_RANK_ORDER or ranks == "A5432"
+    straight_vals = (3, 2, 1, 0, -1) if ranks == "A5432" else tuple(RANK_VALUE[r] for r in ranks)
+    if is_flush and ranks == "AKQJT":
+        return (9,) + order, "ロイヤルストレートフラッシュ"
+    if is_flush and is_straight:
+        return (8,) + straight_vals, "ストレートフラッシュ"
+    if count_vals == [4, 1]:
+        return (7,) + order, "フォーカード"
+    if count_vals == [3, 2]:
+        return (6,) + order, "フルハウス"
+    if is_flush:
+        return (5,) + order, "フラッシュ"
+    if is_straight:
+        return (4,) + straight_vals, "ストレート"
+    if count_vals == [3, 1, 1]:
+        return (3,) + order, "スリーカード"
+    if count_vals == [2, 2, 1]:
+        return (2,) + order, "ツーペア"
+    if count_vals == [2, 1, 1, 1]:
+        return (1,) + order, "ワンペア"
+    return (0,) + order, "ハイカード"
+
+
+def random_hands(n, size, seed):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), size) for _ in range(n)]
+
+
+def special_hands():
+    """ランダムではほとんど出ない役 (ロイヤル・ホイールのストレートフラッシュ・4カードなど)"""
+    return [
+        [r << 2 | 1 for r in (12, 11, 10, 9, 8)],
+        [r << 2 | 2 for r in (12, 0, 1, 2, 3)],
+        [5 << 2 | s for s in range(4)] + [0],
+        [12 << 2, 0 << 2 | 1, 1 << 2, 2 << 2, 3 << 2],
+        [9 << 2, 9 << 2 | 1, 9 << 2 | 2, 4 << 2, 4 << 2 | 3],
+    ]
+
+
+def test_hand_strength_matches_the_old_evaluator():
+    for ids in random_hands(5000, 5, 1) + special_hands():
+        cards = [CARDS[i] for i in ids]
+        assert hand_strength(cards) == reference_strength(cards)
+
+
+def test_five_card_ranks_order_like_the_old_evaluator():
+    hands = random_hands(3000, 5, 2) + special_hands()
+    keyed = sorted(hands, key=lambda ids: evaluate5(*ids))
+    strengths = [reference_strength([CARDS[i] for i in ids])[0] for ids in keyed]
+    assert strengths == sorted(strengths)
+    # 役の整数が同じなら役も同じ (逆も)
+    for a, b in zip(keyed, keyed[1:]):
+        same = reference_strength([CARDS[i] for i in a])[0] == reference_strength([CARDS[i] for i in b])[0]
+        assert (evaluate5(*a) == evaluate5(*b)) == same
+
+
+def test_hand_strength_keeps_its_tuple_and_name():
+    cards = [Card(r, s) for r, s in (('A', 's'), ('A', 'h'), ('K', 'd'), ('K', 'c'), ('2', 's'))]
+    assert hand_strength(cards) == ((2, 12, 11, 0), 'ツーペア')
+
+
+@pytest.mark.parametrize('size', [6, 7])
+def test_six_and_seven_cards_are_the_best_five(size):
+    for ids in random_hands(1000, size, size):
+        assert evaluate(ids) == max(evaluate5(*five) for five in combinations(ids, 5))
+
+
+def test_best_hand_picks_five_cards_with_the_same_rank():
+    for ids in random_hands(1000, 7, 3):
+        cards = [CARDS[i] for i in ids]
+        rank = hand_rank(cards)
+        best = best_hand(cards)
+        assert len(best) == 5 and set(best) <= set(cards)
+        assert evaluate([card.id for card in best]) == rank
+        assert rank_to_strength(rank) == reference_strength(best)
+
+
+def test_best_hand_orders_straights_and_groups():
+    wheel = best_hand([CARDS[i] for i in (12 << 2, 0 << 2 | 1, 1 << 2, 2 << 2 | 2, 3 << 2, 9 << 2, 10 << 2 | 3)])
+    assert [c.rank for c in wheel] == list('A5432')  # ホイールは A が先頭
+    boat = best_hand([CARDS[i] for i in (4 << 2, 4 << 2 | 1, 9 << 2, 9 << 2 | 1, 9 << 2 | 2, 12 << 2, 0)])
+    assert [c.rank for c in boat] == list('JJJ66')
@@ -0,0 +1,64 @@
+from HandHistory import HandHistoryReader, HandHistoryWriter
+from Main import TexasHoldem
+from Simulation import RandomPolicy, game_state
+
+
+def play(game, policies, hands):
+    """hands ハンド進め、ハンドごとの (シード, ホールカード, ボード, 獲得額, 開始時スタック) を返す"""
+    played = []
+    for _ in range(hands):
+        stacks = [p.stack or game.starting_stack for p in game.players]  # 0 ならリバイする
+        game.start_hand()
+        while game.stage != 'showdown':
+            player = game.current_player()
+            action, amount = policies[game.players.index(player)].decide(game_state(game, player))
+            game.process_action(action, amount)
+        payouts = game.showdown_payouts or {}
+        played.append((
+            game.hand_seed,
+            [[str(c) for c in p.hand] for p in game.players],
+            [str(c) for c in game.board],
+            [payouts.get(p.name, 0) for p in game.players],
+            stacks,
+        ))
+    return played
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'hands.hh')
+    game = TexasHoldem(verbose=False, seed=5)
+    game.history = HandHistoryWriter(path, flush_every=7)
+    played = play(game, [RandomPolicy(seed=i) for i in range(6)], 50)
+    game.history.close()
+
+    with_reader = HandHistoryReader(path)
+    try:
+        assert len(with_reader) == 50
+        for i, (record, (seed, holes, board, payouts, stacks)) in enumerate(zip(with_reader, played)):
+            assert record.hand_id == i
+            assert record.seed == seed
+            assert [[str(c) for c in s['hand']] for s in record.seats] == holes
+            assert [str(c) for c in record.board] == board
+            assert [s['payout'] for s in record.seats] == payouts
+            assert [s['stack'] for s in record.seats] == stacks
+            # 出したチップの合計は獲得額の合計 (ポット) と同じ
+            assert round(sum(a[3] for a in record.actions), 2) == round(sum(payouts), 2)
+            assert record.actions[0][1:3] == ('sb', 'preflop')
+        assert with_reader[17].seed == played[17][0]
+    finally:
+        with_reader.close()
+
+
+def test_reopening_appends_and_continues_hand_ids(tmp_path):
+    path = str(tmp_path / 'hands.hh')
+    for seed in (1, 2):
+        game = TexasHoldem(verbose=False, seed=seed)
+        with HandHistoryWriter(path) as writer:
+            game.history = writer
+            play(game, [RandomPolicy(seed=i) for i in range(6)], 10)
+    reader = HandHistoryReader(path)
+    try:
+        assert [record.hand_id for record in reader] == list(range(20))
+    finally:
+        reader.close()
+
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import random
+import time
+
+import LoadTest
+from LoadTest import Stats, play
+from Simulation import CallPolicy
+
+
+class ScriptedClient:
+    """HttpClient の代わり。/state の応答を script の順に返し、送ったリクエストを記録する"""
+
+    def __init__(self, script):
+        self.stats = Stats()
+        self.script = list(script)
+        self.sent = []
+
+    async def request(self, method, path, route, form=None, headers=(), expect=()):
+        self.sent.append((route, path, time.perf_counter()))
+        if route == 'POST /tables':
+            return 302, {'location': f'http://host/table/t{len(self.sent)}'}, b''
+        if route == 'GET /state':
+            status = self.script.pop(0) if self.script else 200
+            body = json.dumps({'stage': 'showdown'}).encode() if status == 200 else b''
+            return status, {}, body
+        return 200, {}, b''
+
+
+def run(client, seconds):
+    asyncio.run(play(client, CallPolicy(), time.perf_counter() + seconds, 0, random.Random(0)))
+
+
+def test_failed_state_requests_back_off(monkeypatch):
+    monkeypatch.setattr(LoadTest, 'BACKOFF_START', 0.01)
+    client = ScriptedClient([503] * 3 + [None] * 2)
+    run(client, 1.0)
+    states = [sent for route, _, sent in client.sent if route == 'GET /state']
+    gaps = [b - a for a, b in zip(states, states[1:6])]
+    assert all(gap >= 0.01 for gap in gaps)  # 失敗のたびに待つ
+    assert gaps[-1] > gaps[0]  # 待ち時間は伸びていく
+    assert client.stats.recoveries == {'state retry': 5}
+
+
+def test_missing_table_is_recreated():
+    client = ScriptedClient([404, 200])
+    run(client, 0.05)
+    created = [path for route, path, _ in client.sent if route == 'POST /tables']
+    assert len(created) == 2
+    assert client.stats.recoveries['table lost'] == 1
+    assert client.stats.errors == {}
@@ -0,0 +1,58 @@
+import random
+
+from Main import TexasHoldem
+from PotLedger import PotLedger, to_chips, to_units
+from Simulation import RandomPolicy, game_state
+
+
+def test_to_chips_returns_int_for_whole_chips():
+    assert to_chips(1020) == 102 and isinstance(to_chips(1020), int)
+    assert to_chips(995) == 99.5
+    assert to_units(to_chips(995)) == 995
+
+
+def test_side_pots_layer_all_ins():
+    ledger = PotLedger(3)
+    ledger.bet(0, 100)
+    ledger.bet(1, 300)
+    ledger.bet(2, 300)
+    assert ledger.side_pots() == [(300, [0, 1, 2]), (400, [1, 2])]
+
+
+def test_folded_chips_stay_in_the_pots():
+    ledger = PotLedger(3)
+    ledger.bet(0, 500)
+    ledger.bet(1, 200)
+    ledger.bet(2, 200)
+    ledger.fold(0)
+    assert ledger.side_pots() == [(900, [1, 2])]
+
+
+def test_side_pots_conserve_chips():
+    rng = random.Random(0)
+    for _ in range(2000):
+        seats = rng.randint(2, 10)
+        ledger = PotLedger(seats)
+        for seat in range(seats):
+            ledger.bet(seat, rng.choice([0, 5, 10, 40, 40, 100, 250]))
+            if rng.random() < 0.3:
+                ledger.fold(seat)
+        pots = ledger.side_pots()
+        assert sum(amount for amount, _ in pots) == ledger.total
+        for amount, eligible in pots:
+            assert all(ledger.live[s] for s in eligible)
+
+
+def test_hands_conserve_chips_and_keep_whole_stacks_int():
+    policies = [RandomPolicy(seed=i) for i in range(6)]
+    game = TexasHoldem(verbose=False, seed=1, seats=6)
+    for _ in range(300):
+        before = sum(to_units(p.stack or game.starting_stack) for p in game.players)  # 0 ならリバイする
+        game.start_hand()
+        while game.stage != 'showdown':
+            player = game.current_player()
+            action, amount = policies[game.players.index(player)].decide(game_state(game, player))
+            game.process_action(action, amount)
+        assert sum(to_units(p.stack) for p in game.players) == before
+        for player in game.players:
+            assert not (isinstance(player.stack, float) and player.stack.is_integer())
@@ -0,0 +1,35 @@
+import itertools
+import struct
+
+import PreflopTable
+from PreflopTable import CLASSES, HEADER, MAGIC, MAX_OPPONENTS, class_combos, class_index
+
+
+def write_table(path, value=0.5):
+    values = [value] * (CLASSES * (CLASSES + MAX_OPPONENTS))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, CLASSES, MAX_OPPONENTS, 0))
+        f.write(struct.pack(f'<{len(values)}f', *values))
+
+
+def test_classes_cover_every_starting_hand():
+    counts = [0] * CLASSES
+    for a, b in itertools.combinations(range(52), 2):
+        counts[class_index(a, b)] += 1
+    assert sum(counts) == 1326
+    for index in range(CLASSES):
+        combos = class_combos(index)
+        assert len(combos) == counts[index]
+        assert all(class_index(a, b) == index for a, b in combos)
+
+
+def test_default_table_picks_up_a_table_built_later(tmp_path, monkeypatch):
+    path = tmp_path / 'preflop_table.bin'
+    monkeypatch.setattr(PreflopTable, 'DEFAULT_PATH', str(path))
+    monkeypatch.setattr(PreflopTable, '_DEFAULT', {})
+    assert PreflopTable.default_table() is None
+    write_table(path)
+    table = PreflopTable.default_table()
+    assert table is not None and table.class_equity(0, 1) == 0.5
+    assert PreflopTable.default_table() is table
+    table.close()
@@ -0,0 +1,61 @@
+import os
+import struct
+
+import pytest
+
+import PreflopTable
+import PushFold
+from PreflopTable import CLASSES, HEADER, MAGIC, MAX_OPPONENTS
+
+
+def fake_build(path, samples=0, workers=1, seed=0):
+    values = [0.5] * (CLASSES * (CLASSES + MAX_OPPONENTS))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, CLASSES, MAX_OPPONENTS, samples))
+        f.write(struct.pack(f'<{len(values)}f', *values))
+
+
+def test_missing_table_builds_an_approximate_one_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.setattr(PreflopTable, 'DEFAULT_PATH', str(tmp_path / 'preflop_table.bin'))
+    monkeypatch.setattr(PreflopTable, '_DEFAULT', {})
+    monkeypatch.setattr(PushFold, 'APPROX_PATH', str(tmp_path / 'approx.bin'))
+    monkeypatch.setattr(PushFold, 'build', fake_build)
+    with pytest.warns(RuntimeWarning):
+        table = PushFold.equity_table()
+    assert table.samples == PushFold.BUILD_SAMPLES
+    assert os.path.exists(tmp_path / 'approx.bin')
+    assert not os.path.exists(tmp_path / 'preflop_table.bin')
+    assert PreflopTable.default_table() is None
+    table.close()
+
+
+@pytest.mark.skipif(not (os.path.exists(PreflopTable.DEFAULT_PATH) or os.path.exists(PushFold.APPROX_PATH)),
+                    reason="プリフロップ表がない (python PreflopTable.py で作る)")
+def test_heads_up_ten_big_blinds(tmp_path):
+    # 10BB の1対1の均衡は SB が約58%をプッシュし、BB が約37%でコールする
+    result = PushFold.solve(2, 10, iterations=500, cache_dir=str(tmp_path))
+    (push,) = result['push'].values()
+    (call,) = result['call'].values()
+    assert PushFold.range_percent(push) == pytest.approx(0.58, abs=0.02)
+    assert PushFold.range_percent(call) == pytest.approx(0.37, abs=0.02)
+    aa, seven_two = PreflopTable.class_index(48, 49), PreflopTable.class_index(20, 1)
+    assert push[aa] > 0.99 and call[aa] > 0.99
+    assert call[seven_two] < 0.01
+
+
+def test_aggressor_is_the_pusher_not_a_caller():
+    from Main import TexasHoldem
+    from Simulation import game_state
+
+    game = TexasHoldem(verbose=False, seed=1)
+    game.start_hand()
+    pusher = game.current_player()
+    game.process_action('raise', pusher.stack + pusher.current_bet)
+    game.process_action('call')  # 次の人がコールしてもプッシュした人のまま
+    player = game.current_player()
+    state = game_state(game, player)
+    assert state['aggressor'] == pusher.position
+    assert state['to_call'] > 0
+
+    game.start_hand()
+    assert game_state(game, game.current_player())['aggressor'] is None  # ブラインドだけ
@@ -0,0 +1,92 @@
+from itertools import combinations
+
+import pytest
+
+from Equity import parse_cards
+from HandEvaluator import evaluate
+from RangeEquity import RangeEquityCalculator, canonical, parse_range, range_classes
+
+
+def brute_force(range_a, range_b, board_ids):
+    """ランアウトとコンボの組をすべて素直に数える"""
+    deck = [i for i in range(52) if i not in board_ids]
+    wins = ties = pairs = 0
+    for runout in combinations(deck, 5 - len(board_ids)):
+        full = list(board_ids) + list(runout)
+        for a in range_a:
+            if set(a) & set(full):
+                continue
+            mine = evaluate(list(a) + full)
+            for b in range_b:
+                if set(b) & set(full) or set(a) & set(b):
+                    continue
+                other = evaluate(list(b) + full)
+                pairs += 1
+                wins += mine > other
+                ties += mine == other
+    return wins, ties, pairs
+
+
+def test_parse_range_counts_combos():
+    assert len(parse_range('AA')) == 6
+    assert len(parse_range('AKs')) == 4
+    assert len(parse_range('AKo')) == 12
+    assert len(parse_range('AK')) == 16
+    assert len(parse_range('QQ+')) == 18
+    assert len(parse_range('A5s-A2s')) == 16
+    assert len(parse_range('KTs+')) == 12
+    assert len(parse_range('AsKd')) == 1
+    assert range_classes(parse_range('QQ+,AKs')) == sorted(['AA', 'KK', 'QQ', 'AKs'])
+
+
+def test_parse_range_percentage_takes_strongest_classes():
+    top = parse_range('5%')
+    assert parse_range('AA') <= top
+    assert 60 <= len(top) <= 90
+    assert parse_range('5%') <= parse_range('20%')
+
+
+def test_parse_range_rejects_bad_tokens():
+    for text in ('AX', 'AAs', 'AKs-QJs', 'AKx'):
+        with pytest.raises(ValueError):
+            parse_range(text)
+
+
+@pytest.mark.parametrize('board', ['2c7d9hKs', 'AhJd4s'])
+def test_equity_matches_brute_force(board):
+    range_a = parse_range('QQ+,AKs')
+    range_b = parse_range('99,AJo,KQs')
+    board_ids = [card.id for card in parse_cards(board)]
+    if len(board_ids) == 3:
+        # フロップは素直な全列挙が遅いので、レンジを小さくする
+        range_a = parse_range('KK,AKs')
+        range_b = parse_range('JJ,KQs')
+    wins, ties, pairs = brute_force(range_a, range_b, board_ids)
+
+    result = RangeEquityCalculator().equity(range_a, range_b, board)
+    assert result['matchups'] == pairs
+    assert result['win'] == pytest.approx(wins / pairs)
+    assert result['tie'] == pytest.approx(ties / pairs)
+    assert sum(result['equity']) == pytest.approx(1.0)
+
+
+def test_suit_permutations_share_one_cache_entry():
+    calculator = RangeEquityCalculator()
+    first = calculator.equity('AhKh,QQ', 'JJ', '2h7h9c')
+    second = calculator.equity('AsKs,QQ', 'JJ', '2s7s9c')
+    assert calculator.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+    assert first['equity'] == second['equity']
+    board = [card.id for card in parse_cards('2h7h9c')]
+    shifted = [card.id for card in parse_cards('2s7s9d')]
+    assert canonical(parse_range('AhKh'), parse_range('QQ'), board) == \
+        canonical(parse_range('AsKs'), parse_range('QQ'), shifted)
+
+
+def test_combos_exclude_board_cards():
+    result = RangeEquityCalculator().equity('AA', 'KK', 'AhKd2c')
+    assert result['combos'] == [3, 3]
+
+
+def test_disjoint_ranges_raise():
+    with pytest.raises(ValueError):
+        RangeEquityCalculator().equity('AsKs', 'AsKs', '2c3d4h')
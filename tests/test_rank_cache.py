@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+import HandEvaluator
+from Card import Card
+from HandEvaluator import cache_stats, canonical_mask, disable_cache, enable_cache, evaluate, hand_rank
+
+DECK = [Card.from_id(i) for i in range(52)]
+
+
+@pytest.fixture(autouse=True)
+def no_cache():
+    disable_cache()
+    yield
+    disable_cache()
+
+
+def hands(count, size=7, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(DECK, size) for _ in range(count)]
+
+
+def swap_suits(cards, perm):
+    return [Card.from_id(card.id & ~3 | perm[card.id & 3]) for card in cards]
+
+
+def test_cache_is_off_by_default():
+    assert HandEvaluator._CACHE is None
+    assert cache_stats() is None
+
+
+@pytest.mark.parametrize('policy', ['lru', 'clock'])
+def test_cached_ranks_match_direct_evaluation(policy):
+    enable_cache(size=64, policy=policy)
+    sample = hands(300)
+    for cards in sample + sample:
+        assert hand_rank(cards) == evaluate([card.id for card in cards])
+    stats = cache_stats()
+    assert stats['policy'] == policy
+    assert stats['entries'] <= 64
+    assert stats['hits'] + stats['misses'] == 600
+
+
+@pytest.mark.parametrize('policy', ['lru', 'clock'])
+def test_suit_permutations_share_an_entry(policy):
+    enable_cache(size=16, policy=policy)
+    cards = hands(1, seed=3)[0]
+    hand_rank(cards)
+    assert hand_rank(swap_suits(cards, (3, 2, 1, 0))) == hand_rank(cards)
+    assert cache_stats()['misses'] == 1
+    assert canonical_mask([c.id for c in cards]) == canonical_mask([c.id for c in swap_suits(cards, (1, 0, 3, 2))])
+
+
+def test_lru_keeps_recently_used_entries():
+    cache = enable_cache(size=2, policy='lru')
+    a, b, c = hands(3, seed=4)
+    hand_rank(a)
+    hand_rank(b)
+    hand_rank(a)
+    hand_rank(c)  # 最も古い b が追い出される
+    assert canonical_mask([card.id for card in a]) in cache.data
+    assert canonical_mask([card.id for card in b]) not in cache.data
+
+
+def test_shared_cache_is_visible_to_an_attached_cache():
+    owner = enable_cache(size=1024, shared=True)
+    cards = hands(1, seed=5)[0]
+    rank = hand_rank(cards)
+    attached = HandEvaluator.SharedCache(name=owner.name)
+    try:
+        assert attached.rank([card.id for card in cards]) == rank
+        assert attached.hits == 1
+    finally:
+        attached.close()
+
+
+def test_unknown_policy_raises():
+    with pytest.raises(ValueError):
+        enable_cache(policy='fifo')
@@ -0,0 +1,70 @@
+import copy
+
+from Main import TexasHoldem
+from Simulation import RandomPolicy, game_state
+from Snapshot import FileStore, MemoryStore, SqliteStore, dump_game, load_game, restore, snapshot
+
+
+def play(game, policies, actions):
+    for _ in range(actions):
+        if game.stage == 'showdown':
+            game.start_hand()
+            continue
+        player = game.current_player()
+        action, amount = policies[game.players.index(player)].decide(game_state(game, player))
+        game.process_action(action, amount)
+
+
+def table_view(game):
+    return (
+        game.stage, game.pot, game.current_bet, [c.id for c in game.board],
+        [(p.name, p.stack, p.current_bet, p.in_hand, [c.id for c in p.hand]) for p in game.players],
+    )
+
+
+def test_round_trip_restores_the_same_game():
+    game = TexasHoldem(verbose=False, seed=7)
+    game.start_hand()
+    play(game, [RandomPolicy(seed=i) for i in range(6)], 37)
+    copy_ = restore(snapshot(game))
+    assert table_view(copy_) == table_view(game)
+
+    # 復元したゲームは元と同じように進む (デッキの残りとテーブルの乱数も同じ)
+    play(game, [RandomPolicy(seed=i) for i in range(6)], 200)
+    play(copy_, [RandomPolicy(seed=i) for i in range(6)], 200)
+    assert table_view(copy_) == table_view(game)
+
+
+def test_dump_does_not_change_future_deals():
+    game = TexasHoldem(verbose=False, seed=11)
+    other = TexasHoldem(verbose=False, seed=11)
+    for _ in range(5):
+        dump_game(game)
+        game.start_hand()
+        other.start_hand()
+        assert table_view(game) == table_view(other)
+
+
+def test_version_1_snapshots_still_load():
+    game = TexasHoldem(verbose=False, seed=3)
+    game.start_hand()
+    state = dump_game(game)
+    old = dict(copy.deepcopy(state), v=1, rng=12345)
+    assert table_view(load_game(old)) == table_view(game)
+
+
+def test_stores_keep_blobs(tmp_path):
+    for store in (MemoryStore(), FileStore(str(tmp_path / 'files')), SqliteStore(str(tmp_path / 'db.sqlite'))):
+        with store.lock('t'):
+            store.put('t', b'blob')
+        assert store.get('t') == b'blob'
+        assert store.keys() == ['t']
+        store.delete('t')
+        assert store.get('t') is None and store.keys() == []
+
+
+def test_aggressor_survives_a_round_trip():
+    game = TexasHoldem(verbose=False, seed=4)
+    game.start_hand()
+    game.process_action('raise', 3)
+    assert restore(snapshot(game)).aggressor == game.aggressor is not None
@@ -0,0 +1,91 @@
+import time
+
+from Snapshot import MemoryStore, decode, encode
+from TableRegistry import TableRegistry
+
+
+def test_summaries_do_not_load_stored_tables():
+    store = MemoryStore()
+    TableRegistry(store=store).create('a')
+    other = TableRegistry(store=store)  # 別のワーカープロセスの代わり
+    summaries = other.summaries()
+    assert [s['id'] for s in summaries] == ['a']
+    assert summaries[0]['seats'] == 6 and summaries[0]['stage'] == 'preflop'
+    assert list(other.tables) == []
+
+
+def test_summary_from_store_matches_the_table():
+    store = MemoryStore()
+    registry = TableRegistry(store=store)
+    table = registry.create('a')
+    with table.lock:
+        table.join('session')
+        table.act('call')
+    assert TableRegistry(store=store).summaries() == [table.summary()]
+
+
+def test_sweep_deletes_idle_tables_from_the_store():
+    store = MemoryStore()
+    registry = TableRegistry(store=store, idle_timeout=60)
+    registry.create('old')
+    registry.create('new')
+    state = decode(store.get('old'))
+    store.put('old', encode(dict(state, used=time.time() - 120)))
+
+    other = TableRegistry(store=store, idle_timeout=60)
+    other.sweep()
+    assert sorted(store.keys()) == ['new']
+
+
+def test_sweep_keeps_tables_used_in_this_process():
+    store = MemoryStore()
+    registry = TableRegistry(store=store, idle_timeout=60)
+    registry.create('a')
+    state = decode(store.get('a'))
+    store.put('a', encode(dict(state, used=time.time() - 120)))
+    registry.next_sweep = 0
+    registry.sweep()
+    assert store.keys() == ['a']
+
+
+def test_full_registry_refuses_instead_of_dropping_active_tables():
+    registry = TableRegistry(max_tables=2)
+    seated = registry.create('seated')
+    seated.join('session')
+    watched = registry.create('watched')
+    watched.subscribe()
+    for table in (seated, watched):
+        table.last_used -= 120  # evict_after より古いが idle_timeout より新しい
+    assert registry.create('third') is None
+    assert list(registry.tables) == ['seated', 'watched']
+
+
+def test_full_registry_evicts_the_oldest_idle_table():
+    registry = TableRegistry(max_tables=2, evict_after=60)
+    registry.create('idle').last_used -= 120
+    registry.create('recent')
+    assert registry.create('third') is not None
+    assert list(registry.tables) == ['recent', 'third']
+    registry.tables['recent'].touch()
+    assert registry.create('fourth') is None  # 残りはどちらも最近使った
+
+
+def test_full_registry_with_a_store_evicts_and_reloads():
+    store = MemoryStore()
+    registry = TableRegistry(store=store, max_tables=1)
+    first = registry.create('first')
+    with first.lock:
+        first.join('session')
+        first.act('call')
+    assert registry.create('second') is not None
+    assert list(registry.tables) == ['second']
+    again = registry.get('first')
+    assert again.seats == {'session': 0} and again.version == first.version
+
+
+def test_create_returns_the_existing_table_without_dealing_a_new_hand():
+    registry = TableRegistry()
+    table = registry.create('same')
+    seed = table.game.hand_seed
+    assert registry.create('same') is table
+    assert table.game.hand_seed == seed
@@ -0,0 +1,64 @@
+import numpy as np
+
+from Main import TexasHoldem
+from Simulation import RandomPolicy, game_state
+from TableState import TableState
+
+GAMES = 8
+
+
+def test_matches_the_engine_at_every_action():
+    games = [TexasHoldem(verbose=False, seed=i) for i in range(GAMES)]
+    policies = [RandomPolicy(fold=0.15, raise_=0.3, seed=i) for i in range(6)]
+    closing = TableState(GAMES, 6)  # end_street が呼ばれた瞬間の状態
+    closed = [False] * GAMES
+
+    for i, game in enumerate(games):
+        def end_street(game=game, i=i, original=game.end_street):
+            closing.load(i, game)
+            closed[i] = True
+            original()
+        game.end_street = end_street
+        game.start_hand()
+
+    checked = 0
+    for _ in range(400):
+        for i, game in enumerate(games):
+            closed[i] = False
+            if game.stage == 'showdown':
+                game.start_hand()
+                continue
+            player = game.current_player()
+            action, amount = policies[game.players.index(player)].decide(game_state(game, player))
+            game.process_action(action, amount)
+
+        state = TableState.from_games(games)
+        in_hand = [sum(p.in_hand for p in game.players) for game in games]
+        can_act = [sum(p.in_hand and p.stack > 0 for p in game.players) for game in games]
+        assert state.players_in_hand().tolist() == in_hand
+        assert state.players_can_act().tolist() == can_act
+
+        done = closing.street_done()
+        still_open = state.street_done()
+        for i, game in enumerate(games):
+            if closed[i] and closing.players_in_hand()[i] > 1:
+                assert done[i]  # エンジンがストリートを締めたときは揃っている
+                checked += 1
+            elif not closed[i] and game.stage not in (None, 'showdown'):
+                assert not still_open[i]  # 締めていないなら、まだ行動が残っている
+    assert checked > 50
+
+
+def test_street_done_treats_all_in_players_as_finished():
+    state = TableState(1, 3)
+    state.seated[0] = True
+    state.in_hand[0] = True
+    state.stack[0] = [0, 50, 50]
+    state.bet[0] = [30, 100, 100]
+    state.current_bet[0] = 100
+    state.has_acted[0] = [False, True, True]
+    assert state.street_done().tolist() == [True]
+    assert state.players_can_act().tolist() == [2]
+    state.has_acted[0, 2] = False
+    assert state.street_done().tolist() == [False]
+    assert np.all(state.players_in_hand() == 3)
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from Simulation import CallPolicy, RandomPolicy
+from Tournament import _balance, run_tournament
+
+
+def seat_tables(sizes):
+    entry = iter(range(sum(sizes)))
+    return [{'seats': [[next(entry), 100] for _ in range(size)], 'dealer': size - 1} for size in sizes]
+
+
+@pytest.mark.parametrize('table_size', range(2, 11))
+def test_balance_never_leaves_a_player_alone(table_size):
+    rng = random.Random(table_size)
+    for _ in range(300):
+        sizes = [rng.randint(0, table_size) for _ in range(rng.randint(1, 6))]
+        alive = sum(sizes)
+        if alive < 2:
+            continue
+        tables = _balance(seat_tables(sizes), alive, table_size, rng)
+        lengths = [len(t['seats']) for t in tables]
+        assert sum(lengths) == alive
+        assert min(lengths) >= 2 and max(lengths) <= max(table_size, 3)  # 2人卓で奇数なら1卓だけ3人
+        assert max(lengths) - min(lengths) <= 1
+        assert all(0 <= t['dealer'] < len(t['seats']) for t in tables)
+
+
+def test_balance_three_players_heads_up_tables():
+    tables = _balance(seat_tables([2, 1]), 3, 2, random.Random(0))
+    assert [len(t['seats']) for t in tables] == [3]
+
+
+@pytest.mark.parametrize('entrants, table_size', [(40, 2), (3, 2), (7, 3), (23, 9)])
+def test_tournament_finishes_with_one_winner(entrants, table_size):
+    result = run_tournament(entrants, [CallPolicy(), RandomPolicy()], table_size=table_size, seed=1)
+    places = result['places']
+    assert sorted(places) == list(range(entrants))
+    assert sorted(places.values()) == list(range(1, entrants + 1))
@@ -0,0 +1,153 @@
+
+import pytest
+
+from LiveOdds import OddsService
+from Snapshot import MemoryStore
+from TableRegistry import Table, TableRegistry
+from ViewModel import etag, view_for
+
+
+def fake_odds(table):
+    return {
+        'generation': table.odds_generation,
+        'board': [],
+        'players': [{'seat': i, 'name': p.name, 'equity': 1 / 6, 'outs': []} for i, p in enumerate(table.game.players)],
+    }
+
+
+def odds_seats(odds):
+    return [row['seat'] for row in odds['players']]
+
+
+def acting_seat(table):
+    return table.game.players.index(table.game.acting_player())
+
+
+@pytest.fixture
+def table():
+    table = Table('t')
+    table.odds = fake_odds(table)
+    return table
+
+
+def test_seated_viewer_sees_only_own_cards_and_odds(table):
+    seat = table.join('me', (acting_seat(table) + 1) % 6)
+    view = view_for(table, seat)
+    assert odds_seats(view['odds']) == [seat]
+    assert [i for i, s in enumerate(view['seats']) if s['cards']] == [seat]
+
+
+def test_hotseat_viewer_sees_only_the_acting_unclaimed_seat(table):
+    acting = acting_seat(table)
+    table.join('other', (acting + 1) % 6)
+    view = view_for(table, None)
+    assert odds_seats(view['odds']) == [acting]
+    assert [i for i, s in enumerate(view['seats']) if s['cards']] == [acting]
+
+
+def test_unseated_viewer_sees_nothing_when_the_actor_is_claimed(table):
+    table.join('owner', acting_seat(table))
+    view = view_for(table, None)
+    assert view['odds']['players'] == []
+    assert not any(s['cards'] for s in view['seats'])
+
+
+def test_notify_sends_each_subscriber_only_its_rows(table):
+    acting = acting_seat(table)
+    claimed = table.join('owner', acting)
+    watcher = table.subscribe(None)
+    player = table.subscribe(claimed)
+    table.notify({'odds': table.odds})
+    assert watcher.get_nowait()['odds']['players'] == []
+    assert odds_seats(player.get_nowait()['odds']) == [claimed]
+
+
+def test_action_diff_carries_the_next_hotseat_odds(table):
+    watcher = table.subscribe(None)
+    table.act('call')
+    diff = watcher.get_nowait()
+    assert odds_seats(diff['seat_odds']) == [diff['acting']]
+    assert len(diff['hand']) == 2
+
+
+def test_etag_changes_when_odds_arrive(table):
+    before = etag(table, None)
+    table.odds = None
+    table.odds_generation += 1
+    assert etag(table, None) != before
+
+
+def test_odds_service_publishes_filtered_results():
+    service = OddsService(workers=1)
+    try:
+        table = Table('live', odds=service)
+        seat = table.join('me', 0)
+        # 購読してから新しいハンドを始める (Table() のときの計算は購読前に終わっているかもしれない)
+        events = table.subscribe(seat)
+        watcher = table.subscribe(None)
+        with table.lock:
+            table.game.start_hand()
+        generation = table.odds_generation
+
+        def next_odds(queue):
+            while True:
+                odds = queue.get(timeout=60)['odds']
+                if odds['generation'] == generation:
+                    return odds
+
+        assert odds_seats(next_odds(events)) == [seat]
+        assert all(row['seat'] != seat for row in next_odds(watcher)['players'])
+        assert table.odds['generation'] == generation
+        assert len(table.odds['players']) == 6
+        assert abs(sum(row['equity'] for row in table.odds['players']) - 1) < 1e-6
+    finally:
+        service.shutdown()
+
+
+class RecordingService:
+    """request を呼ばれたときのボードの枚数を記録する OddsService の代わり"""
+
+    def __init__(self):
+        self.boards = []
+
+    def request(self, table):
+        with table.odds_lock:
+            table.odds_generation += 1
+            table.odds = None
+        self.boards.append(len(table.game.board))
+
+
+def test_loading_a_newer_snapshot_requests_fresh_odds():
+    store = MemoryStore()
+    service = RecordingService()
+    mine = TableRegistry(store=store, odds=service).create('shared')
+    other = TableRegistry(store=store).get('shared')  # 別のワーカープロセスの代わり
+    with other.lock:
+        while other.game.stage == 'preflop':
+            other.act('call')
+    mine.odds = fake_odds(mine)  # プリフロップのまま残っている結果
+    generation = mine.odds_generation
+
+    with mine.lock:
+        assert mine.game.stage == 'flop'
+    assert mine.odds is None
+    assert mine.odds_generation > generation
+    assert service.boards[-1] == 3
+
+    # 変化がなければ読み込み直しても計算し直さない
+    requests = len(service.boards)
+    with mine.lock:
+        pass
+    assert len(service.boards) == requests
+
+
+def test_stale_result_does_not_overwrite_a_newer_generation(table):
+    service = OddsService(workers=1)
+    rows = [{'equity': 0.5, 'outs': []}, {'equity': 0.5, 'outs': []}]
+    generation = table.odds_generation
+    table.odds_generation += 1
+    table.odds = None
+    assert not service._publish(table, generation, [0, 1], ['a', 'b'], [], rows)
+    assert table.odds is None
+    assert service._publish(table, table.odds_generation, [0, 1], ['a', 'b'], [], rows)
+    assert table.odds['generation'] == table.odds_generation